@@ -0,0 +1,148 @@
+"""Token authentication backed by a two-level cache.
+
+Resolving a token normally costs a ``Token`` + ``User`` join on every request and on
+every socket connect. ``TokenCache`` keeps the resolved pair in a small in-process LRU
+and in the shared Django cache (Redis), keyed by a digest of the token so raw keys
+never leave the database. Entries are dropped when the token is deleted or the user
+is saved (soft delete, deactivation, privilege or profile changes), right away and
+again once the transaction commits. Other processes may keep serving their local copy
+for at most ``AUTH_TOKEN_LOCAL_TTL`` seconds.
+
+The shared cache is optional on this path: its calls go through ``auth_cache_breaker``,
+and when Redis fails tokens are resolved from the database instead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from apps.posts.broadcast import CircuitBreaker
+
+CACHE_KEY_PREFIX = "auth:token:"
+
+auth_cache_breaker = CircuitBreaker("auth_cache")
+
+
+def token_digest(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenCache:
+    """In-process LRU in front of the shared cache for resolved tokens.
+
+    Values are stored pickled so every request gets its own ``User`` instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def peek(self, key: str) -> tuple | None:
+        """Return ``(user, token)`` from process memory only, without any I/O."""
+
+        digest = token_digest(key)
+        with self._lock:
+            entry = self._local.get(digest)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._local[digest]
+                return None
+            self._local.move_to_end(digest)
+        return pickle.loads(entry[1])
+
+    def resolve(self, key: str) -> tuple | None:
+        """Return ``(user, token)`` for an active user's token, or ``None``."""
+
+        cached = self.peek(key)
+        if cached is not None:
+            return cached
+
+        digest = token_digest(key)
+        cache_key = f"{CACHE_KEY_PREFIX}{digest}"
+        data = auth_cache_breaker.call("auth_cache_get", cache.get, cache_key)
+        if data is None:
+            try:
+                token = Token.objects.select_related("user").get(key=key)
+            except Token.DoesNotExist:
+                return None
+            if not token.user.is_active:
+                return None
+            data = pickle.dumps((token.user, token))
+            auth_cache_breaker.call(
+                "auth_cache_set", cache.set, cache_key, data, settings.AUTH_TOKEN_CACHE_TTL
+            )
+
+        self._remember(digest, data)
+        return pickle.loads(data)
+
+    def invalidate(self, *keys: str):
+        """Forget the given raw token keys in this process and in the shared cache.
+
+        Runs again after the current transaction commits, so a reader that cached the
+        pre-commit user in between does not keep it for ``AUTH_TOKEN_CACHE_TTL``.
+        """
+
+        digests = [token_digest(key) for key in keys]
+        self._forget(digests)
+        transaction.on_commit(lambda: self._forget(digests))
+
+    def _forget(self, digests: list[str]):
+        with self._lock:
+            for digest in digests:
+                self._local.pop(digest, None)
+        auth_cache_breaker.call(
+            "auth_cache_delete",
+            cache.delete_many,
+            [f"{CACHE_KEY_PREFIX}{digest}" for digest in digests],
+        )
+
+    def _remember(self, digest: str, data: bytes):
+        expires_at = time.monotonic() + settings.AUTH_TOKEN_LOCAL_TTL
+        with self._lock:
+            self._local[digest] = (expires_at, data)
+            self._local.move_to_end(digest)
+            while len(self._local) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._local.popitem(last=False)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that resolves tokens through ``token_cache``."""
+
+    def authenticate_credentials(self, key):
+        resolved = token_cache.resolve(key)
+        if resolved is None:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+        return resolved
+
+
+async def resolve_socket_user(key: str):
+    """Return the active, non-deleted user owning a socket ``?token=``, or ``None``."""
+
+    # Warm tokens are answered from process memory without a thread hop.
+    resolved = token_cache.peek(key)
+    if resolved is None:
+        resolved = await database_sync_to_async(token_cache.resolve)(key)
+    if resolved is None:
+        return None
+    user = resolved[0]
+    return user if user.is_active and not user.is_deleted else None
@@ -10,6 +10,16 @@ class IsSelfOrReadOnly(permissions.BasePermission):
         return obj == request.user
 
 
+class IsSelfOrStaff(permissions.BasePermission):
+    """Allow users to see private details of their own account; staff see anyone's."""
+
+    def has_permission(self, request, view):
+        return request.user and request.user.is_authenticated
+
+    def has_object_permission(self, request, view, obj):
+        return obj == request.user or request.user.is_staff
+
+
 class IsSuperuserOrReadOnly(permissions.BasePermission):
     """Allow only superusers to perform write operations."""
 
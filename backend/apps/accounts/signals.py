@@ -0,0 +1,28 @@
+"""Signals that keep the token authentication cache consistent."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance: Token, **_):
+    """Stop honouring a token as soon as it is deleted."""
+
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance: User, created: bool, **_):
+    """Drop cached tokens of a user whose status, privileges or profile changed."""
+
+    if created:
+        return
+    keys = list(Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
+    if keys:
+        token_cache.invalidate(*keys)
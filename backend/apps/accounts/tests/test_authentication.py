@@ -2,9 +2,16 @@
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from apps.accounts.authentication import (
+    CachedTokenAuthentication,
+    auth_cache_breaker,
+    token_cache,
+    token_digest,
+)
 from tests.factories import UserFactory
 
 User = get_user_model()
@@ -237,4 +244,146 @@ class TestUserManager:
                 handle="admin",
                 password="adminpass",
                 is_superuser=False
-            )
\ No newline at end of file
+            )
+
+@pytest.fixture
+def isolated_token_cache(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    token_cache.clear()
+    auth_cache_breaker.reset()
+    yield token_cache
+    token_cache.clear()
+    auth_cache_breaker.reset()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("isolated_token_cache")
+class TestCachedTokenAuthentication:
+    """Resolved tokens are served from cache and dropped when they go stale."""
+
+    def test_warm_token_resolves_without_queries(self, django_assert_num_queries):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+
+        with django_assert_num_queries(0):
+            resolved_user, resolved_token = authentication.authenticate_credentials(token.key)
+
+        assert resolved_user.pk == user.pk
+        assert resolved_token.key == token.key
+
+    def test_shared_cache_serves_other_processes(self, django_assert_num_queries):
+        token = Token.objects.create(user=UserFactory())
+        token_cache.resolve(token.key)
+        # A fresh process has an empty LRU but shares the Redis-backed cache.
+        token_cache.clear()
+
+        with django_assert_num_queries(0):
+            assert token_cache.resolve(token.key)[1].key == token.key
+
+    def test_each_request_gets_its_own_user_instance(self):
+        token = Token.objects.create(user=UserFactory())
+
+        first, _ = token_cache.resolve(token.key)
+        second, _ = token_cache.resolve(token.key)
+
+        assert first is not second
+
+    def test_cache_is_keyed_by_digest(self):
+        token = Token.objects.create(user=UserFactory())
+        token_cache.resolve(token.key)
+
+        assert cache.get(f"auth:token:{token.key}") is None
+        assert cache.get(f"auth:token:{token_digest(token.key)}") is not None
+
+    def test_deleted_token_is_rejected(self):
+        token = Token.objects.create(user=UserFactory())
+        key = token.key
+        token_cache.resolve(key)
+
+        token.delete()
+
+        assert token_cache.resolve(key) is None
+
+    def test_deactivated_user_is_rejected(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        token_cache.resolve(token.key)
+
+        user.is_active = False
+        user.save()
+
+        assert token_cache.resolve(token.key) is None
+
+    def test_privilege_change_refreshes_cached_user(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        token_cache.resolve(token.key)
+
+        user.is_staff = True
+        user.save()
+
+        assert token_cache.resolve(token.key)[0].is_staff is True
+
+    def test_api_request_after_soft_delete_is_unauthorized(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        assert client.get("/api/users/me/").status_code == 200
+
+        user.soft_delete()
+
+        assert client.get("/api/users/me/").status_code == 401
+
+    def test_invalidation_repeats_after_commit(self, django_capture_on_commit_callbacks):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_staff = True
+            user.save()
+            # A concurrent reader caches the user before the save commits.
+            cache.set(f"auth:token:{token_digest(token.key)}", b"stale")
+
+        assert cache.get(f"auth:token:{token_digest(token.key)}") is None
+
+
+def _redis_down(*args, **kwargs):
+    raise ConnectionError("redis is down")
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("isolated_token_cache")
+class TestTokenCacheWithoutRedis:
+    """Authentication keeps working from the database when the shared cache fails."""
+
+    @pytest.fixture(autouse=True)
+    def broken_cache(self, monkeypatch):
+        for method in ("get", "set", "delete_many"):
+            monkeypatch.setattr(cache, method, _redis_down)
+
+    def test_token_resolves_from_database(self):
+        token = Token.objects.create(user=UserFactory())
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        assert client.get("/api/users/me/").status_code == 200
+
+    def test_invalid_token_is_still_rejected(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        assert client.get("/api/users/me/").status_code == 401
+
+    def test_user_save_invalidates_without_error(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        token_cache.resolve(token.key)
+
+        user.is_active = False
+        user.save()
+
+        assert token_cache.resolve(token.key) is None
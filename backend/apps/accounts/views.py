@@ -6,8 +6,13 @@ from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from apps.interactions import bulk
+from apps.interactions.models import EngagementRollup
+from apps.interactions.serializers import BulkFollowSerializer
+from apps.interactions.views import analytics_response, bulk_response
+
 from .models import User
-from .permissions import IsSelfOrReadOnly, IsSuperuserOrReadOnly, CanDeleteUser
+from .permissions import CanDeleteUser, IsSelfOrReadOnly, IsSelfOrStaff, IsSuperuserOrReadOnly
 from .serializers import UserSerializer
 
 logger = logging.getLogger(__name__)
@@ -20,6 +25,7 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     lookup_field = "handle"
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, IsSelfOrReadOnly)
+    throttle_families = {"follow_bulk": "bulk"}
 
     def get_permissions(self):
         if self.action in {"create", "list", "retrieve"}:
@@ -28,6 +34,8 @@ class UserViewSet(viewsets.ModelViewSet):
             return [IsSuperuserOrReadOnly()]
         if self.action == "destroy":
             return [CanDeleteUser()]
+        if self.action == "analytics":
+            return [IsSelfOrStaff()]
         return [permission() for permission in self.permission_classes]
 
     def get_queryset(self):
@@ -52,6 +60,17 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="follow/bulk")
+    def follow_bulk(self, request):
+        """Follow many users at once: ``{"users": [<handle>, ...]}``."""
+        return bulk_response(request, bulk.FOLLOWS, BulkFollowSerializer)
+
+    @action(detail=True, methods=["get"])
+    def analytics(self, request, handle=None):
+        """Engagement gained by the user's posts and followers per hour or day."""
+        user = self.get_object()
+        return analytics_response(request, EngagementRollup.Scope.AUTHOR, user.pk)
+
     @action(detail=True, methods=["post"])
     def make_staff(self, request, handle=None):
         """Make a user staff (can access admin interface)."""
@@ -5,3 +5,6 @@ class InteractionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.interactions"
     verbose_name = "Interactions"
+
+    def ready(self):  # pragma: no cover - import side effects
+        from . import signals  # noqa: F401
@@ -0,0 +1,129 @@
+"""Set-wise creation of likes, reposts, bookmarks and follows.
+
+Clients syncing offline actions and import tooling send hundreds of interactions per
+call. ``bulk_add`` checks them with one query per table (targets, then the rows the
+user already has, per shard when interactions are sharded), writes the new ones with
+``toggles.add_many`` and applies the side effects once for the whole set: one counter
+``UPDATE`` per interaction type, the realtime counter ticks, and one ``INSERT`` into
+the interaction event log, whose consumers (notifications among them) pick the rows
+up like any other write.
+Every requested item gets a result, in request order.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import models, transaction
+
+from apps.accounts.models import User, UserFollow
+from apps.posts.models import Post
+
+from . import events, toggles
+from .counters import COUNTER_FIELDS, adjust_counters, counter_ticker
+from .models import Bookmark, Like, Repost
+
+CREATED = "created"
+EXISTS = "exists"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+DUPLICATE = "duplicate"
+
+# Target key from the request -> target pk.
+Targets = dict[Hashable, int]
+
+
+def _posts(ids: Sequence[int]) -> Targets:
+    rows = Post.objects.filter(pk__in=ids, deleted_at__isnull=True).values_list("pk", flat=True)
+    return {pk: pk for pk in rows}
+
+
+def _users(handles: Sequence[str]) -> Targets:
+    rows = User.objects.filter(handle__in=handles, is_active=True).values_list("handle", "pk")
+    return dict(rows)
+
+
+@dataclass(frozen=True)
+class BulkKind:
+    """How one interaction model is looked up and written."""
+
+    model: type[models.Model]
+    actor: str
+    target: str
+    key: str
+    lookup: Callable[[Sequence[Any]], Targets]
+
+    @property
+    def posts(self) -> bool:
+        return self.target == "post"
+
+
+LIKES = BulkKind(Like, "user", "post", "post", _posts)
+REPOSTS = BulkKind(Repost, "user", "post", "post", _posts)
+BOOKMARKS = BulkKind(Bookmark, "user", "post", "post", _posts)
+FOLLOWS = BulkKind(UserFollow, "follower", "followed", "user", _users)
+
+
+def bulk_add(kind: BulkKind, user: User, keys: Sequence[Any]) -> list[dict[str, Any]]:
+    """Create ``user``'s ``kind`` interactions with the targets named by ``keys``.
+
+    Returns one ``{<key>: key, "status": …}`` per key: ``created``, ``exists``,
+    ``not_found``, ``invalid`` (following yourself) or ``duplicate`` (repeated key).
+    """
+
+    statuses: list[str | None] = [None] * len(keys)
+    first: dict[Any, int] = {}
+    for index, key in enumerate(keys):
+        if key in first:
+            statuses[index] = DUPLICATE
+        else:
+            first[key] = index
+
+    targets = kind.lookup(list(first))
+    target_id = f"{kind.target}_id"
+    owned = kind.model.objects.filter(**{kind.actor: user})
+    if kind.posts:
+        # Read from the shards that hold the targeted posts.
+        owned = owned.for_posts(targets.values())
+    else:
+        owned = owned.filter(**{f"{target_id}__in": list(targets.values())})
+    existing = set(owned.values_list(target_id, flat=True))
+    new = []
+    for key, index in first.items():
+        if key not in targets:
+            statuses[index] = NOT_FOUND
+        elif not kind.posts and targets[key] == user.pk:
+            statuses[index] = INVALID
+        elif targets[key] in existing:
+            statuses[index] = EXISTS
+        else:
+            new.append(key)
+
+    with transaction.atomic():
+        rows = [kind.model(**{kind.actor: user, target_id: targets[key]}) for key in new]
+        inserted = toggles.add_many(kind.model, rows, conflict=(kind.target, kind.actor))
+        created = {getattr(row, target_id) for row in inserted}
+        _apply_side_effects(kind, user, created)
+
+    for key in new:
+        # Rows lost to a concurrent request already exist; the outcome is the same.
+        statuses[first[key]] = CREATED if targets[key] in created else EXISTS
+    return [{kind.key: key, "status": status} for key, status in zip(keys, statuses)]
+
+
+def _apply_side_effects(kind: BulkKind, user: User, created: set[int]):
+    if not created:
+        return
+    target_ids = sorted(created)
+    event_kind = events.EVENT_SOURCES[kind.model][0]
+    events.append_many(event_kind, events.Action.CREATED, user.pk, target_ids)
+    if kind.model in COUNTER_FIELDS:
+        adjust_counters(kind.model, target_ids, 1)
+
+        def mark():
+            for post_id in target_ids:
+                counter_ticker.mark(post_id)
+
+        transaction.on_commit(mark)
@@ -0,0 +1,232 @@
+"""Denormalized engagement counters and their tick-aggregated realtime updates.
+
+Each interaction insert or delete adjusts the matching ``Post`` counter column with an
+``F()`` expression in the same transaction, so rendering a post never counts rows;
+``reconcile_counters`` recounts them in batches should they drift.
+
+For realtime subscribers, interaction writes also mark their post as dirty. Once
+per tick, ``CounterTicker`` reads the counters of the dirty posts and sends one
+``post.counters`` frame per post to the sockets watching it, so a viral post costs
+one message per tick instead of one per like. A short cache lock per post keeps that
+promise across processes: a post already emitted by another process this tick waits
+for the next.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections.abc import Iterable
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.moderation.models import Vote
+from apps.posts.broadcast import send_to_group
+from apps.posts.frames import encode_frame, post_counters_group
+from apps.posts.models import Post
+
+from . import sharding, write_behind
+from .models import Like, Reply, Repost
+
+logger = logging.getLogger(__name__)
+
+# Realtime frame key -> Post counter column.
+COUNTER_SOURCES = {
+    "likes": "like_count",
+    "reposts": "repost_count",
+    "replies": "reply_count",
+}
+
+COUNTER_FIELDS = {
+    Like: "like_count",
+    Repost: "repost_count",
+    Reply: "reply_count",
+    Vote: "vote_count",
+}
+
+
+def adjust_counter(model: type, post_id: int, delta: int):
+    """Add ``delta`` to the counter column that tracks ``model`` rows of ``post_id``.
+
+    In write-behind mode, buffered columns take the delta after the commit instead.
+    """
+
+    write_behind.add_delta(post_id, COUNTER_FIELDS[model], delta)
+
+
+def adjust_counters(model: type, post_ids: Iterable[int], delta: int):
+    """Add ``delta`` to the ``model`` counter of every post in ``post_ids`` at once."""
+
+    write_behind.add_deltas(post_ids, COUNTER_FIELDS[model], delta)
+
+
+def engagement_counts(post_ids: Iterable[int]) -> dict[int, dict[str, int]]:
+    """Return like, repost and reply counts for ``post_ids``, including buffered deltas."""
+
+    post_ids = list(post_ids)
+    counts = {post_id: dict.fromkeys(COUNTER_SOURCES, 0) for post_id in post_ids}
+    pending = write_behind.pending_deltas(post_ids)
+    rows = Post.objects.filter(pk__in=post_ids).values_list("pk", *COUNTER_SOURCES.values())
+    for post_id, *values in rows:
+        deltas = pending.get(post_id, {})
+        counts[post_id] = {
+            key: max(value + deltas.get(field, 0), 0)
+            for (key, field), value in zip(COUNTER_SOURCES.items(), values)
+        }
+    return counts
+
+
+def _actual_count(model: type) -> Coalesce:
+    rows = (
+        model.objects.filter(post_id=OuterRef("pk"))
+        .order_by()
+        .values("post_id")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _counts_by_post(model: type, post_ids: list[int]) -> dict[int, int]:
+    rows = (
+        model.objects.for_posts(post_ids)
+        if sharding.is_sharded(model)
+        else model.objects.filter(post_id__in=post_ids)
+    )
+    rows = rows.order_by().values("post_id").annotate(total=Count("pk"))
+    return dict(rows.values_list("post_id", "total"))
+
+
+def _reconcile_across_shards(post_ids: list[int]) -> list[int]:
+    counts = {field: _counts_by_post(model, post_ids) for model, field in COUNTER_FIELDS.items()}
+    drifted = []
+    for post in Post.objects.filter(pk__in=post_ids).only(*counts).order_by("pk"):
+        changed = False
+        for field, actual in counts.items():
+            if getattr(post, field) != actual.get(post.pk, 0):
+                setattr(post, field, actual.get(post.pk, 0))
+                changed = True
+        if changed:
+            drifted.append(post)
+    Post.objects.bulk_update(drifted, list(counts))
+    return [post.pk for post in drifted]
+
+
+def reconcile_counters(post_ids: Iterable[int]) -> list[int]:
+    """Recount the counters of ``post_ids`` from the interaction tables.
+
+    Only drifted rows are rewritten, each with one ``UPDATE`` that recounts in the
+    database. When the interaction tables are sharded the rows are counted on their
+    shards and the drifted posts rewritten with those counts. Returns the ids of the
+    posts that were repaired.
+    """
+
+    post_ids = list(post_ids)
+    if sharding.partitioned():
+        return _reconcile_across_shards(post_ids)
+    actual = {f"actual_{field}": _actual_count(model) for model, field in COUNTER_FIELDS.items()}
+    drift = Q()
+    for field in COUNTER_FIELDS.values():
+        drift |= ~Q(**{field: F(f"actual_{field}")})
+    drifted = list(
+        Post.objects.filter(pk__in=post_ids)
+        .annotate(**actual)
+        .filter(drift)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    if drifted:
+        Post.objects.filter(pk__in=drifted).update(
+            **{field: _actual_count(model) for model, field in COUNTER_FIELDS.items()}
+        )
+    return drifted
+
+
+class CounterTicker:
+    """Collects dirty posts and emits their counters at most once per tick."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty: set[int] = set()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def tick(self) -> float:
+        return settings.FEED_COUNTER_TICK
+
+    def mark(self, post_id: int):
+        """Record that the counters of ``post_id`` changed."""
+
+        with self._lock:
+            self._dirty.add(post_id)
+        self._ensure_running()
+
+    def pending(self) -> set[int]:
+        with self._lock:
+            return set(self._dirty)
+
+    def clear(self):
+        with self._lock:
+            self._dirty.clear()
+
+    def flush(self) -> list[int]:
+        """Emit counters for dirty posts whose tick slot is free; return their ids."""
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return []
+
+        lock_timeout = math.ceil(max(self.tick, 1))
+        due = [
+            post_id
+            for post_id in sorted(dirty)
+            if cache.add(f"counters:tick:{post_id}", 1, timeout=lock_timeout)
+        ]
+        deferred = dirty.difference(due)
+        if deferred:
+            with self._lock:
+                self._dirty |= deferred
+
+        channel_layer = get_channel_layer()
+        if not due or not channel_layer:
+            return due
+
+        for post_id, counts in engagement_counts(due).items():
+            frame = encode_frame({"type": "post.counters", "post": post_id, **counts})
+            send_to_group(
+                channel_layer,
+                post_counters_group(post_id),
+                {"type": "post.counters", "frame": frame},
+            )
+        return due
+
+    def _ensure_running(self):
+        if self.tick <= 0 or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="counter-ticker", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):  # pragma: no cover - background loop
+        while True:
+            time.sleep(self.tick)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to emit engagement counters")
+            finally:
+                close_old_connections()
+
+
+counter_ticker = CounterTicker()
@@ -0,0 +1,183 @@
+"""Append-only interaction event log and the consumer groups that read it.
+
+Every like, repost, bookmark, reply, vote and follow write appends an
+``InteractionEvent`` row in the same transaction (an outbox), so an event exists
+exactly when the write committed. Derived work (notifications, rollups, rankings)
+runs in consumer groups listed in ``INTERACTION_EVENT_CONSUMERS``, off the request
+path. Each group reads batches in id order and keeps its own ``EventCheckpoint``.
+A batch is handled and its checkpoint advanced in one transaction, so database side
+effects apply once per event; pushes to sockets belong in ``on_commit``.
+
+Ids are assigned at insert but become visible at commit, so a slow transaction can
+commit an id below an already consumed one. Consumers only read events older than
+``INTERACTION_EVENT_SETTLE`` seconds to leave writers time to commit.
+
+``python manage.py replay_events <consumer>`` rewinds a group to run it again over
+the retained events, e.g. after fixing a bug in its handler.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Min
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.accounts.models import UserFollow
+from apps.moderation.models import Vote
+from apps.posts import metrics
+
+from .models import Bookmark, EventCheckpoint, InteractionEvent, Like, Reply, Repost
+
+logger = logging.getLogger(__name__)
+
+Kind = InteractionEvent.Kind
+Action = InteractionEvent.Action
+
+# Model -> (event kind, actor attribute, subject attribute).
+EVENT_SOURCES = {
+    Like: (Kind.LIKE, "user_id", "post_id"),
+    Repost: (Kind.REPOST, "user_id", "post_id"),
+    Bookmark: (Kind.BOOKMARK, "user_id", "post_id"),
+    Reply: (Kind.REPLY, "author_id", "post_id"),
+    Vote: (Kind.VOTE, "voter_id", "post_id"),
+    UserFollow: (Kind.FOLLOW, "follower_id", "followed_id"),
+}
+
+
+def append(instance, action: str):
+    """Record the write of one interaction row in the current transaction."""
+
+    kind, actor, subject = EVENT_SOURCES[type(instance)]
+    InteractionEvent.objects.create(
+        kind=kind,
+        action=action,
+        actor_id=getattr(instance, actor),
+        subject_id=getattr(instance, subject),
+    )
+
+
+def append_many(kind: str, action: str, actor_id: int, subject_ids: Iterable[int]):
+    """Record writes of ``actor_id`` on many subjects with one ``INSERT``."""
+
+    InteractionEvent.objects.bulk_create(
+        InteractionEvent(kind=kind, action=action, actor_id=actor_id, subject_id=subject_id)
+        for subject_id in subject_ids
+    )
+
+
+class EventConsumer:
+    """A consumer group. ``name`` keys its checkpoint; ``kinds`` filters its events."""
+
+    name: str
+    kinds: frozenset[str] | None = None
+
+    def handle(self, events: list[InteractionEvent]):
+        """Apply ``events``, in id order, inside the transaction that checkpoints them."""
+
+        raise NotImplementedError
+
+
+_consumers: dict[str, EventConsumer] | None = None
+
+
+def get_consumers() -> dict[str, EventConsumer]:
+    """Return the configured consumer groups by name."""
+
+    global _consumers
+    if _consumers is None:
+        consumers = [import_string(path)() for path in settings.INTERACTION_EVENT_CONSUMERS]
+        _consumers = {consumer.name: consumer for consumer in consumers}
+    return _consumers
+
+
+@receiver(setting_changed)
+def _reset_consumers(setting, **_):
+    global _consumers
+    if setting == "INTERACTION_EVENT_CONSUMERS":
+        _consumers = None
+
+
+def consume(consumer: EventConsumer, batch_size: int | None = None) -> int:
+    """Hand the next batch to ``consumer`` and advance its checkpoint.
+
+    Returns how many events were read, 0 when the group is caught up or another
+    worker holds its checkpoint.
+    """
+
+    batch_size = batch_size or settings.INTERACTION_EVENT_BATCH_SIZE
+    settled = timezone.now() - timedelta(seconds=settings.INTERACTION_EVENT_SETTLE)
+    EventCheckpoint.objects.get_or_create(consumer=consumer.name)
+    with transaction.atomic():
+        checkpoint = (
+            EventCheckpoint.objects.select_for_update(skip_locked=True)
+            .filter(consumer=consumer.name)
+            .first()
+        )
+        if checkpoint is None:
+            return 0
+        events = list(
+            InteractionEvent.objects.filter(
+                pk__gt=checkpoint.position, created_at__lte=settled
+            ).order_by("pk")[:batch_size]
+        )
+        if not events:
+            return 0
+        wanted = [event for event in events if not consumer.kinds or event.kind in consumer.kinds]
+        if wanted:
+            consumer.handle(wanted)
+        checkpoint.position = events[-1].pk
+        checkpoint.save(update_fields=["position", "updated_at"])
+    metrics.interaction_events_consumed.inc(len(events), consumer=consumer.name)
+    return len(events)
+
+
+def consume_all(batches: int = 10) -> dict[str, int]:
+    """Run every consumer group for up to ``batches`` batches; return events read per group.
+
+    A group whose handler fails is logged and retried from its checkpoint next run.
+    """
+
+    read = {}
+    for name, consumer in get_consumers().items():
+        read[name] = 0
+        try:
+            for _ in range(batches):
+                count = consume(consumer)
+                read[name] += count
+                if count < settings.INTERACTION_EVENT_BATCH_SIZE:
+                    break
+        except Exception:
+            logger.exception("Interaction event consumer %s failed", name)
+    return read
+
+
+def rewind(consumer_name: str, position: int = 0):
+    """Move a consumer group back to ``position`` so it handles later events again."""
+
+    EventCheckpoint.objects.update_or_create(
+        consumer=consumer_name, defaults={"position": position}
+    )
+
+
+def prune_events() -> int:
+    """Delete events every group has read and that are past the replay retention."""
+
+    names = list(get_consumers())
+    cutoff = timezone.now() - timedelta(days=settings.INTERACTION_EVENT_RETENTION_DAYS)
+    events = InteractionEvent.objects.filter(created_at__lt=cutoff)
+    if names:
+        checkpoints = EventCheckpoint.objects.filter(consumer__in=names)
+        if checkpoints.count() < len(names):
+            # A group that never ran has read nothing yet.
+            return 0
+        events = events.filter(pk__lte=checkpoints.aggregate(low=Min("position"))["low"])
+    deleted, _ = events.delete()
+    return deleted
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.counters import reconcile_counters
+from apps.posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recount post engagement counters in batches and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Posts recounted per query.",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help="Resume from this post id.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = options["start"] - 1
+        checked = repaired = 0
+        while True:
+            post_ids = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not post_ids:
+                break
+            drifted = reconcile_counters(post_ids)
+            checked += len(post_ids)
+            repaired += len(drifted)
+            last_id = post_ids[-1]
+            if drifted and options["verbosity"] > 1:
+                self.stdout.write(f"Repaired posts {', '.join(map(str, drifted))}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} posts, repaired {repaired}.")
+        )
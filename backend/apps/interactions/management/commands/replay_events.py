@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.interactions.events import consume, get_consumers, rewind
+from apps.interactions.models import EventCheckpoint
+
+
+class Command(BaseCommand):
+    help = "Rewind an interaction event consumer group and optionally run it to the end."
+
+    def add_arguments(self, parser):
+        parser.add_argument("consumer", help="Name of the consumer group.")
+        parser.add_argument(
+            "--from-id",
+            type=int,
+            default=1,
+            help="First event id to handle again.",
+        )
+        parser.add_argument(
+            "--run",
+            action="store_true",
+            help="Consume the replayed events now instead of leaving them to the worker.",
+        )
+
+    def handle(self, *args, **options):
+        consumers = get_consumers()
+        name = options["consumer"]
+        if name not in consumers:
+            raise CommandError(f"Unknown consumer {name!r}; choose from {', '.join(consumers)}.")
+
+        rewind(name, max(options["from_id"] - 1, 0))
+        replayed = 0
+        if options["run"]:
+            while count := consume(consumers[name]):
+                replayed += count
+
+        position = EventCheckpoint.objects.get(consumer=name).position
+        self.stdout.write(
+            self.style.SUCCESS(f"Consumer {name} at event {position}; replayed {replayed} events.")
+        )
@@ -0,0 +1,78 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.interactions import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Move likes, reposts, bookmarks and votes to the shard their post hashes to "
+        "under the current INTERACTION_SHARDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            dest="sources",
+            help="Database to move rows out of (repeatable; default: every database).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows read and moved per query.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the rows that would move without moving them.",
+        )
+
+    def handle(self, *args, **options):
+        sources = options["sources"] or list(settings.DATABASES)
+        unknown = set(sources) - set(settings.DATABASES)
+        if unknown:
+            raise CommandError(f"Unknown databases: {', '.join(sorted(unknown))}.")
+
+        total = 0
+        for model in sharding.sharded_models():
+            moved = 0
+            # Highest id moved per shard id range, so no sequence hands it out again.
+            highest: dict[int, int] = defaultdict(int)
+            for source in sources:
+                last_id = 0
+                while True:
+                    rows = list(
+                        model._base_manager.using(source)
+                        .filter(pk__gt=last_id)
+                        .order_by("pk")[: options["batch_size"]]
+                    )
+                    if not rows:
+                        break
+                    last_id = rows[-1].pk
+                    by_target = defaultdict(list)
+                    for row in rows:
+                        target = sharding.shard_for(row.post_id)
+                        if target != source:
+                            by_target[target].append(row)
+                    for target, batch in by_target.items():
+                        moved += len(batch)
+                        if options["dry_run"]:
+                            continue
+                        sharding.move_rows(model, batch, source, target)
+                        for row in batch:
+                            space = row.pk // sharding.SHARD_ID_SPACE
+                            highest[space] = max(highest[space], row.pk)
+
+            if not options["dry_run"]:
+                for index, target in enumerate(sharding.shards()):
+                    sharding.align_sequence(model, target, floor=highest[index])
+            total += moved
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{model._meta.label}: {moved} rows")
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} rows."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0002_bookmark_timeline_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCheckpoint',
+            fields=[
+                ('consumer', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('position', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InteractionEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('like', 'Like'), ('repost', 'Repost'), ('bookmark', 'Bookmark'), ('reply', 'Reply'), ('vote', 'Vote'), ('follow', 'Follow')], max_length=10)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('deleted', 'Deleted')], max_length=10)),
+                ('actor_id', models.PositiveBigIntegerField()),
+                ('subject_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0003_interaction_event_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('scope', models.CharField(choices=[('post', 'Post'), ('author', 'Author')], max_length=6)),
+                ('subject_id', models.PositiveBigIntegerField()),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('likes', models.IntegerField(default=0)),
+                ('reposts', models.IntegerField(default=0)),
+                ('bookmarks', models.IntegerField(default=0)),
+                ('replies', models.IntegerField(default=0)),
+                ('votes', models.IntegerField(default=0)),
+                ('followers', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'subject_id', 'granularity', 'bucket'), name='engagement_rollup_bucket_uniq')],
+            },
+        ),
+    ]
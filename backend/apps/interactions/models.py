@@ -1,4 +1,4 @@
-"""User engagement models (likes, reposts, bookmarks, replies)."""
+"""User engagement models (likes, reposts, bookmarks, replies), their event log and rollups."""
 
 from __future__ import annotations
 
@@ -8,14 +8,23 @@ from django.utils import timezone
 
 from apps.posts.models import Post
 
+from .sharding import ShardedQuerySet
+
 User = settings.AUTH_USER_MODEL
 
 
 class Like(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="likes")
+    # Sharded by post (sharding.py): posts and users may live in another database.
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="likes", db_constraint=False
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="likes", db_constraint=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         unique_together = ("post", "user")
         ordering = ("-created_at",)
@@ -25,11 +34,17 @@ class Like(models.Model):
 
 
 class Repost(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="reposts")
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reposts")
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="reposts", db_constraint=False
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="reposts", db_constraint=False
+    )
     quote_text = models.CharField(max_length=500, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         unique_together = ("post", "user")
         ordering = ("-created_at",)
@@ -39,13 +54,23 @@ class Repost(models.Model):
 
 
 class Bookmark(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="bookmarks")
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bookmarks")
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="bookmarks", db_constraint=False
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="bookmarks", db_constraint=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         unique_together = ("post", "user")
         ordering = ("-created_at",)
+        indexes = [
+            # Serves the keyset-paginated bookmarks timeline of one user.
+            models.Index(fields=["user", "-created_at", "-id"], name="bookmark_timeline_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - simple representation
         return f"{self.user} bookmarked {self.post_id}"
@@ -62,3 +87,90 @@ class Reply(models.Model):
 
     def __str__(self) -> str:  # pragma: no cover - simple representation
         return f"Reply {self.pk} on {self.post_id}"
+
+
+class InteractionEvent(models.Model):
+    """Append-only record of one interaction write, inserted in the same transaction.
+
+    Ids are plain integers rather than foreign keys so the log outlives the rows it
+    describes and can be replayed.
+    """
+
+    class Kind(models.TextChoices):
+        LIKE = "like", "Like"
+        REPOST = "repost", "Repost"
+        BOOKMARK = "bookmark", "Bookmark"
+        REPLY = "reply", "Reply"
+        VOTE = "vote", "Vote"
+        FOLLOW = "follow", "Follow"
+
+    class Action(models.TextChoices):
+        CREATED = "created", "Created"
+        DELETED = "deleted", "Deleted"
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    action = models.CharField(max_length=10, choices=Action.choices)
+    actor_id = models.PositiveBigIntegerField()
+    # The post interacted with, or the followed user for follows.
+    subject_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ("id",)
+
+    def __str__(self) -> str:  # pragma: no cover - simple representation
+        return f"{self.kind} {self.action} by {self.actor_id} on {self.subject_id}"
+
+
+class EventCheckpoint(models.Model):
+    """Position of one consumer group in the interaction event log."""
+
+    consumer = models.CharField(max_length=100, primary_key=True)
+    position = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover - simple representation
+        return f"{self.consumer} @ {self.position}"
+
+
+class EngagementRollup(models.Model):
+    """Net engagement one post or author gained during one hour or day (UTC).
+
+    Created interactions add one and removed ones subtract one in the bucket where
+    they happened, so summing a window gives the net change over it.
+    """
+
+    class Scope(models.TextChoices):
+        POST = "post", "Post"
+        AUTHOR = "author", "Author"
+
+    class Granularity(models.TextChoices):
+        HOUR = "hour", "Hour"
+        DAY = "day", "Day"
+
+    id = models.BigAutoField(primary_key=True)
+    scope = models.CharField(max_length=6, choices=Scope.choices)
+    # Post id, or author user id; plain integers like the event log they come from.
+    subject_id = models.PositiveBigIntegerField()
+    granularity = models.CharField(max_length=4, choices=Granularity.choices)
+    bucket = models.DateTimeField()
+    likes = models.IntegerField(default=0)
+    reposts = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    replies = models.IntegerField(default=0)
+    votes = models.IntegerField(default=0)
+    # Only author rollups gain followers.
+    followers = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves range reads of one subject's buckets.
+            models.UniqueConstraint(
+                fields=["scope", "subject_id", "granularity", "bucket"],
+                name="engagement_rollup_bucket_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - simple representation
+        return f"{self.scope} {self.subject_id} {self.granularity} {self.bucket:%Y-%m-%d %H:00}"
@@ -0,0 +1,140 @@
+"""Hourly and daily engagement rollups per post and per author.
+
+The ``rollups`` consumer group of the interaction event log folds each batch of
+events into ``EngagementRollup`` buckets with one ``INSERT … ON CONFLICT DO UPDATE``
+per batch of rows, so analytics read one row per bucket instead of scanning likes,
+reposts, replies and votes by date. Buckets are UTC hours and days; hourly rows are
+dropped after ``ENGAGEMENT_HOURLY_RETENTION_DAYS`` while daily rows are kept.
+
+Buckets only ever add, so replaying this group counts the replayed events twice;
+delete the buckets they fall in before ``replay_events rollups``.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from apps.posts.models import Post
+
+from . import toggles
+from .events import Action, EventConsumer, Kind
+from .models import EngagementRollup, InteractionEvent
+
+Scope = EngagementRollup.Scope
+Granularity = EngagementRollup.Granularity
+
+# Event kind -> rollup column.
+COLUMNS = {
+    Kind.LIKE: "likes",
+    Kind.REPOST: "reposts",
+    Kind.BOOKMARK: "bookmarks",
+    Kind.REPLY: "replies",
+    Kind.VOTE: "votes",
+    Kind.FOLLOW: "followers",
+}
+STEPS = {Granularity.HOUR: timedelta(hours=1), Granularity.DAY: timedelta(days=1)}
+
+# (scope, subject id, granularity, bucket) -> column deltas.
+Deltas = dict[tuple[str, int, str, datetime], Counter]
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Return the start of the UTC hour or day containing ``moment``."""
+
+    start = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if granularity == Granularity.DAY else start
+
+
+def add_rollups(deltas: Deltas):
+    """Add ``deltas`` to their buckets, creating missing ones, in one statement per batch."""
+
+    rows = [
+        EngagementRollup(
+            scope=scope, subject_id=subject_id, granularity=granularity, bucket=bucket, **columns
+        )
+        for (scope, subject_id, granularity, bucket), columns in sorted(deltas.items())
+        if any(columns.values())
+    ]
+    if not rows:
+        return
+    using = router.db_for_write(EngagementRollup)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(EngagementRollup._meta.db_table)
+    assignments = ", ".join(
+        f"{column} = {table}.{column} + EXCLUDED.{column}"
+        for column in map(quote, COLUMNS.values())
+    )
+    conflict = ("scope", "subject_id", "granularity", "bucket")
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for start in range(0, len(rows), toggles.BULK_INSERT_BATCH_SIZE):
+            batch = rows[start : start + toggles.BULK_INSERT_BATCH_SIZE]
+            sql, params = toggles._insert_sql(batch, conflict, connection)
+            cursor.execute(f"{sql} DO UPDATE SET {assignments}", params)
+
+
+class EngagementRollups(EventConsumer):
+    """Folds interaction events into post and author rollups."""
+
+    name = "rollups"
+
+    def handle(self, events: list[InteractionEvent]):
+        post_ids = {event.subject_id for event in events if event.kind != Kind.FOLLOW}
+        authors = dict(Post.objects.filter(pk__in=post_ids).values_list("pk", "author_id"))
+        deltas: Deltas = defaultdict(Counter)
+        for event in events:
+            if event.kind == Kind.FOLLOW:
+                subjects = [(Scope.AUTHOR, event.subject_id)]
+            elif event.subject_id in authors:
+                author_id = authors[event.subject_id]
+                subjects = [(Scope.POST, event.subject_id), (Scope.AUTHOR, author_id)]
+            else:
+                # The post was deleted since; there is nobody to report to.
+                continue
+            delta = 1 if event.action == Action.CREATED else -1
+            for scope, subject_id in subjects:
+                for granularity in STEPS:
+                    bucket = bucket_start(event.created_at, granularity)
+                    deltas[scope, subject_id, granularity, bucket][COLUMNS[event.kind]] += delta
+        add_rollups(deltas)
+
+
+def engagement_series(
+    scope: str, subject_id: int, granularity: str, since: datetime, until: datetime
+) -> list[dict]:
+    """Return every bucket from ``since`` to ``until``, zero-filled, with its counts."""
+
+    first, last = bucket_start(since, granularity), bucket_start(until, granularity)
+    stored = {
+        row.pop("bucket"): row
+        for row in EngagementRollup.objects.filter(
+            scope=scope,
+            subject_id=subject_id,
+            granularity=granularity,
+            bucket__gte=first,
+            bucket__lte=last,
+        ).values("bucket", *COLUMNS.values())
+    }
+    empty = dict.fromkeys(COLUMNS.values(), 0)
+    series = []
+    bucket = first
+    while bucket <= last:
+        series.append({"bucket": bucket, **stored.get(bucket, empty)})
+        bucket += STEPS[granularity]
+    return series
+
+
+def prune_rollups() -> int:
+    """Delete hourly buckets past ``ENGAGEMENT_HOURLY_RETENTION_DAYS``."""
+
+    cutoff = timezone.now() - timedelta(days=settings.ENGAGEMENT_HOURLY_RETENTION_DAYS)
+    deleted, _ = EngagementRollup.objects.filter(
+        granularity=Granularity.HOUR, bucket__lt=cutoff
+    ).delete()
+    return deleted
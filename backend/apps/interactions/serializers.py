@@ -1,8 +1,18 @@
 """Serializers for engagement entities."""
 
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Bookmark, Like, Reply, Repost
+from apps.posts.serializers import PostSerializer
+
+from . import toggles
+from .models import Bookmark, EngagementRollup, Like, Reply, Repost
+from .rollups import STEPS
+from .write_behind import pending_deltas
 
 
 class LikeSerializer(serializers.ModelSerializer):
@@ -11,23 +21,16 @@ class LikeSerializer(serializers.ModelSerializer):
         fields = ("id", "post", "user", "created_at")
         read_only_fields = ("id", "user", "created_at")
 
-    def validate(self, attrs):
-        request = self.context.get("request")
-        user = getattr(request, "user", None)
-
-        if user and user.is_authenticated:
-            post = attrs.get("post")
-            if Like.objects.filter(post=post, user=user).exists():
-                raise serializers.ValidationError("You have already liked this post.")
-
-        return attrs
-
     def create(self, validated_data):
         request = self.context.get("request")
         user = getattr(request, "user", None)
         if user is None or not user.is_authenticated:
             raise serializers.ValidationError("Authentication is required to like a post.")
-        return Like.objects.create(user=user, **validated_data)
+        # One INSERT … ON CONFLICT: a concurrent duplicate is reported, never a 500.
+        instance = toggles.add(Like, user=user, **validated_data)
+        if instance is None:
+            raise serializers.ValidationError("You have already liked this post.")
+        return instance
 
 
 class RepostSerializer(serializers.ModelSerializer):
@@ -36,23 +39,16 @@ class RepostSerializer(serializers.ModelSerializer):
         fields = ("id", "post", "user", "quote_text", "created_at")
         read_only_fields = ("id", "user", "created_at")
 
-    def validate(self, attrs):
-        request = self.context.get("request")
-        user = getattr(request, "user", None)
-
-        if user and user.is_authenticated:
-            post = attrs.get("post")
-            if Repost.objects.filter(post=post, user=user).exists():
-                raise serializers.ValidationError("You have already reposted this post.")
-
-        return attrs
-
     def create(self, validated_data):
         request = self.context.get("request")
         user = getattr(request, "user", None)
         if user is None or not user.is_authenticated:
             raise serializers.ValidationError("Authentication is required to repost a post.")
-        return Repost.objects.create(user=user, **validated_data)
+        # One INSERT … ON CONFLICT: a concurrent duplicate is reported, never a 500.
+        instance = toggles.add(Repost, user=user, **validated_data)
+        if instance is None:
+            raise serializers.ValidationError("You have already reposted this post.")
+        return instance
 
 
 class BookmarkSerializer(serializers.ModelSerializer):
@@ -61,23 +57,38 @@ class BookmarkSerializer(serializers.ModelSerializer):
         fields = ("id", "post", "user", "created_at")
         read_only_fields = ("id", "user", "created_at")
 
-    def validate(self, attrs):
-        request = self.context.get("request")
-        user = getattr(request, "user", None)
-
-        if user and user.is_authenticated:
-            post = attrs.get("post")
-            if Bookmark.objects.filter(post=post, user=user).exists():
-                raise serializers.ValidationError("You have already bookmarked this post.")
-
-        return attrs
-
     def create(self, validated_data):
         request = self.context.get("request")
         user = getattr(request, "user", None)
         if user is None or not user.is_authenticated:
             raise serializers.ValidationError("Authentication is required to bookmark a post.")
-        return Bookmark.objects.create(user=user, **validated_data)
+        # One INSERT … ON CONFLICT: a concurrent duplicate is reported, never a 500.
+        instance = toggles.add(Bookmark, user=user, **validated_data)
+        if instance is None:
+            raise serializers.ValidationError("You have already bookmarked this post.")
+        return instance
+
+
+class BookmarkTimelineListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        bookmarks = data.all() if hasattr(data, "all") else data
+        # One buffer lookup for the whole page, as ``PostListSerializer`` does.
+        self.child.context["pending_counters"] = pending_deltas(
+            bookmark.post_id for bookmark in bookmarks
+        )
+        return super().to_representation(bookmarks)
+
+
+class BookmarkTimelineSerializer(serializers.ModelSerializer):
+    """A bookmark with its post and the post's author, ready to render."""
+
+    post = PostSerializer(read_only=True)
+
+    class Meta:
+        model = Bookmark
+        fields = ("id", "post", "created_at")
+        read_only_fields = fields
+        list_serializer_class = BookmarkTimelineListSerializer
 
 
 class ReplySerializer(serializers.ModelSerializer):
@@ -91,4 +102,57 @@ class ReplySerializer(serializers.ModelSerializer):
         user = getattr(request, "user", None)
         if user is None or not user.is_authenticated:
             raise serializers.ValidationError("Authentication is required to reply to a post.")
-        return Reply.objects.create(author=user, **validated_data)
+        # Atomic so the post's reply_count moves in the same transaction as the insert.
+        with transaction.atomic():
+            return Reply.objects.create(author=user, **validated_data)
+
+
+def _within_bulk_limit(items: list) -> list:
+    limit = settings.INTERACTION_BULK_MAX_ITEMS
+    if len(items) > limit:
+        raise serializers.ValidationError(f"At most {limit} items per request.")
+    return items
+
+
+class BulkPostsSerializer(serializers.Serializer):
+    """Posts to like, repost or bookmark in one request."""
+
+    posts = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_posts(self, value):
+        return _within_bulk_limit(value)
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """Handles of the users to follow in one request."""
+
+    users = serializers.ListField(child=serializers.CharField(max_length=30), allow_empty=False)
+
+    def validate_users(self, value):
+        return _within_bulk_limit(value)
+
+
+class EngagementQuerySerializer(serializers.Serializer):
+    """Window of an analytics request; defaults to the last 24 hours or 30 days."""
+
+    DEFAULT_WINDOWS = {
+        EngagementRollup.Granularity.HOUR: timedelta(hours=24),
+        EngagementRollup.Granularity.DAY: timedelta(days=30),
+    }
+
+    granularity = serializers.ChoiceField(
+        choices=EngagementRollup.Granularity.choices, default=EngagementRollup.Granularity.HOUR
+    )
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        granularity = attrs["granularity"]
+        attrs.setdefault("until", timezone.now())
+        attrs.setdefault("since", attrs["until"] - self.DEFAULT_WINDOWS[granularity])
+        if attrs["since"] > attrs["until"]:
+            raise serializers.ValidationError("since must not be after until.")
+        limit = settings.ENGAGEMENT_MAX_BUCKETS
+        if (attrs["until"] - attrs["since"]) / STEPS[granularity] >= limit:
+            raise serializers.ValidationError(f"At most {limit} buckets per request.")
+        return attrs
@@ -0,0 +1,465 @@
+"""Likes, reposts, bookmarks and votes sharded across databases by post id.
+
+These four tables grow far faster than ``posts_post``. With ``INTERACTION_SHARDS``
+naming several database aliases, each row lives in the shard its ``post_id`` hashes
+to (jump consistent hashing, so appending a shard moves only its share of the rows),
+and every other table stays in ``default``. Every database carries the full schema;
+the interaction tables only hold rows on their shards. With no shards configured
+everything stays in ``default`` and the router steps aside.
+
+``InteractionShardRouter`` routes by the row or post a query is bound to: saving or
+deleting an instance, ``post.likes`` and ``Like.objects.for_post(post)``. Queries
+that name no post cannot be routed and raise ``ShardingError`` rather than read one
+shard and return partial results. Per-user listings use ``scatter()``: the same query
+runs on every shard and the ordered results are merged, so pagination works unchanged.
+
+Shards have their own id sequences. ``align_sequence`` starts shard ``n`` at
+``n * SHARD_ID_SPACE`` so ids stay unique across shards and rows keep their id when
+``reshard_interactions`` moves them. Relations to posts and users are plain columns
+(``db_constraint=False``): a shard cannot reference rows in ``default``, so deleting a
+post or user also deletes its rows on the other shards, after the delete commits.
+Counters, events and the interaction row are written in different databases, so a
+failure between them can leave a counter off by one until ``reconcile_counters``.
+"""
+
+from __future__ import annotations
+
+import functools
+import heapq
+import itertools
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections, models, transaction
+from django.db.models.deletion import CASCADE, Collector
+from django.db.models.query import ModelIterable
+
+SHARDED_MODELS = frozenset(
+    {"interactions.like", "interactions.repost", "interactions.bookmark", "moderation.vote"}
+)
+SHARD_KEY = "post_id"
+# Ids reserved for each shard's sequence.
+SHARD_ID_SPACE = 2**48
+
+
+class ShardingError(RuntimeError):
+    """A query on a sharded table could not be bound to a shard."""
+
+
+def shards() -> list[str]:
+    """Database aliases holding the interaction tables, in shard order."""
+
+    return list(settings.INTERACTION_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def partitioned() -> bool:
+    """Whether the interaction tables live anywhere but ``default`` alone."""
+
+    return shards() != [DEFAULT_DB_ALIAS]
+
+
+def is_sharded(model: type[models.Model]) -> bool:
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def sharded_models() -> list[type[models.Model]]:
+    return [apps.get_model(label) for label in sorted(SHARDED_MODELS)]
+
+
+def _jump_hash(key: int, buckets: int) -> int:
+    # Lamping & Veach, "A Fast, Minimal Memory, Consistent Hash Algorithm".
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) % 2**64
+        jump = int((bucket + 1) * (2**31 / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for(post_id: int) -> str:
+    """Database alias holding the interactions of ``post_id``."""
+
+    aliases = shards()
+    return aliases[_jump_hash(int(post_id), len(aliases))]
+
+
+def by_shard(post_ids: Iterable[int]) -> dict[str, list[int]]:
+    """Group ``post_ids`` by the shard holding their interactions."""
+
+    groups: dict[str, list[int]] = defaultdict(list)
+    for post_id in post_ids:
+        groups[shard_for(post_id)].append(post_id)
+    return dict(groups)
+
+
+def _related_paths(queryset: models.QuerySet) -> list[str]:
+    """The ``select_related`` of ``queryset`` as lookups for ``prefetch_related``."""
+
+    related = queryset.query.select_related
+    if related is True:
+        return [field.name for field in queryset.model._meta.concrete_fields if field.is_relation]
+
+    def walk(tree: dict, prefix: str):
+        for name, subtree in tree.items():
+            if subtree:
+                yield from walk(subtree, f"{prefix}{name}__")
+            else:
+                yield f"{prefix}{name}"
+
+    return list(walk(related, "")) if related else []
+
+
+def _on_shard(queryset: models.QuerySet, using: str) -> models.QuerySet:
+    """``queryset`` on ``using``, its joins to other tables turned into prefetches."""
+
+    related = _related_paths(queryset)
+    queryset = queryset.using(using)
+    if related and using != DEFAULT_DB_ALIAS:
+        queryset = queryset.select_related(None).prefetch_related(*related)
+    return queryset
+
+
+class ShardedQuerySet(models.QuerySet):
+    """QuerySet of a sharded model, with the ways to bind it to shards."""
+
+    def for_post(self, post) -> models.QuerySet:
+        """Rows of ``post`` (an instance or id), read from its shard."""
+
+        post_id = getattr(post, "pk", post)
+        queryset = self.filter(**{SHARD_KEY: post_id})
+        return _on_shard(queryset, shard_for(post_id)) if partitioned() else queryset
+
+    def for_posts(self, post_ids: Iterable[int]):
+        """Rows of ``post_ids``, read from the shards that hold them."""
+
+        post_ids = list(post_ids)
+        if not partitioned():
+            return self.filter(**{f"{SHARD_KEY}__in": post_ids})
+        return ScatteredQuerySet(
+            self.model,
+            [
+                self.using(using).filter(**{f"{SHARD_KEY}__in": ids})
+                for using, ids in by_shard(post_ids).items()
+            ],
+        )
+
+    def select_related(self, *fields):
+        if self._db is None or self._db == DEFAULT_DB_ALIAS or fields == (None,):
+            return super().select_related(*fields)
+        # Bound to a shard, where the related tables hold no rows.
+        return self.prefetch_related(*fields)
+
+    def create(self, **kwargs):
+        """Insert a row on the shard of its post, whatever database was selected."""
+
+        if not partitioned():
+            return super().create(**kwargs)
+        instance = self.model(**kwargs)
+        instance.save(force_insert=True)
+        return instance
+
+    def scatter(self):
+        """This query run on every shard and merged; a plain queryset when unsharded."""
+
+        if not partitioned():
+            return self
+        related = _related_paths(self)
+        queryset = self.select_related(None) if related else self
+        return ScatteredQuerySet(
+            self.model, [queryset.using(using) for using in shards()], related=related
+        )
+
+
+@functools.total_ordering
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class ScatteredQuerySet:
+    """One query per shard, read together as one ordered result.
+
+    Supports what list views, paginators and ``get_object`` use: chaining filters and
+    orderings, counting, slicing and ``get``. Slices read up to their end from every
+    shard and merge the rows by the query ordering; ``select_related`` is applied to
+    the merged rows as a prefetch from ``default``. Rows of ``values()`` queries are
+    returned shard after shard.
+    """
+
+    def __init__(self, model, querysets: list[models.QuerySet], related: Iterable[str] = ()):
+        self.model = model
+        self._querysets = querysets
+        self._related = list(related)
+
+    def _each(self, method: str, *args, **kwargs) -> ScatteredQuerySet:
+        return ScatteredQuerySet(
+            self.model,
+            [getattr(queryset, method)(*args, **kwargs) for queryset in self._querysets],
+            self._related,
+        )
+
+    def all(self):
+        return self._each("all")
+
+    def filter(self, *args, **kwargs):
+        return self._each("filter", *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._each("exclude", *args, **kwargs)
+
+    def order_by(self, *fields):
+        return self._each("order_by", *fields)
+
+    def only(self, *fields):
+        return self._each("only", *fields)
+
+    def values(self, *fields, **expressions):
+        return self._each("values", *fields, **expressions)
+
+    def values_list(self, *fields, **kwargs):
+        return self._each("values_list", *fields, **kwargs)
+
+    def annotate(self, *args, **kwargs):
+        return self._each("annotate", *args, **kwargs)
+
+    def select_related(self, *fields):
+        return ScatteredQuerySet(self.model, self._querysets, [*self._related, *fields])
+
+    @property
+    def ordered(self) -> bool:
+        return all(queryset.ordered for queryset in self._querysets)
+
+    def count(self) -> int:
+        return sum(queryset.count() for queryset in self._querysets)
+
+    def exists(self) -> bool:
+        return any(queryset.exists() for queryset in self._querysets)
+
+    def get(self, *args, **kwargs):
+        rows = list(
+            self._gather([queryset.filter(*args, **kwargs) for queryset in self._querysets], 2)
+        )
+        if not rows:
+            raise self.model.DoesNotExist(
+                f"{self.model._meta.object_name} matching query does not exist."
+            )
+        if len(rows) > 1:
+            raise self.model.MultipleObjectsReturned(
+                f"get() returned more than one {self.model._meta.object_name}."
+            )
+        return rows[0]
+
+    def __iter__(self):
+        return iter(self._gather(self._querysets))
+
+    def __len__(self) -> int:
+        return len(self._gather(self._querysets))
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key : key + 1][0]
+        if key.step is not None or (key.start or 0) < 0 or (key.stop or 0) < 0:
+            raise ValueError("Scattered querysets only take forward slices.")
+        rows = self._gather(self._querysets, key.stop)
+        return rows[key.start or 0 :]
+
+    def _merge_key(self, queryset: models.QuerySet):
+        if queryset._iterable_class is not ModelIterable:
+            return None
+        ordering = queryset.query.order_by or (
+            queryset.query.default_ordering and self.model._meta.ordering
+        )
+        if not ordering:
+            return None
+        fields = []
+        for name in ordering:
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            try:
+                attname = "pk" if name == "pk" else self.model._meta.get_field(name).attname
+            except FieldDoesNotExist:
+                raise ShardingError(f"Cannot merge shards ordered by {name!r}.") from None
+            fields.append((attname, descending))
+
+        def key(row):
+            return tuple(
+                _Descending(getattr(row, attname)) if descending else getattr(row, attname)
+                for attname, descending in fields
+            )
+
+        return key
+
+    def _gather(self, querysets: list[models.QuerySet], limit: int | None = None) -> list:
+        if not querysets:
+            return []
+        parts = [queryset if limit is None else queryset[:limit] for queryset in querysets]
+        key = self._merge_key(querysets[0])
+        merged = heapq.merge(*parts, key=key) if key else itertools.chain(*parts)
+        rows = list(itertools.islice(merged, limit))
+        if self._related and rows:
+            models.prefetch_related_objects(rows, *self._related)
+        return rows
+
+
+def _post_id(instance) -> int | None:
+    if instance is None:
+        return None
+    if is_sharded(type(instance)):
+        return getattr(instance, SHARD_KEY)
+    from apps.posts.models import Post
+
+    return instance.pk if isinstance(instance, Post) else None
+
+
+class InteractionShardRouter:
+    """Sends sharded tables to the shard of their post and everything else to ``default``."""
+
+    def _route(self, model, instance, strict: bool):
+        if not is_sharded(model):
+            # Posts and users referenced from a row on a shard live in ``default``.
+            if instance is not None and is_sharded(type(instance)):
+                return DEFAULT_DB_ALIAS
+            return None
+        if not partitioned():
+            return None
+        post_id = _post_id(instance)
+        if post_id is not None:
+            return shard_for(post_id)
+        if strict:
+            raise ShardingError(
+                f"{model._meta.label} queries must name a post: use for_post(), "
+                "for_posts() or scatter()."
+            )
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints.get("instance"), strict=True)
+
+    def db_for_write(self, model, **hints):
+        # Assigning a user to an unsaved row asks with the user as hint; the row
+        # itself is routed by its post when it is saved.
+        instance = hints.get("instance")
+        return self._route(model, instance, strict=instance is None)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(type(obj1)) or is_sharded(type(obj2)):
+            return True
+        return None
+
+
+def delete_related(model: type[models.Model], pk: int, using: str):
+    """Delete the sharded rows that cascade from a deleted post or user.
+
+    ``model`` and ``pk`` name the deleted row and ``using`` the database that already
+    cascaded locally. Deletion signals see the post or user as ``origin``, as with a
+    normal cascade.
+    """
+
+    origin = model(pk=pk)
+    origin._state.db = using
+    for sharded in sharded_models():
+        for field in sharded._meta.concrete_fields:
+            if not field.is_relation or not issubclass(model, field.related_model):
+                continue
+            if field.remote_field.on_delete is not CASCADE:
+                continue
+            aliases = [shard_for(pk)] if field.attname == SHARD_KEY else shards()
+            for alias in aliases:
+                if alias == using:
+                    continue
+                collector = Collector(using=alias, origin=origin)
+                collector.collect(sharded._base_manager.using(alias).filter(**{field.attname: pk}))
+                collector.delete()
+
+
+def id_range(using: str) -> tuple[int, int]:
+    """First and past-the-last id of the sequence range reserved for shard ``using``."""
+
+    index = shards().index(using)
+    return index * SHARD_ID_SPACE, (index + 1) * SHARD_ID_SPACE
+
+
+def align_sequence(model: type[models.Model], using: str, floor: int = 0):
+    """Move the id sequence of ``model`` on shard ``using`` into the shard's id range.
+
+    The sequence never moves back, and ends past ``floor`` and past any row already
+    in the range (rows moved in by ``reshard_interactions`` keep their ids).
+    """
+
+    start, end = id_range(using)
+    highest = (
+        model._base_manager.using(using)
+        .filter(pk__gte=start, pk__lt=end)
+        .aggregate(highest=models.Max("pk"))["highest"]
+    )
+    value = max(start, floor, highest or 0)
+    if not value:
+        return
+    connection = connections[using]
+    table, column = model._meta.db_table, model._meta.pk.column
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT setval(seq::regclass, GREATEST(%s, COALESCE(pg_sequence_last_value("
+                "seq::regclass), 0))) FROM pg_get_serial_sequence(%s, %s) AS seq",
+                [value, table, column],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT %s, 0 "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                [table, table],
+            )
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s", [value, table]
+            )
+        else:
+            raise NotSupportedError(f"Cannot align id sequences on {connection.vendor}.")
+
+
+def move_rows(model: type[models.Model], rows: list[models.Model], source: str, target: str):
+    """Move ``rows`` of ``model`` from database ``source`` to ``target``, keeping their ids.
+
+    The rows are copied first (skipping any already there, so an interrupted move can
+    run again) and then deleted from ``source``. Both are plain SQL: timestamps are
+    kept and no signals are sent, as counters and events do not change.
+    """
+
+    if not rows:
+        return
+    fields = model._meta.concrete_fields
+    connection = connections[target]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    placeholders = f"({', '.join(['%s'] * len(fields))})"
+    params = [
+        field.get_db_prep_save(getattr(row, field.attname), connection)
+        for row in rows
+        for field in fields
+    ]
+    with transaction.atomic(using=target), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES {', '.join([placeholders] * len(rows))} ON CONFLICT DO NOTHING",
+            params,
+        )
+
+    connection = connections[source]
+    quote = connection.ops.quote_name
+    with transaction.atomic(using=source), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(model._meta.pk.column)} IN ({', '.join(['%s'] * len(rows))})",
+            [row.pk for row in rows],
+        )
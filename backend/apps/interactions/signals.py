@@ -0,0 +1,105 @@
+"""Signals that keep post counters current, feed the realtime ticker, log events and
+carry deletes over to sharded interaction rows.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import User, UserFollow
+from apps.moderation.models import Vote
+from apps.posts.models import Post
+
+from . import events, sharding
+from .counters import adjust_counter, counter_ticker
+from .models import Bookmark, Like, Reply, Repost
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Repost)
+@receiver(post_save, sender=Reply)
+@receiver(post_save, sender=Vote)
+def count_on_create(sender, instance, created: bool, **_):
+    """Increment the post counter and schedule a realtime update for a new interaction."""
+
+    if created:
+        post_id = instance.post_id
+        adjust_counter(sender, post_id, 1)
+        if sender is not Vote:
+            transaction.on_commit(lambda: counter_ticker.mark(post_id))
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Repost)
+@receiver(post_delete, sender=Reply)
+@receiver(post_delete, sender=Vote)
+def count_on_delete(sender, instance, origin=None, **_):
+    """Decrement the post counter and schedule a realtime update for a removed interaction."""
+
+    if isinstance(origin, Post) and origin.pk == instance.post_id:
+        # The post itself is being deleted; its counters go with it.
+        return
+    post_id = instance.post_id
+    adjust_counter(sender, post_id, -1)
+    if sender is not Vote:
+        transaction.on_commit(lambda: counter_ticker.mark(post_id))
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Repost)
+@receiver(post_save, sender=Bookmark)
+@receiver(post_save, sender=Reply)
+@receiver(post_save, sender=Vote)
+@receiver(post_save, sender=UserFollow)
+def log_created(sender, instance, created: bool, **_):
+    """Append a ``created`` event to the interaction log."""
+
+    if created:
+        events.append(instance, events.Action.CREATED)
+
+
+@receiver(post_save, sender=Post)
+def log_reply_post(sender, instance: Post, created: bool, **_):
+    """Log a post written in reply to another as a ``reply`` to that post."""
+
+    if created and instance.in_reply_to_id and instance.in_reply_to_id != instance.pk:
+        events.append_many(
+            events.Kind.REPLY, events.Action.CREATED, instance.author_id, [instance.in_reply_to_id]
+        )
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Repost)
+@receiver(post_delete, sender=Bookmark)
+@receiver(post_delete, sender=Reply)
+@receiver(post_delete, sender=Vote)
+@receiver(post_delete, sender=UserFollow)
+def log_deleted(sender, instance, origin=None, **_):
+    """Append a ``deleted`` event, except for rows removed along with their post."""
+
+    if isinstance(origin, Post) and origin.pk == getattr(instance, "post_id", None):
+        return
+    events.append(instance, events.Action.DELETED)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=User)
+def delete_on_shards(sender, instance, **_):
+    """Cascade a post or user delete to its interaction rows on other shards."""
+
+    if sharding.partitioned():
+        pk, using = instance.pk, instance._state.db
+        transaction.on_commit(lambda: sharding.delete_related(sender, pk, using), using=using)
+
+
+@receiver(post_migrate)
+def reserve_shard_ids(sender, using, **_):
+    """Start the id sequences of a migrated shard in the range reserved for it."""
+
+    if not sharding.partitioned() or using not in sharding.shards():
+        return
+    for model in sender.get_models():
+        if sharding.is_sharded(model):
+            sharding.align_sequence(model, using)
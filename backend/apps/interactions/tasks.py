@@ -0,0 +1,35 @@
+"""Celery tasks for engagement counters, the interaction event log and rollups."""
+
+from celery import shared_task
+
+from .events import consume_all, prune_events
+from .rollups import prune_rollups
+from .write_behind import flush_counters
+
+
+@shared_task(ignore_result=True)
+def flush_counter_buffer() -> int:
+    """Write buffered like, repost and view deltas to the post counter columns."""
+
+    return flush_counters()
+
+
+@shared_task(ignore_result=True)
+def consume_interaction_events() -> dict[str, int]:
+    """Feed new interaction events to every consumer group."""
+
+    return consume_all()
+
+
+@shared_task(ignore_result=True)
+def prune_interaction_events() -> int:
+    """Drop events all groups have read once they are past the replay retention."""
+
+    return prune_events()
+
+
+@shared_task(ignore_result=True)
+def prune_engagement_rollups() -> int:
+    """Drop hourly rollup buckets past their retention; daily buckets stay."""
+
+    return prune_rollups()
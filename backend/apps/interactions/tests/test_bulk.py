@@ -0,0 +1,203 @@
+"""Tests for set-wise interaction creation and the bulk endpoints."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import UserFollow
+from apps.interactions import bulk, toggles
+from apps.interactions.counters import counter_ticker
+from apps.interactions.events import consume
+from apps.interactions.models import Bookmark, InteractionEvent, Like
+from apps.notifications.events import NotificationEvents
+from apps.notifications.models import Notification
+from apps.posts.models import Post
+from tests.factories import LikeFactory, PostFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def isolated_ticker(settings):
+    settings.FEED_COUNTER_TICK = 0
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    counter_ticker.clear()
+    yield
+    counter_ticker.clear()
+
+
+@pytest.mark.django_db
+class TestAddMany:
+    """``add_many`` inserts new rows in one statement and reports which were written."""
+
+    def test_returns_only_inserted_rows(self):
+        like = LikeFactory()
+        other = PostFactory()
+
+        inserted = toggles.add_many(
+            Like, [Like(post=like.post, user=like.user), Like(post=other, user=like.user)]
+        )
+
+        assert [row.post_id for row in inserted] == [other.pk]
+        assert inserted[0].pk == Like.objects.get(post=other).pk
+
+    def test_splits_large_inserts_into_batches(self, monkeypatch):
+        user = UserFactory()
+        posts = PostFactory.create_batch(5)
+        monkeypatch.setattr(toggles, "BULK_INSERT_BATCH_SIZE", 2)
+
+        inserted = toggles.add_many(Like, [Like(post=post, user=user) for post in posts])
+
+        assert len(inserted) == 5
+        assert Like.objects.filter(user=user).count() == 5
+
+
+@pytest.mark.django_db
+class TestBulkAdd:
+    """``bulk_add`` answers every item and applies side effects once per set."""
+
+    def test_reports_a_status_per_item_in_order(self):
+        user = UserFactory()
+        liked, fresh, deleted = PostFactory.create_batch(3)
+        LikeFactory(post=liked, user=user)
+        Post.objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+
+        results = bulk.bulk_add(
+            bulk.LIKES, user, [fresh.pk, liked.pk, deleted.pk, 999999, fresh.pk]
+        )
+
+        assert results == [
+            {"post": fresh.pk, "status": bulk.CREATED},
+            {"post": liked.pk, "status": bulk.EXISTS},
+            {"post": deleted.pk, "status": bulk.NOT_FOUND},
+            {"post": 999999, "status": bulk.NOT_FOUND},
+            {"post": fresh.pk, "status": bulk.DUPLICATE},
+        ]
+
+    def test_query_count_does_not_grow_with_items(self):
+        few, many = UserFactory(), UserFactory()
+        posts = PostFactory.create_batch(20)
+
+        with CaptureQueriesContext(connection) as small:
+            bulk.bulk_add(bulk.LIKES, few, [post.pk for post in posts[:2]])
+        with CaptureQueriesContext(connection) as large:
+            bulk.bulk_add(bulk.LIKES, many, [post.pk for post in posts])
+
+        assert len(large) == len(small)
+        assert Like.objects.filter(user=many).count() == 20
+
+    def test_counters_and_ticks_move_for_created_rows(self, django_capture_on_commit_callbacks):
+        user = UserFactory()
+        posts = PostFactory.create_batch(3)
+        LikeFactory(post=posts[0], user=user)
+        counter_ticker.clear()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            bulk.bulk_add(bulk.LIKES, user, [post.pk for post in posts])
+
+        for post in posts:
+            post.refresh_from_db()
+        assert [post.like_count for post in posts] == [1, 1, 1]
+        assert counter_ticker.pending() == {posts[1].pk, posts[2].pk}
+
+    def test_appends_one_event_per_created_row(self):
+        user = UserFactory()
+        posts = PostFactory.create_batch(2)
+        LikeFactory(post=posts[0], user=user)
+        InteractionEvent.objects.all().delete()
+
+        bulk.bulk_add(bulk.BOOKMARKS, user, [post.pk for post in posts])
+        bulk.bulk_add(bulk.LIKES, user, [post.pk for post in posts])
+
+        assert list(
+            InteractionEvent.objects.values_list("kind", "action", "actor_id", "subject_id")
+        ) == [
+            ("bookmark", "created", user.pk, posts[0].pk),
+            ("bookmark", "created", user.pk, posts[1].pk),
+            ("like", "created", user.pk, posts[1].pk),
+        ]
+
+    def test_bulk_writes_notify_through_the_event_log(self, settings):
+        settings.INTERACTION_EVENT_SETTLE = 0
+        user = UserFactory()
+        own = PostFactory(author=user)
+        other = PostFactory()
+
+        bulk.bulk_add(bulk.BOOKMARKS, user, [own.pk, other.pk])
+        consume(NotificationEvents())
+
+        assert list(Notification.objects.values_list("recipient_id", "post_id")) == [
+            (other.author_id, other.pk)
+        ]
+        assert Bookmark.objects.filter(user=user).count() == 2
+
+    def test_follows_by_handle(self):
+        user = UserFactory()
+        followed, already = UserFactory.create_batch(2)
+        UserFollow.objects.create(follower=user, followed=already)
+
+        results = bulk.bulk_add(
+            bulk.FOLLOWS, user, [followed.handle, already.handle, user.handle, "nobody"]
+        )
+
+        assert [result["status"] for result in results] == [
+            bulk.CREATED,
+            bulk.EXISTS,
+            bulk.INVALID,
+            bulk.NOT_FOUND,
+        ]
+        assert set(user.following.all()) == {followed, already}
+
+
+@pytest.mark.django_db
+class TestBulkEndpoints:
+    """``POST /api/<interactions>/bulk/`` and ``/api/users/follow/bulk/``."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @pytest.mark.parametrize("path", ["likes", "reposts", "bookmarks"])
+    def test_creates_posts_interactions(self, path):
+        posts = PostFactory.create_batch(2)
+
+        response = self.client.post(
+            f"/api/{path}/bulk/", {"posts": [post.pk for post in posts]}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["created"] == 2
+        assert [result["status"] for result in response.data["results"]] == [bulk.CREATED] * 2
+
+    def test_follow_bulk(self):
+        followed = UserFactory()
+
+        response = self.client.post(
+            "/api/users/follow/bulk/", {"users": [followed.handle]}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            "created": 1,
+            "results": [{"user": followed.handle, "status": bulk.CREATED}],
+        }
+
+    def test_rejects_too_many_items(self, settings):
+        settings.INTERACTION_BULK_MAX_ITEMS = 2
+
+        response = self.client.post("/api/likes/bulk/", {"posts": [1, 2, 3]}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rejects_malformed_ids(self):
+        response = self.client.post("/api/likes/bulk/", {"posts": ["x"]}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Like.objects.exists()
+
+    def test_requires_authentication(self):
+        response = APIClient().post("/api/likes/bulk/", {"posts": [1]}, format="json")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,189 @@
+"""Tests for tick-aggregated engagement counter updates."""
+
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.interactions.counters import counter_ticker, engagement_counts, reconcile_counters
+from apps.posts.frames import post_counters_group
+from apps.posts.models import Post
+from apps.posts.serializers import PostSerializer
+from tests.factories import (
+    LikeFactory,
+    PostFactory,
+    ReplyFactory,
+    RepostFactory,
+    UserFactory,
+    VoteFactory,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_ticker(settings):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.FEED_COUNTER_TICK = 0
+    cache.clear()
+    counter_ticker.clear()
+    yield
+    counter_ticker.clear()
+
+
+def _watch(post):
+    channel_layer = get_channel_layer()
+    channel_name = f"test_counters_{post.pk}"
+    async_to_sync(channel_layer.group_add)(post_counters_group(post.pk), channel_name)
+    return channel_layer, channel_name
+
+
+@pytest.mark.django_db
+class TestCounterTicker:
+    """Counter frames are aggregated per post and per tick."""
+
+    def test_engagement_counts_groups_by_post(self):
+        post, other = PostFactory(), PostFactory()
+        LikeFactory.create_batch(3, post=post)
+        RepostFactory(post=post)
+        ReplyFactory(post=other)
+
+        counts = engagement_counts([post.pk, other.pk])
+
+        assert counts[post.pk] == {"likes": 3, "reposts": 1, "replies": 0}
+        assert counts[other.pk] == {"likes": 0, "reposts": 0, "replies": 1}
+
+    def test_interactions_mark_post_after_commit(self, django_capture_on_commit_callbacks):
+        post = PostFactory()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            like = LikeFactory(post=post)
+        assert counter_ticker.pending() == {post.pk}
+
+        counter_ticker.clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            like.delete()
+        assert counter_ticker.pending() == {post.pk}
+
+    def test_many_likes_emit_one_frame_per_tick(self, django_capture_on_commit_callbacks):
+        post = PostFactory()
+        channel_layer, channel_name = _watch(post)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            LikeFactory.create_batch(25, post=post)
+
+        assert counter_ticker.flush() == [post.pk]
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        assert json.loads(message["frame"]) == {
+            "type": "post.counters",
+            "post": post.pk,
+            "likes": 25,
+            "reposts": 0,
+            "replies": 0,
+        }
+        assert counter_ticker.pending() == set()
+
+    def test_post_emitted_this_tick_is_deferred(self):
+        post = PostFactory()
+        counter_ticker.mark(post.pk)
+        counter_ticker.flush()
+
+        counter_ticker.mark(post.pk)
+
+        assert counter_ticker.flush() == []
+        assert counter_ticker.pending() == {post.pk}
+
+
+@pytest.mark.django_db
+class TestCounterColumns:
+    """Post counter columns follow interaction inserts and deletes."""
+
+    def test_interactions_adjust_post_counters(self):
+        post = PostFactory()
+        like = LikeFactory(post=post)
+        LikeFactory(post=post)
+        RepostFactory(post=post)
+        ReplyFactory(post=post)
+        VoteFactory(post=post)
+        like.delete()
+
+        post.refresh_from_db()
+        assert post.like_count == post.repost_count == post.reply_count == post.vote_count == 1
+
+    def test_repeated_toggle_counts_once(self):
+        post, user = PostFactory(), UserFactory()
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        client.put(f"/api/posts/{post.id}/like/")
+        client.put(f"/api/posts/{post.id}/like/")
+        post.refresh_from_db()
+        assert post.like_count == 1
+
+        client.delete(f"/api/posts/{post.id}/like/")
+        client.delete(f"/api/posts/{post.id}/like/")
+        post.refresh_from_db()
+        assert post.like_count == 0
+
+    def test_vote_update_keeps_vote_count(self):
+        post, user = PostFactory(), UserFactory()
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        client.put(f"/api/posts/{post.id}/vote/", {"vote_type": "hide"}, format="json")
+        client.put(f"/api/posts/{post.id}/vote/", {"vote_type": "remove"}, format="json")
+
+        post.refresh_from_db()
+        assert post.vote_count == 1
+
+    def test_deleting_post_cascades_without_errors(self):
+        post = PostFactory()
+        LikeFactory.create_batch(3, post=post)
+
+        post.delete()
+
+        assert not Post.objects.filter(pk=post.pk).exists()
+
+    def test_serializer_exposes_counters(self):
+        post = PostFactory()
+        LikeFactory.create_batch(2, post=post)
+        post.refresh_from_db()
+
+        data = PostSerializer(post).data
+
+        assert data["like_count"] == 2
+        assert data["repost_count"] == data["reply_count"] == data["vote_count"] == 0
+
+
+@pytest.mark.django_db
+class TestReconcileCounters:
+    """Drifted counters are recounted from the interaction tables."""
+
+    def test_reconcile_repairs_only_drifted_posts(self):
+        drifted, intact = PostFactory(), PostFactory()
+        LikeFactory.create_batch(2, post=drifted)
+        ReplyFactory(post=intact)
+        Post.objects.filter(pk=drifted.pk).update(like_count=7, vote_count=3)
+
+        assert reconcile_counters([drifted.pk, intact.pk]) == [drifted.pk]
+
+        drifted.refresh_from_db()
+        assert (drifted.like_count, drifted.vote_count) == (2, 0)
+        assert reconcile_counters([drifted.pk, intact.pk]) == []
+
+    def test_command_walks_all_posts_in_batches(self):
+        posts = PostFactory.create_batch(5)
+        for post in posts:
+            LikeFactory(post=post)
+        Post.objects.update(like_count=0)
+        output = io.StringIO()
+
+        call_command("reconcile_counters", batch_size=2, stdout=output)
+
+        assert "Checked 5 posts, repaired 5." in output.getvalue()
+        assert set(Post.objects.values_list("like_count", flat=True)) == {1}
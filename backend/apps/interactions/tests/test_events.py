@@ -0,0 +1,194 @@
+"""Tests for the interaction event log and its consumer groups."""
+
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.accounts.models import UserFollow
+from apps.interactions import events, toggles
+from apps.interactions.models import EventCheckpoint, InteractionEvent, Like
+from apps.notifications import events as notification_events
+from apps.notifications.events import NotificationEvents
+from apps.notifications.models import Notification
+from tests.factories import LikeFactory, PostFactory, ReplyFactory, UserFactory, VoteFactory
+
+
+class RecordingConsumer(events.EventConsumer):
+    name = "recording"
+    kinds = frozenset({events.Kind.LIKE})
+
+    def __init__(self):
+        self.seen = []
+
+    def handle(self, batch):
+        self.seen.extend(event.pk for event in batch)
+
+
+class FailingConsumer(events.EventConsumer):
+    name = "failing"
+
+    def handle(self, batch):
+        raise RuntimeError("handler bug")
+
+
+@pytest.fixture(autouse=True)
+def settled_immediately(settings):
+    settings.INTERACTION_EVENT_SETTLE = 0
+    settings.FEED_COUNTER_TICK = 0
+
+
+def _log():
+    return list(InteractionEvent.objects.values_list("kind", "action", "actor_id", "subject_id"))
+
+
+@pytest.mark.django_db
+class TestEventLog:
+    """Interaction writes append one event each, in the writing transaction."""
+
+    def test_writes_append_events(self):
+        like = LikeFactory()
+        reply = ReplyFactory()
+        vote = VoteFactory()
+        follow = UserFollow.objects.create(follower=like.user, followed=reply.author)
+        InteractionEvent.objects.filter(kind=events.Kind.FOLLOW).exclude(
+            subject_id=reply.author_id
+        ).delete()
+
+        assert _log() == [
+            ("like", "created", like.user_id, like.post_id),
+            ("reply", "created", reply.author_id, reply.post_id),
+            ("vote", "created", vote.voter_id, vote.post_id),
+            ("follow", "created", follow.follower_id, follow.followed_id),
+        ]
+
+    def test_removal_appends_deleted_event(self):
+        like = LikeFactory()
+
+        toggles.remove(Like, post=like.post, user=like.user)
+
+        assert _log()[-1] == ("like", "deleted", like.user_id, like.post_id)
+
+    def test_deleting_a_post_does_not_log_its_interactions(self):
+        like = LikeFactory()
+        InteractionEvent.objects.all().delete()
+
+        like.post.delete()
+
+        assert _log() == []
+
+    def test_unchanged_toggle_appends_nothing(self):
+        like = LikeFactory()
+        InteractionEvent.objects.all().delete()
+
+        toggles.add(Like, post=like.post, user=like.user)
+
+        assert _log() == []
+
+
+@pytest.mark.django_db
+class TestConsume:
+    """Consumer groups read batches in order and keep their own checkpoint."""
+
+    def test_batches_advance_the_checkpoint(self):
+        LikeFactory.create_batch(3)
+        consumer = RecordingConsumer()
+        like_ids = list(
+            InteractionEvent.objects.filter(kind="like").values_list("pk", flat=True)
+        )
+
+        assert events.consume(consumer, batch_size=2) == 2
+        events.consume(consumer, batch_size=2)
+        while events.consume(consumer, batch_size=2):
+            pass
+
+        assert consumer.seen == like_ids
+        checkpoint = EventCheckpoint.objects.get(consumer="recording")
+        assert checkpoint.position == InteractionEvent.objects.latest("pk").pk
+
+    def test_groups_do_not_share_checkpoints(self):
+        LikeFactory()
+        first, second = RecordingConsumer(), RecordingConsumer()
+        second.name = "recording-2"
+
+        events.consume(first)
+        events.consume(second)
+
+        assert first.seen == second.seen != []
+
+    def test_unsettled_events_wait(self, settings):
+        settings.INTERACTION_EVENT_SETTLE = 60
+        LikeFactory()
+
+        assert events.consume(RecordingConsumer()) == 0
+
+    def test_failed_batch_keeps_its_checkpoint(self, settings):
+        settings.INTERACTION_EVENT_CONSUMERS = [f"{__name__}.FailingConsumer"]
+        LikeFactory()
+
+        assert events.consume_all() == {"failing": 0}
+        assert EventCheckpoint.objects.get(consumer="failing").position == 0
+
+    def test_replay_command_rewinds_and_runs(self, settings):
+        settings.INTERACTION_EVENT_CONSUMERS = ["apps.notifications.events.NotificationEvents"]
+        like = LikeFactory()
+        events.consume_all()
+        Notification.objects.all().delete()
+
+        call_command("replay_events", "notifications", "--run", stdout=None)
+
+        assert Notification.objects.get().actor_id == like.user_id
+
+    def test_prune_keeps_unread_and_recent_events(self, settings):
+        settings.INTERACTION_EVENT_CONSUMERS = ["apps.notifications.events.NotificationEvents"]
+        settings.INTERACTION_EVENT_RETENTION_DAYS = 1
+        LikeFactory.create_batch(2)
+        InteractionEvent.objects.update(created_at=timezone.now() - timedelta(days=2))
+        first = InteractionEvent.objects.order_by("pk").first()
+
+        assert events.prune_events() == 0
+        events.rewind("notifications", first.pk)
+
+        assert events.prune_events() == 1
+        assert not InteractionEvent.objects.filter(pk=first.pk).exists()
+
+
+@pytest.mark.django_db
+class TestNotificationEvents:
+    """The notifications group notifies authors and followed users, never the actor."""
+
+    def test_creates_notifications_from_events(self):
+        author = UserFactory()
+        post = PostFactory(author=author)
+        fan = UserFactory()
+        LikeFactory(post=post, user=fan)
+        LikeFactory(post=post, user=author)
+        UserFollow.objects.create(follower=fan, followed=author)
+
+        events.consume(NotificationEvents())
+
+        assert sorted(
+            Notification.objects.values_list("recipient_id", "actor_id", "notification_type")
+        ) == [(author.pk, fan.pk, "follow"), (author.pk, fan.pk, "like")]
+
+    def test_pushes_once_after_commit(self, monkeypatch, django_capture_on_commit_callbacks):
+        pushed = []
+        monkeypatch.setattr(notification_events, "publish_notifications", pushed.append)
+        LikeFactory.create_batch(3)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            events.consume(NotificationEvents())
+
+        assert len(pushed) == 1
+        assert len(pushed[0]) == 3
+
+    def test_skips_deleted_posts_and_users(self):
+        like = LikeFactory()
+        follow = UserFollow.objects.create(follower=UserFactory(), followed=UserFactory())
+        like.post.delete()
+        follow.follower.delete()
+
+        events.consume(NotificationEvents())
+
+        assert not Notification.objects.exists()
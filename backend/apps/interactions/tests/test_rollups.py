@@ -0,0 +1,170 @@
+"""Tests for hourly and daily engagement rollups and the analytics endpoints."""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import UserFollow
+from apps.interactions import rollups, toggles
+from apps.interactions.events import consume
+from apps.interactions.models import EngagementRollup, InteractionEvent, Like
+from tests.factories import LikeFactory, PostFactory, ReplyFactory, UserFactory
+
+NOON = datetime(2026, 3, 2, 12, 0, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def settled_immediately(settings):
+    settings.INTERACTION_EVENT_SETTLE = 0
+    settings.FEED_COUNTER_TICK = 0
+
+
+def _consume_at(moment):
+    InteractionEvent.objects.update(created_at=moment)
+    consume(rollups.EngagementRollups())
+
+
+def _rollup(scope, subject_id, granularity, bucket):
+    return EngagementRollup.objects.get(
+        scope=scope, subject_id=subject_id, granularity=granularity, bucket=bucket
+    )
+
+
+@pytest.mark.django_db
+class TestEngagementRollups:
+    """The ``rollups`` group adds events to hour and day buckets of posts and authors."""
+
+    def test_events_land_in_post_and_author_buckets(self):
+        post = PostFactory()
+        LikeFactory.create_batch(2, post=post)
+        ReplyFactory(post=post)
+
+        _consume_at(NOON + timedelta(minutes=42))
+
+        hour = _rollup("post", post.pk, "hour", NOON)
+        assert (hour.likes, hour.replies, hour.reposts) == (2, 1, 0)
+        day = _rollup("author", post.author_id, "day", NOON.replace(hour=0))
+        assert (day.likes, day.replies) == (2, 1)
+
+    def test_later_batches_add_to_existing_buckets(self):
+        post = PostFactory()
+        like = LikeFactory(post=post)
+        _consume_at(NOON)
+
+        LikeFactory(post=post)
+        toggles.remove(Like, post=post, user=like.user)
+        _consume_at(NOON + timedelta(minutes=5))
+
+        assert _rollup("post", post.pk, "hour", NOON).likes == 1
+        assert EngagementRollup.objects.filter(scope="post").count() == 2
+
+    def test_follows_count_for_the_followed_author(self):
+        author = UserFactory()
+        UserFollow.objects.create(follower=UserFactory(), followed=author)
+
+        _consume_at(NOON)
+
+        assert _rollup("author", author.pk, "hour", NOON).followers == 1
+        assert not EngagementRollup.objects.filter(scope="post").exists()
+
+    def test_events_on_deleted_posts_are_skipped(self):
+        like = LikeFactory()
+        like.post.delete()
+
+        _consume_at(NOON)
+
+        assert not EngagementRollup.objects.exists()
+
+    def test_series_is_zero_filled(self):
+        post = PostFactory()
+        LikeFactory(post=post)
+        _consume_at(NOON)
+
+        series = rollups.engagement_series(
+            "post", post.pk, "hour", NOON - timedelta(hours=1), NOON + timedelta(minutes=90)
+        )
+
+        assert [bucket["bucket"] for bucket in series] == [
+            NOON - timedelta(hours=1),
+            NOON,
+            NOON + timedelta(hours=1),
+        ]
+        assert [bucket["likes"] for bucket in series] == [0, 1, 0]
+
+    def test_prune_keeps_daily_buckets(self, settings):
+        settings.ENGAGEMENT_HOURLY_RETENTION_DAYS = 1
+        LikeFactory()
+        _consume_at(timezone.now() - timedelta(days=3))
+
+        assert rollups.prune_rollups() == 2
+        assert set(EngagementRollup.objects.values_list("granularity", flat=True)) == {"day"}
+
+
+@pytest.mark.django_db
+class TestAnalyticsEndpoints:
+    """``GET /api/posts/{id}/analytics/`` and ``GET /api/users/{handle}/analytics/``."""
+
+    def setup_method(self):
+        self.author = UserFactory()
+        self.post = PostFactory(author=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.author)
+
+    def test_post_analytics_reads_buckets(self):
+        LikeFactory.create_batch(3, post=self.post)
+        _consume_at(NOON)
+        query = {"since": "2026-03-02T10:00:00Z", "until": "2026-03-02T13:00:00Z"}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/posts/{self.post.pk}/analytics/", query)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["totals"]["likes"] == 3
+        assert [bucket["likes"] for bucket in response.data["buckets"]] == [0, 0, 3, 0]
+        # The post itself, then one range read of the rollups.
+        assert len(queries) == 2
+
+    def test_author_analytics_by_day(self):
+        LikeFactory(post=self.post)
+        UserFollow.objects.create(follower=UserFactory(), followed=self.author)
+        _consume_at(timezone.now())
+
+        response = self.client.get(
+            f"/api/users/{self.author.handle}/analytics/", {"granularity": "day"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["buckets"]) == 31
+        assert response.data["totals"]["likes"] == 1
+        assert response.data["totals"]["followers"] == 1
+
+    def test_only_the_author_or_staff_can_read(self):
+        other = APIClient()
+        other.force_authenticate(user=UserFactory())
+        staff = APIClient()
+        staff.force_authenticate(user=UserFactory(is_staff=True))
+
+        post_url = f"/api/posts/{self.post.pk}/analytics/"
+        user_url = f"/api/users/{self.author.handle}/analytics/"
+
+        assert other.get(post_url).status_code == status.HTTP_403_FORBIDDEN
+        assert other.get(user_url).status_code == status.HTTP_403_FORBIDDEN
+        assert staff.get(post_url).status_code == status.HTTP_200_OK
+        assert staff.get(user_url).status_code == status.HTTP_200_OK
+        assert APIClient().get(post_url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_rejects_windows_over_the_bucket_limit(self, settings):
+        settings.ENGAGEMENT_MAX_BUCKETS = 10
+
+        response = self.client.get(
+            f"/api/posts/{self.post.pk}/analytics/",
+            {"granularity": "day", "since": "2026-01-01T00:00:00Z"},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
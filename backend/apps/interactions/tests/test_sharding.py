@@ -0,0 +1,260 @@
+"""Tests for interaction tables sharded across databases by post id."""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.interactions import sharding
+from apps.interactions.counters import counter_ticker, reconcile_counters
+from apps.interactions.models import Bookmark, Like
+from apps.moderation.models import Vote
+from apps.posts.models import Post
+from tests.factories import BookmarkFactory, LikeFactory, PostFactory, UserFactory
+
+SHARDS = ["shard_1", "shard_2"]
+DATABASES = ["default", *SHARDS]
+
+
+@pytest.fixture(autouse=True)
+def isolated_ticker(settings):
+    settings.FEED_COUNTER_TICK = 0
+    counter_ticker.clear()
+    yield
+    counter_ticker.clear()
+
+
+@pytest.fixture
+def sharded(settings):
+    settings.INTERACTION_SHARDS = SHARDS
+    for alias in SHARDS:
+        for model in sharding.sharded_models():
+            sharding.align_sequence(model, alias)
+
+
+def _post_on(alias, **kwargs):
+    """A new post whose interactions live on ``alias``."""
+
+    while True:
+        post = PostFactory(**kwargs)
+        if sharding.shard_for(post.pk) == alias:
+            return post
+
+
+def _rows(model, alias):
+    return list(model._base_manager.using(alias).order_by("pk"))
+
+
+class TestShardFor:
+    """Post ids spread evenly, and a new shard only takes rows from the others."""
+
+    def test_spreads_post_ids(self, settings):
+        settings.INTERACTION_SHARDS = SHARDS
+
+        placed = [sharding.shard_for(post_id) for post_id in range(1, 2001)]
+
+        assert 900 < placed.count("shard_1") < 1100
+
+    def test_appending_a_shard_moves_rows_only_to_it(self, settings):
+        settings.INTERACTION_SHARDS = SHARDS
+        before = {post_id: sharding.shard_for(post_id) for post_id in range(1, 2001)}
+        settings.INTERACTION_SHARDS = [*SHARDS, "shard_3"]
+
+        after = {post_id: sharding.shard_for(post_id) for post_id in before}
+
+        moved = [post_id for post_id in before if after[post_id] != before[post_id]]
+        assert {after[post_id] for post_id in moved} == {"shard_3"}
+        assert 500 < len(moved) < 850
+
+    def test_unsharded_keeps_everything_in_default(self):
+        assert not sharding.partitioned()
+        assert sharding.shard_for(42) == "default"
+
+
+@pytest.mark.django_db(databases=DATABASES)
+@pytest.mark.usefixtures("sharded")
+class TestRouting:
+    """Writes land on the shard of their post; reads must name the post."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_like_is_stored_on_the_post_shard(self):
+        post = _post_on("shard_2")
+
+        response = self.client.put(f"/api/posts/{post.pk}/like/")
+
+        assert response.data["changed"] is True
+        assert [like.post_id for like in _rows(Like, "shard_2")] == [post.pk]
+        assert _rows(Like, "shard_1") == _rows(Like, "default") == []
+        post.refresh_from_db()
+        assert post.like_count == 1
+
+    def test_each_shard_hands_out_its_own_ids(self):
+        first = LikeFactory(post=_post_on("shard_1"))
+        second = LikeFactory(post=_post_on("shard_2"))
+
+        assert first.pk < sharding.SHARD_ID_SPACE <= second.pk
+
+    def test_reads_bound_to_a_post(self):
+        post = _post_on("shard_2")
+        LikeFactory(post=post)
+
+        assert post.likes.count() == 1
+        assert Like.objects.for_post(post).get().user_id is not None
+        assert Like.objects.for_post(_post_on("shard_2")).exists() is False
+
+    def test_unbound_reads_are_refused(self):
+        with pytest.raises(sharding.ShardingError):
+            Like.objects.count()
+
+    def test_related_posts_are_read_from_default(self):
+        like = LikeFactory(post=_post_on("shard_1"))
+
+        fetched = Like.objects.for_post(like.post_id).select_related("post").get()
+
+        assert fetched.post.text == like.post.text
+
+    def test_unlike_and_votes(self):
+        post = _post_on("shard_1")
+        self.client.put(f"/api/posts/{post.pk}/like/")
+
+        self.client.delete(f"/api/posts/{post.pk}/like/")
+        response = self.client.put(
+            f"/api/posts/{post.pk}/vote/", {"vote_type": "remove"}, format="json"
+        )
+
+        assert response.data["changed"] is True
+        assert _rows(Like, "shard_1") == []
+        assert [vote.post_id for vote in _rows(Vote, "shard_1")] == [post.pk]
+        listed = self.client.get("/api/votes/", {"post": post.pk})
+        assert [vote["post"] for vote in listed.data["results"]] == [post.pk]
+
+
+@pytest.mark.django_db(databases=DATABASES)
+@pytest.mark.usefixtures("sharded")
+class TestScatterGather:
+    """Per-user listings read every shard and merge the rows in order."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _like_across_shards(self):
+        posts = [_post_on(alias) for alias in (*SHARDS, *SHARDS, "shard_1")]
+        return [LikeFactory(post=post, user=self.user) for post in posts]
+
+    def test_lists_likes_newest_first_across_shards(self):
+        likes = self._like_across_shards()
+        LikeFactory(post=likes[0].post)
+
+        first = self.client.get("/api/likes/", {"limit": 3})
+        second = self.client.get("/api/likes/", {"limit": 3, "offset": 3})
+
+        assert first.data["count"] == 5
+        ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+        assert ids == [like.pk for like in reversed(likes)]
+
+    def test_detail_and_delete_find_the_row_on_its_shard(self):
+        like = self._like_across_shards()[1]
+
+        assert self.client.get(f"/api/likes/{like.pk}/").data["post"] == like.post_id
+        response = self.client.delete(f"/api/likes/{like.pk}/")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not Like.objects.for_post(like.post_id).exists()
+
+    def test_bookmark_timeline_pages_across_shards(self):
+        bookmarks = [
+            BookmarkFactory(post=_post_on(alias), user=self.user) for alias in (*SHARDS, *SHARDS)
+        ]
+        Post.objects.filter(pk=bookmarks[1].post_id).update(deleted_at=bookmarks[1].created_at)
+
+        first = self.client.get("/api/bookmarks/timeline/", {"limit": 2})
+        second = self.client.get(first.data["next"])
+
+        ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+        assert ids == [bookmarks[3].pk, bookmarks[2].pk, bookmarks[0].pk]
+        assert first.data["results"][0]["post"]["author"]["handle"]
+
+    def test_bulk_bookmarks_go_to_each_post_shard(self):
+        posts = [_post_on(alias) for alias in SHARDS]
+        payload = {"posts": [post.pk for post in posts]}
+
+        created = self.client.post("/api/bookmarks/bulk/", payload, format="json")
+        repeated = self.client.post("/api/bookmarks/bulk/", payload, format="json")
+
+        assert created.data["created"] == 2
+        assert {result["status"] for result in repeated.data["results"]} == {"exists"}
+        for alias, post in zip(SHARDS, posts):
+            assert [bookmark.post_id for bookmark in _rows(Bookmark, alias)] == [post.pk]
+
+
+@pytest.mark.django_db(databases=DATABASES)
+@pytest.mark.usefixtures("sharded")
+class TestConsistency:
+    """Counters, cascades and resharding keep shards and posts in step."""
+
+    def test_reconcile_counts_on_the_shards(self):
+        posts = [_post_on(alias) for alias in SHARDS]
+        for post in posts:
+            LikeFactory(post=post)
+        Post.objects.filter(pk=posts[1].pk).update(like_count=7)
+
+        assert reconcile_counters([post.pk for post in posts]) == [posts[1].pk]
+        posts[1].refresh_from_db()
+        assert posts[1].like_count == 1
+
+    def test_deleting_a_post_deletes_its_rows_on_the_shard(
+        self, django_capture_on_commit_callbacks
+    ):
+        like = LikeFactory(post=_post_on("shard_2"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            like.post.delete()
+
+        assert _rows(Like, "shard_2") == []
+
+    def test_deleting_a_user_deletes_their_rows_on_every_shard(
+        self, django_capture_on_commit_callbacks
+    ):
+        user = UserFactory()
+        kept = LikeFactory(post=_post_on("shard_1"))
+        for alias in SHARDS:
+            LikeFactory(post=_post_on(alias), user=user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.delete()
+
+        assert _rows(Like, "shard_1") == [kept]
+        assert _rows(Like, "shard_2") == []
+        kept.post.refresh_from_db()
+        assert kept.post.like_count == 1
+
+    def test_reshard_moves_rows_keeping_ids(self, settings):
+        settings.INTERACTION_SHARDS = ["shard_1"]
+        likes = [LikeFactory(post=PostFactory()) for _ in range(6)]
+        settings.INTERACTION_SHARDS = SHARDS
+        moving = [like for like in likes if sharding.shard_for(like.post_id) == "shard_2"]
+
+        dry = StringIO()
+        call_command("reshard_interactions", dry_run=True, stdout=dry)
+        output = StringIO()
+        call_command("reshard_interactions", batch_size=2, stdout=output)
+        again = StringIO()
+        call_command("reshard_interactions", stdout=again)
+
+        assert f"Would move {len(moving)} rows." in dry.getvalue()
+        assert f"Moved {len(moving)} rows." in output.getvalue()
+        assert "Moved 0 rows." in again.getvalue()
+        assert [(like.pk, like.created_at) for like in _rows(Like, "shard_2")] == [
+            (like.pk, like.created_at) for like in moving
+        ]
+        assert len(_rows(Like, "shard_1")) == len(likes) - len(moving)
+        # New rows on the shard that received rows still get fresh ids.
+        assert LikeFactory(post=_post_on("shard_2")).pk >= sharding.SHARD_ID_SPACE
@@ -0,0 +1,220 @@
+"""Tests for single-statement engagement writes and the idempotent toggle endpoints."""
+
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.interactions import toggles
+from apps.interactions.counters import counter_ticker
+from apps.interactions.models import Bookmark, Like, Repost
+from apps.moderation.models import ModerationDecision, Vote
+from tests.factories import LikeFactory, PostFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def isolated_ticker(settings):
+    settings.FEED_COUNTER_TICK = 0
+    counter_ticker.clear()
+    yield
+    counter_ticker.clear()
+
+
+@pytest.mark.django_db
+class TestToggles:
+    """``add``/``remove`` write one row at most and report whether anything changed."""
+
+    def test_add_skips_existing_row(self):
+        like = LikeFactory()
+
+        assert toggles.add(Like, post=like.post, user=like.user) is None
+        assert Like.objects.filter(post=like.post, user=like.user).count() == 1
+
+    def test_add_returns_saved_instance(self):
+        post, user = PostFactory(), UserFactory()
+
+        like = toggles.add(Like, post=post, user=user)
+
+        assert like.pk == Like.objects.get(post=post, user=user).pk
+        assert like.created_at is not None
+
+    def test_remove_reports_whether_a_row_existed(self):
+        like = LikeFactory()
+
+        assert toggles.remove(Like, post=like.post, user=like.user) is True
+        assert toggles.remove(Like, post=like.post, user=like.user) is False
+        assert not Like.objects.exists()
+
+    def test_add_and_remove_mark_counters(self, django_capture_on_commit_callbacks):
+        post, user = PostFactory(), UserFactory()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            toggles.add(Like, post=post, user=user)
+        assert counter_ticker.pending() == {post.pk}
+
+        counter_ticker.clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            toggles.remove(Like, post=post, user=user)
+        assert counter_ticker.pending() == {post.pk}
+
+    def test_unchanged_toggle_does_not_mark_counters(self, django_capture_on_commit_callbacks):
+        like = LikeFactory()
+        counter_ticker.clear()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            toggles.add(Like, post=like.post, user=like.user)
+        assert counter_ticker.pending() == set()
+
+
+@pytest.mark.django_db
+class TestToggleEndpoints:
+    """``PUT``/``DELETE /api/posts/{id}/<interaction>/`` converge on the requested state."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.post = PostFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @pytest.mark.parametrize(
+        ("path", "model", "state"),
+        [
+            ("like", Like, "liked"),
+            ("repost", Repost, "reposted"),
+            ("bookmark", Bookmark, "bookmarked"),
+        ],
+    )
+    def test_put_and_delete_are_idempotent(self, path, model, state):
+        url = f"/api/posts/{self.post.id}/{path}/"
+
+        first = self.client.put(url)
+        second = self.client.put(url)
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.data == {"post": self.post.id, state: True, "changed": True}
+        assert second.data == {"post": self.post.id, state: True, "changed": False}
+        assert model.objects.filter(post=self.post, user=self.user).count() == 1
+
+        first = self.client.delete(url)
+        second = self.client.delete(url)
+
+        assert first.data == {"post": self.post.id, state: False, "changed": True}
+        assert second.data == {"post": self.post.id, state: False, "changed": False}
+        assert not model.objects.exists()
+
+    def test_repost_keeps_quote_text(self):
+        response = self.client.put(
+            f"/api/posts/{self.post.id}/repost/", {"quote_text": "Vale ler"}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Repost.objects.get(post=self.post, user=self.user).quote_text == "Vale ler"
+
+    def test_repost_rejects_long_quote(self):
+        response = self.client.put(
+            f"/api/posts/{self.post.id}/repost/", {"quote_text": "x" * 501}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Repost.objects.exists()
+
+    def test_requires_authentication(self):
+        response = APIClient().put(f"/api/posts/{self.post.id}/like/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unknown_post_is_not_found(self):
+        response = self.client.put("/api/posts/999999/like/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_duplicate_create_is_still_rejected(self):
+        self.client.post("/api/likes/", {"post": self.post.id})
+        response = self.client.post("/api/likes/", {"post": self.post.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Like.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestVoteToggle:
+    """``PUT /api/posts/{id}/vote/`` upserts the vote and re-evaluates the post."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.post = PostFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f"/api/posts/{self.post.id}/vote/"
+
+    def test_put_overwrites_existing_vote(self):
+        self.client.put(self.url, {"vote_type": "hide"}, format="json")
+        response = self.client.put(self.url, {"vote_type": "remove"}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["changed"] is True
+        vote = Vote.objects.get(post=self.post, voter=self.user)
+        assert vote.vote_type == "remove"
+
+    def test_client_cannot_choose_the_weight(self):
+        response = self.client.put(
+            self.url, {"vote_type": "remove", "weight": "999.99"}, format="json"
+        )
+
+        assert response.data["weight"] == "1.0"
+        vote = Vote.objects.get(post=self.post, voter=self.user)
+        assert vote.weight == Decimal("1.0")
+
+    def test_repeated_put_changes_nothing(self):
+        first = self.client.put(self.url, {"vote_type": "hide"}, format="json")
+        second = self.client.put(self.url, {"vote_type": "hide"}, format="json")
+
+        assert first.data["changed"] is True
+        assert second.data["changed"] is False
+        self.post.refresh_from_db()
+        assert self.post.vote_count == 1
+
+    def test_upsert_reports_insert_then_update(self):
+        first, created = toggles.upsert(
+            Vote,
+            conflict=("post", "voter"),
+            update=("vote_type", "updated_at"),
+            post=self.post,
+            voter=self.user,
+            vote_type="hide",
+        )
+        second, updated_created = toggles.upsert(
+            Vote,
+            conflict=("post", "voter"),
+            update=("vote_type", "updated_at"),
+            post=self.post,
+            voter=self.user,
+            vote_type="remove",
+        )
+
+        assert (created, updated_created) == (True, False)
+        assert first.pk == second.pk
+        self.post.refresh_from_db()
+        assert self.post.vote_count == 1
+
+    def test_put_archives_post_over_threshold(self, monkeypatch):
+        monkeypatch.setenv("MODERATION_REMOVAL_THRESHOLD", "1.0")
+
+        self.client.put(self.url, {"vote_type": "remove"}, format="json")
+
+        self.post.refresh_from_db()
+        assert self.post.is_archived
+        assert ModerationDecision.objects.filter(post=self.post).exists()
+
+    def test_put_validates_vote_type(self):
+        response = self.client.put(self.url, {"vote_type": "promote"}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_delete_withdraws_vote(self):
+        self.client.put(self.url, {"vote_type": "hide"}, format="json")
+
+        assert self.client.delete(self.url).data["changed"] is True
+        assert self.client.delete(self.url).data["changed"] is False
+        assert not Vote.objects.exists()
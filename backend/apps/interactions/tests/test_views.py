@@ -1,11 +1,15 @@
 """Tests for interaction views and API endpoints."""
 
+from datetime import timedelta
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from apps.interactions.models import Like, Repost, Bookmark, Reply
+from apps.posts.models import Post
 from tests.factories import (
     PostFactory, UserFactory, LikeFactory, RepostFactory,
     BookmarkFactory, ReplyFactory
@@ -323,6 +327,61 @@ class TestBookmarkViewSet:
         assert not Bookmark.objects.filter(id=bookmark.id).exists()
 
 
+@pytest.mark.django_db
+class TestBookmarkTimeline:
+    """``GET /api/bookmarks/timeline/`` pages hydrated posts by keyset."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        self.bookmarks = BookmarkFactory.create_batch(5, user=self.user)
+        for age, bookmark in enumerate(self.bookmarks):
+            Bookmark.objects.filter(pk=bookmark.pk).update(created_at=now - timedelta(minutes=age))
+
+    def test_pages_cover_every_bookmark_once(self):
+        seen = []
+        url = "/api/bookmarks/timeline/?limit=2"
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+
+        assert seen == [bookmark.pk for bookmark in self.bookmarks]
+
+    def test_posts_are_hydrated_with_authors(self):
+        response = self.client.get("/api/bookmarks/timeline/?limit=1")
+
+        item = response.data["results"][0]
+        post = self.bookmarks[0].post
+        assert item["post"]["id"] == post.pk
+        assert item["post"]["author"]["handle"] == post.author.handle
+        assert "count" not in response.data
+
+    def test_query_count_is_constant_per_page(self, django_assert_num_queries):
+        BookmarkFactory.create_batch(20, user=self.user)
+
+        with django_assert_num_queries(1):
+            self.client.get("/api/bookmarks/timeline/?limit=20")
+
+    def test_excludes_deleted_posts_and_other_users(self):
+        Post.objects.filter(pk=self.bookmarks[0].post_id).update(deleted_at=timezone.now())
+        BookmarkFactory()
+
+        response = self.client.get("/api/bookmarks/timeline/")
+
+        assert [item["id"] for item in response.data["results"]] == [
+            bookmark.pk for bookmark in self.bookmarks[1:]
+        ]
+
+    def test_requires_authentication(self):
+        response = APIClient().get("/api/bookmarks/timeline/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 @pytest.mark.django_db
 class TestReplyViewSet:
     """Test suite for ReplyViewSet."""
@@ -0,0 +1,215 @@
+"""Tests for write-behind buffering of hot post counters."""
+
+import os
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.interactions import write_behind
+from apps.interactions.counters import counter_ticker, engagement_counts
+from apps.posts.models import Post
+from apps.posts.serializers import PostSerializer
+from tests.factories import LikeFactory, PostFactory, ReplyFactory, UserFactory
+
+REDIS_TEST_URL = os.getenv("REDIS_TEST_URL", "")
+
+
+@pytest.fixture(autouse=True)
+def write_behind_mode(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.FEED_COUNTER_TICK = 0
+    settings.COUNTER_WRITE_BEHIND = True
+    settings.COUNTER_BUFFER_BACKEND = "apps.interactions.write_behind.InMemoryCounterBuffer"
+    write_behind.buffer_breaker.reset()
+    counter_ticker.clear()
+    yield
+    counter_ticker.clear()
+
+
+@pytest.mark.django_db
+class TestWriteBehind:
+    """Buffered columns change on flush; reads merge the pending deltas."""
+
+    def test_likes_are_buffered_until_flush(self, django_capture_on_commit_callbacks):
+        post = PostFactory()
+        with django_capture_on_commit_callbacks(execute=True):
+            LikeFactory.create_batch(3, post=post)
+            ReplyFactory(post=post)
+
+        post.refresh_from_db()
+        assert post.like_count == 0
+        assert post.reply_count == 1
+        assert write_behind.get_counter_buffer().pending([post.pk]) == {
+            post.pk: {"like_count": 3}
+        }
+
+        assert write_behind.flush_counters() == 1
+
+        post.refresh_from_db()
+        assert post.like_count == 3
+        assert write_behind.get_counter_buffer().pending([post.pk]) == {}
+
+    def test_deltas_wait_for_commit(self, django_capture_on_commit_callbacks):
+        post = PostFactory()
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            write_behind.add_delta(post.pk, "like_count", 1)
+        assert write_behind.get_counter_buffer().pending([post.pk]) == {}
+
+        callbacks[0]()
+        assert write_behind.get_counter_buffer().pending([post.pk]) == {
+            post.pk: {"like_count": 1}
+        }
+
+    def test_reads_merge_pending_deltas(self):
+        posts = PostFactory.create_batch(2)
+        Post.objects.filter(pk=posts[0].pk).update(like_count=2)
+        buffer = write_behind.get_counter_buffer()
+        buffer.add(posts[0].pk, "like_count", 5)
+        buffer.add(posts[1].pk, "repost_count", 1)
+
+        data = PostSerializer(Post.objects.filter(pk__in=[p.pk for p in posts]), many=True).data
+        by_id = {item["id"]: item for item in data}
+
+        assert by_id[posts[0].pk]["like_count"] == 7
+        assert by_id[posts[1].pk]["repost_count"] == 1
+        assert PostSerializer(Post.objects.get(pk=posts[0].pk)).data["like_count"] == 7
+        assert engagement_counts([posts[0].pk])[posts[0].pk]["likes"] == 7
+
+    def test_unbuffered_mode_writes_through(self, settings):
+        settings.COUNTER_WRITE_BEHIND = False
+        post = PostFactory()
+
+        LikeFactory(post=post)
+
+        post.refresh_from_db()
+        assert post.like_count == 1
+        assert write_behind.flush_counters() == 0
+
+    def test_failed_flush_restores_deltas(self, monkeypatch):
+        post = PostFactory()
+        write_behind.get_counter_buffer().add(post.pk, "like_count", 2)
+
+        def broken(deltas):
+            raise RuntimeError("database is down")
+
+        monkeypatch.setattr(write_behind, "apply_deltas", broken)
+        with pytest.raises(RuntimeError):
+            write_behind.flush_counters()
+
+        assert write_behind.get_counter_buffer().pending([post.pk]) == {
+            post.pk: {"like_count": 2}
+        }
+
+    def test_unreachable_buffer_falls_back_to_the_row(
+        self, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        post = PostFactory()
+
+        def down(*args):
+            raise ConnectionError("redis is down")
+
+        monkeypatch.setattr(write_behind.InMemoryCounterBuffer, "add", down)
+        with django_capture_on_commit_callbacks(execute=True):
+            write_behind.record(post.pk, "like_count", 1)
+
+        post.refresh_from_db()
+        assert post.like_count == 1
+
+    def test_retrieve_counts_a_view(self, django_capture_on_commit_callbacks):
+        post = PostFactory()
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.get(f"/api/posts/{post.pk}/")
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.get(f"/api/posts/{post.pk}/")
+
+        assert response.data["view_count"] == 1
+        write_behind.flush_counters()
+        post.refresh_from_db()
+        assert post.view_count == 2
+
+    def test_retrieve_without_write_behind_does_not_write(
+        self, settings, django_capture_on_commit_callbacks
+    ):
+        settings.COUNTER_WRITE_BEHIND = False
+        post = PostFactory()
+
+        with CaptureQueriesContext(connection) as queries:
+            with django_capture_on_commit_callbacks(execute=True):
+                response = APIClient().get(f"/api/posts/{post.pk}/")
+
+        assert response.data["view_count"] == 0
+        assert not [q for q in queries if q["sql"].startswith("UPDATE")]
+
+
+@pytest.mark.django_db
+class TestApplyDeltas:
+    """``apply_deltas`` adds every post's deltas in one statement per batch."""
+
+    def test_adds_and_clamps_at_zero(self, monkeypatch):
+        first, second = PostFactory(), PostFactory()
+        Post.objects.filter(pk=first.pk).update(like_count=4, view_count=10)
+        monkeypatch.setattr(write_behind, "FLUSH_BATCH_SIZE", 1)
+
+        write_behind.apply_deltas(
+            {
+                first.pk: {"like_count": -6, "view_count": 3},
+                second.pk: {"repost_count": 2},
+            }
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.like_count, first.view_count) == (0, 13)
+        assert second.repost_count == 2
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not REDIS_TEST_URL, reason="set REDIS_TEST_URL to a scratch Redis database")
+class TestRedisCounterBuffer:
+    """Round trip through a real Redis."""
+
+    @pytest.fixture
+    def buffer(self, settings):
+        settings.REDIS_URL = REDIS_TEST_URL
+        buffer = write_behind.RedisCounterBuffer(shards=4)
+        keys = [
+            f"{prefix}{shard}"
+            for prefix in (buffer.key_prefix, buffer.flushing_prefix)
+            for shard in range(buffer.shards)
+        ]
+        write_behind.get_redis().delete(*keys)
+        yield buffer
+        write_behind.get_redis().delete(*keys)
+
+    def test_take_detaches_and_ack_forgets(self, buffer):
+        for _ in range(10):
+            buffer.add(1, "like_count", 1)
+        buffer.add(2, "view_count", 3)
+
+        assert buffer.pending([1, 2]) == {1: {"like_count": 10}, 2: {"view_count": 3}}
+        taken = buffer.take()
+        buffer.add(1, "like_count", 1)
+
+        assert taken == {1: {"like_count": 10}, 2: {"view_count": 3}}
+        assert buffer.pending([1]) == {1: {"like_count": 1}}
+
+        buffer.ack()
+        assert buffer.take() == {1: {"like_count": 1}}
+
+    def test_unacknowledged_take_is_read_again(self, buffer):
+        # One shard, so the newer delta cannot land in a shard without leftovers.
+        buffer = write_behind.RedisCounterBuffer(shards=1)
+        buffer.add(1, "like_count", 2)
+
+        assert buffer.take() == {1: {"like_count": 2}}
+        buffer.add(1, "like_count", 1)
+        # The failed flush left its keys; they come back before newer deltas.
+        assert buffer.take() == {1: {"like_count": 2}}
+        buffer.ack()
+        assert buffer.take() == {1: {"like_count": 1}}
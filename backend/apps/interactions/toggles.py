@@ -0,0 +1,214 @@
+"""Single-statement, retry-safe writes for per-user engagement rows.
+
+Likes, reposts, bookmarks and votes are unique per ``(post, user)``. Checking for an
+existing row before inserting costs a round trip and still races with a concurrent
+double tap, which then fails on the unique constraint. These helpers issue one
+``INSERT … ON CONFLICT`` or ``DELETE … RETURNING`` instead (PostgreSQL,
+and SQLite 3.35+), so repeating a request converges on the same state.
+
+Rows written here bypass ``Model.save``/``delete``; the helpers send
+``post_save``/``post_delete`` themselves when a row was actually written or removed,
+inside the same transaction, so the post counter columns move with the row.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import TypeVar
+
+from django.db import NotSupportedError, connections, models, router, transaction
+from django.db.models.signals import post_delete, post_save
+
+M = TypeVar("M", bound=models.Model)
+
+BULK_INSERT_BATCH_SIZE = 500
+
+
+def _insert_sql(
+    instances: Sequence[models.Model], conflict: Sequence[str], connection
+) -> tuple[str, list]:
+    opts = instances[0]._meta
+    quote = connection.ops.quote_name
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    columns = ", ".join(quote(field.column) for field in fields)
+    placeholders = f"({', '.join(['%s'] * len(fields))})"
+    params = [
+        field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for instance in instances
+        for field in fields
+    ]
+    targets = ", ".join(quote(opts.get_field(name).column) for name in conflict)
+    sql = (
+        f"INSERT INTO {quote(opts.db_table)} ({columns}) "
+        f"VALUES {', '.join([placeholders] * len(instances))} ON CONFLICT ({targets})"
+    )
+    return sql, params
+
+
+def add_many(
+    model: type[M], instances: Sequence[M], conflict: Sequence[str] = ("post", "user")
+) -> list[M]:
+    """Insert ``instances``, skipping those whose ``conflict`` row already exists.
+
+    One multi-row ``INSERT … ON CONFLICT DO NOTHING`` per ``BULK_INSERT_BATCH_SIZE``
+    rows. Unlike ``bulk_create(ignore_conflicts=True)`` it reports which rows were
+    written: those are returned with their primary keys set. No signals are sent;
+    callers apply the side effects for the whole set.
+    """
+
+    if not instances:
+        return []
+    # Rows of a sharded model may belong to several databases.
+    by_db: dict[str, list[M]] = defaultdict(list)
+    for instance in instances:
+        by_db[router.db_for_write(model, instance=instance)].append(instance)
+    opts = model._meta
+    keys = [opts.get_field(name) for name in conflict]
+    by_key = {tuple(getattr(obj, field.attname) for field in keys): obj for obj in instances}
+    inserted = []
+    for using, rows in by_db.items():
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        returning = ", ".join(quote(field.column) for field in [opts.pk, *keys])
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+                batch = rows[start : start + BULK_INSERT_BATCH_SIZE]
+                sql, params = _insert_sql(batch, conflict, connection)
+                cursor.execute(f"{sql} DO NOTHING RETURNING {returning}", params)
+                for pk, *key in cursor.fetchall():
+                    instance = by_key[tuple(key)]
+                    instance.pk = pk
+                    instance._state.adding = False
+                    instance._state.db = using
+                    inserted.append(instance)
+    return inserted
+
+
+def add(model: type[M], conflict: Sequence[str] = ("post", "user"), **values) -> M | None:
+    """Insert a row unless one already exists for ``conflict``.
+
+    Returns the new instance, or ``None`` when the row was already there.
+    """
+
+    instance = model(**values)
+    using = router.db_for_write(model, instance=instance)
+    connection = connections[using]
+    sql, params = _insert_sql([instance], conflict, connection)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{sql} DO NOTHING RETURNING {pk}", params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+
+        instance.pk = row[0]
+        instance._state.adding = False
+        instance._state.db = using
+        post_save.send(
+            sender=model,
+            instance=instance,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=using,
+        )
+    return instance
+
+
+def _inserted_sql(instance: models.Model, connection) -> tuple[str, list]:
+    """SQL expression, usable in ``RETURNING``, that is true when the row was just inserted."""
+
+    if connection.vendor == "postgresql":
+        # xmax is only set on a tuple version written by ON CONFLICT DO UPDATE.
+        return "(xmax = 0)", []
+    fields = instance._meta.concrete_fields
+    created = next((field for field in fields if getattr(field, "auto_now_add", False)), None)
+    if created is None:
+        raise NotSupportedError(f"upsert() needs an auto_now_add field on {connection.vendor}.")
+    # An updated row keeps its original creation time, which differs from ours.
+    value = created.get_db_prep_save(getattr(instance, created.attname), connection)
+    return f"({connection.ops.quote_name(created.column)} = %s)", [value]
+
+
+def upsert(
+    model: type[M], conflict: Sequence[str], update: Sequence[str], **values
+) -> tuple[M | None, bool]:
+    """Insert a row or overwrite ``update`` fields of the existing one, in one statement.
+
+    Returns ``(instance, created)``. ``instance`` is ``None`` when the existing row
+    already held these values; then nothing is written. ``post_save`` is sent for
+    inserts and real updates, with ``created`` telling them apart.
+    """
+
+    instance = model(**values)
+    using = router.db_for_write(model, instance=instance)
+    connection = connections[using]
+    sql, params = _insert_sql([instance], conflict, connection)
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    fields = [opts.get_field(name) for name in update]
+    assignments = ", ".join(
+        f"{quote(field.column)} = EXCLUDED.{quote(field.column)}" for field in fields
+    )
+    # Timestamps always differ; only the other columns decide whether anything changed.
+    differs = " OR ".join(
+        f"{table}.{quote(field.column)} <> EXCLUDED.{quote(field.column)}"
+        for field in fields
+        if not getattr(field, "auto_now", False)
+    )
+    inserted, inserted_params = _inserted_sql(instance, connection)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{sql} DO UPDATE SET {assignments} WHERE {differs} "
+                f"RETURNING {quote(opts.pk.column)}, {inserted}",
+                params + inserted_params,
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None, False
+
+        instance.pk, created = row[0], bool(row[1])
+        instance._state.adding = False
+        instance._state.db = using
+        post_save.send(
+            sender=model,
+            instance=instance,
+            created=created,
+            update_fields=None if created else frozenset(update),
+            raw=False,
+            using=using,
+        )
+    return instance, created
+
+
+def remove(model: type[models.Model], **values) -> bool:
+    """Delete the row matching ``values`` (field names or attnames); return whether one existed."""
+
+    using = router.db_for_write(model, instance=model(**values))
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = model._meta
+    fields = [opts.get_field(name) for name in values]
+    conditions = " AND ".join(f"{quote(field.column)} = %s" for field in fields)
+    params = [
+        field.get_db_prep_value(getattr(value, "pk", value), connection)
+        for field, value in zip(fields, values.values())
+    ]
+    sql = f"DELETE FROM {quote(opts.db_table)} WHERE {conditions} RETURNING {quote(opts.pk.column)}"
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return False
+
+        instance = model(
+            pk=row[0], **{field.attname: param for field, param in zip(fields, params)}
+        )
+        instance._state.db = using
+        post_delete.send(sender=model, instance=instance, using=using, origin=instance)
+    return True
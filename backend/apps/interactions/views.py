@@ -1,40 +1,126 @@
 """API endpoints for user interactions."""
 
 from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
 
+from . import bulk, rollups, sharding
 from .models import Bookmark, Like, Reply, Repost
-from .serializers import BookmarkSerializer, LikeSerializer, ReplySerializer, RepostSerializer
+from .serializers import (
+    BookmarkSerializer,
+    BookmarkTimelineSerializer,
+    BulkPostsSerializer,
+    EngagementQuerySerializer,
+    LikeSerializer,
+    ReplySerializer,
+    RepostSerializer,
+)
+
+
+def bulk_response(request, kind: bulk.BulkKind, serializer_class) -> Response:
+    """Validate a bulk create request and answer with one result per requested item."""
+
+    serializer = serializer_class(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    (keys,) = serializer.validated_data.values()
+    results = bulk.bulk_add(kind, request.user, keys)
+    created = sum(result["status"] == bulk.CREATED for result in results)
+    return Response({"created": created, "results": results})
+
+
+def analytics_response(request, scope: str, subject_id: int) -> Response:
+    """Answer an analytics request with the rollup buckets of one post or author."""
+
+    serializer = EngagementQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    window = serializer.validated_data
+    buckets = rollups.engagement_series(scope, subject_id, **window)
+    totals = {
+        column: sum(bucket[column] for bucket in buckets) for column in rollups.COLUMNS.values()
+    }
+    return Response(
+        {
+            "granularity": window["granularity"],
+            "since": window["since"],
+            "until": window["until"],
+            "totals": totals,
+            "buckets": buckets,
+        }
+    )
 
 
 class BaseOwnerViewSet(viewsets.ModelViewSet):
     """Base viewset that automatically binds created objects to request.user."""
 
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_families = {"create": "interactions", "bulk": "bulk"}
 
     def perform_create(self, serializer):
         # Serializers now handle user assignment in their create() method
         serializer.save()
 
     def get_queryset(self):
-        return self.queryset.filter(**{self.user_field: self.request.user})
+        queryset = self.queryset.filter(**{self.user_field: self.request.user})
+        # A user's likes, reposts and bookmarks are spread over every shard.
+        return queryset.scatter() if sharding.is_sharded(queryset.model) else queryset
+
+
+class BulkCreateMixin:
+    """``POST <collection>/bulk/`` with ``{"posts": [...]}`` creates many rows at once."""
 
+    bulk_kind: bulk.BulkKind
 
-class LikeViewSet(BaseOwnerViewSet):
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        return bulk_response(request, self.bulk_kind, BulkPostsSerializer)
+
+
+class LikeViewSet(BulkCreateMixin, BaseOwnerViewSet):
     queryset = Like.objects.all()
     serializer_class = LikeSerializer
     user_field = "user"
+    bulk_kind = bulk.LIKES
 
 
-class RepostViewSet(BaseOwnerViewSet):
+class RepostViewSet(BulkCreateMixin, BaseOwnerViewSet):
     queryset = Repost.objects.all()
     serializer_class = RepostSerializer
     user_field = "user"
+    bulk_kind = bulk.REPOSTS
+
+
+class BookmarkTimelinePagination(CursorPagination):
+    """Keyset pages over ``bookmark_timeline_idx``; no offsets and no total count."""
 
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
 
-class BookmarkViewSet(BaseOwnerViewSet):
+
+class BookmarkViewSet(BulkCreateMixin, BaseOwnerViewSet):
     queryset = Bookmark.objects.all()
     serializer_class = BookmarkSerializer
     user_field = "user"
+    bulk_kind = bulk.BOOKMARKS
+
+    @action(detail=False, methods=["get"])
+    def timeline(self, request):
+        """Bookmarked posts, newest bookmark first, with their authors."""
+
+        queryset = self.get_queryset().select_related("post__author")
+        paginator = BookmarkTimelinePagination()
+        if sharding.partitioned():
+            # Posts live in another database: bookmarks of deleted posts are dropped
+            # from each page instead of filtered by a join.
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            page = [bookmark for bookmark in page if bookmark.post.deleted_at is None]
+        else:
+            queryset = queryset.filter(post__deleted_at__isnull=True)
+            page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = BookmarkTimelineSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class ReplyViewSet(BaseOwnerViewSet):
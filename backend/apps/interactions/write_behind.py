@@ -0,0 +1,292 @@
+"""Write-behind buffering for hot post counters.
+
+A viral post takes thousands of likes per second, and every ``F()`` increment of its
+counter row waits on the same row lock. With ``COUNTER_WRITE_BEHIND`` on, like,
+repost and view deltas are added to a counter buffer after the interaction commits
+instead. ``flush_counters`` (run by the ``flush_counter_buffer`` Celery task every
+``COUNTER_FLUSH_INTERVAL`` seconds) applies them in batched ``UPDATE … FROM (VALUES
+…)`` statements, one row per post however many deltas it collected. Reads add the
+pending deltas to the persisted columns, so counts stay close to live.
+
+``RedisCounterBuffer`` spreads increments over ``COUNTER_BUFFER_SHARDS`` hashes so one
+post does not become a single hot key. ``InMemoryCounterBuffer`` keeps them in the
+process, for tests and single-process development.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from apps.posts import metrics
+from apps.posts.broadcast import CircuitBreaker
+from apps.posts.models import Post
+from config.redis_client import get_redis
+
+BUFFERED_FIELDS = ("like_count", "repost_count", "view_count")
+FLUSH_BATCH_SIZE = 500
+FLUSH_LOCK_KEY = "counters:flush:lock"
+
+Deltas = dict[int, dict[str, int]]
+
+buffer_breaker = CircuitBreaker("counter_buffer")
+
+
+class BaseCounterBuffer:
+    """Interface shared by counter buffer backends."""
+
+    def __init__(self, shards: int):
+        self.shards = max(shards, 1)
+
+    def add(self, post_id: int, field: str, delta: int) -> bool:
+        """Buffer ``delta`` for ``field`` of ``post_id``."""
+
+        raise NotImplementedError
+
+    def pending(self, post_ids: Iterable[int]) -> Deltas:
+        """Return the buffered, non-zero deltas of ``post_ids``."""
+
+        raise NotImplementedError
+
+    def take(self) -> Deltas:
+        """Detach the buffered deltas for a flush; new deltas keep accumulating."""
+
+        raise NotImplementedError
+
+    def ack(self):
+        """Forget the deltas returned by ``take`` once they are persisted."""
+
+    def restore(self, deltas: Deltas):
+        """Give back the deltas returned by ``take`` after a failed flush."""
+
+
+class RedisCounterBuffer(BaseCounterBuffer):
+    """Buffer kept in ``shards`` Redis hashes of ``"<post_id>:<field>"`` to delta.
+
+    ``take`` renames every shard to a flushing key, so increments arriving during the
+    flush land in a fresh hash. A flushing key left behind by a failed flush is read
+    again by the next one before its shard is renamed.
+    """
+
+    key_prefix = "counters:pending:"
+    flushing_prefix = "counters:flushing:"
+
+    def add(self, post_id: int, field: str, delta: int) -> bool:
+        shard = random.randrange(self.shards)
+        get_redis().hincrby(f"{self.key_prefix}{shard}", f"{post_id}:{field}", delta)
+        return True
+
+    def pending(self, post_ids: Iterable[int]) -> Deltas:
+        keys = [f"{post_id}:{field}" for post_id in post_ids for field in BUFFERED_FIELDS]
+        if not keys:
+            return {}
+        pipeline = get_redis().pipeline(transaction=False)
+        for shard in range(self.shards):
+            pipeline.hmget(f"{self.key_prefix}{shard}", keys)
+        deltas: Deltas = defaultdict(dict)
+        for values in pipeline.execute():
+            for key, value in zip(keys, values):
+                if value:
+                    post_id, field = key.split(":")
+                    post = deltas[int(post_id)]
+                    post[field] = post.get(field, 0) + int(value)
+        return dict(deltas)
+
+    def take(self) -> Deltas:
+        client = get_redis()
+        pipeline = client.pipeline(transaction=False)
+        for shard in range(self.shards):
+            flushing = f"{self.flushing_prefix}{shard}"
+            if not client.exists(flushing) and client.exists(f"{self.key_prefix}{shard}"):
+                client.renamenx(f"{self.key_prefix}{shard}", flushing)
+            pipeline.hgetall(flushing)
+        deltas: Deltas = defaultdict(lambda: defaultdict(int))
+        for entries in pipeline.execute():
+            for key, value in entries.items():
+                post_id, field = key.split(":")
+                deltas[int(post_id)][field] += int(value)
+        return {post_id: dict(fields) for post_id, fields in deltas.items()}
+
+    def ack(self):
+        get_redis().delete(*(f"{self.flushing_prefix}{shard}" for shard in range(self.shards)))
+
+
+class InMemoryCounterBuffer(BaseCounterBuffer):
+    """Process-local buffer, for tests and single-process development."""
+
+    def __init__(self, shards: int):
+        super().__init__(shards)
+        self._lock = threading.Lock()
+        self._deltas: defaultdict[int, defaultdict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+
+    def add(self, post_id: int, field: str, delta: int) -> bool:
+        with self._lock:
+            self._deltas[post_id][field] += delta
+        return True
+
+    def pending(self, post_ids: Iterable[int]) -> Deltas:
+        with self._lock:
+            return {
+                post_id: {field: delta for field, delta in fields.items() if delta}
+                for post_id in post_ids
+                if (fields := self._deltas.get(post_id))
+            }
+
+    def take(self) -> Deltas:
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(lambda: defaultdict(int))
+        return {post_id: dict(fields) for post_id, fields in deltas.items()}
+
+    def restore(self, deltas: Deltas):
+        for post_id, fields in deltas.items():
+            for field, delta in fields.items():
+                self.add(post_id, field, delta)
+
+
+_counter_buffer: BaseCounterBuffer | None = None
+
+
+def get_counter_buffer() -> BaseCounterBuffer:
+    """Return the configured counter buffer backend."""
+
+    global _counter_buffer
+    if _counter_buffer is None:
+        backend = import_string(settings.COUNTER_BUFFER_BACKEND)
+        _counter_buffer = backend(settings.COUNTER_BUFFER_SHARDS)
+    return _counter_buffer
+
+
+@receiver(setting_changed)
+def _reset_counter_buffer(setting, **_):
+    global _counter_buffer
+    if setting.startswith("COUNTER_"):
+        _counter_buffer = None
+
+
+def buffers(field: str) -> bool:
+    """Return whether changes to ``field`` go through the buffer."""
+
+    return settings.COUNTER_WRITE_BEHIND and field in BUFFERED_FIELDS
+
+
+def pending_deltas(post_ids: Iterable[int]) -> Deltas:
+    """Buffered deltas of ``post_ids`` to add to their persisted counters on read."""
+
+    if not settings.COUNTER_WRITE_BEHIND:
+        return {}
+    deltas = buffer_breaker.call("counter_pending", get_counter_buffer().pending, list(post_ids))
+    return deltas or {}
+
+
+def add_delta(post_id: int, field: str, delta: int):
+    """Apply ``delta`` to a post counter, through the buffer when ``field`` is buffered."""
+
+    if buffers(field):
+        record(post_id, field, delta)
+    else:
+        update_counter(post_id, field, delta)
+
+
+def add_deltas(post_ids: Iterable[int], field: str, delta: int):
+    """Apply the same ``delta`` to ``field`` of every post in ``post_ids``.
+
+    Unbuffered columns take it in a single ``UPDATE``.
+    """
+
+    post_ids = list(post_ids)
+    if buffers(field):
+        for post_id in post_ids:
+            record(post_id, field, delta)
+    elif post_ids:
+        Post.objects.filter(pk__in=post_ids).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def record(post_id: int, field: str, delta: int):
+    """Buffer ``delta`` once the current transaction commits.
+
+    If the buffer cannot be reached the delta is written to the row directly.
+    """
+
+    def buffer():
+        if not buffer_breaker.call("counter_add", get_counter_buffer().add, post_id, field, delta):
+            update_counter(post_id, field, delta)
+
+    transaction.on_commit(buffer)
+
+
+def update_counter(post_id: int, field: str, delta: int):
+    """Add ``delta`` to ``field`` of ``post_id`` in place, never going below zero."""
+
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def apply_deltas(deltas: Deltas):
+    """Add ``deltas`` to the counter columns with one ``UPDATE`` per batch of posts."""
+
+    using = router.db_for_write(Post)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(Post._meta.db_table)
+    columns = [quote(Post._meta.get_field(field).column) for field in BUFFERED_FIELDS]
+    rows = [
+        (post_id, *(fields.get(field, 0) for field in BUFFERED_FIELDS))
+        for post_id, fields in sorted(deltas.items())
+        if any(fields.values())
+    ]
+    assignments = ", ".join(
+        f"{column} = CASE WHEN {table}.{column} + v.d{index} < 0 THEN 0 "
+        f"ELSE {table}.{column} + v.d{index} END"
+        for index, column in enumerate(columns)
+    )
+    names = ", ".join(f"d{index}" for index in range(len(columns)))
+    placeholders = f"({', '.join(['%s'] * (len(columns) + 1))})"
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+            batch = rows[start : start + FLUSH_BATCH_SIZE]
+            cursor.execute(
+                f"WITH v(id, {names}) AS (VALUES {', '.join([placeholders] * len(batch))}) "
+                f"UPDATE {table} SET {assignments} FROM v "
+                f"WHERE {table}.{quote(Post._meta.pk.column)} = v.id",
+                [value for row in batch for value in row],
+            )
+
+
+def flush_counters() -> int:
+    """Persist the buffered deltas; return how many posts were updated."""
+
+    if not settings.COUNTER_WRITE_BEHIND:
+        return 0
+    lock_timeout = max(int(settings.COUNTER_FLUSH_INTERVAL * 10), 10)
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=lock_timeout):
+        return 0
+    try:
+        counter_buffer = get_counter_buffer()
+        deltas = counter_buffer.take()
+        if not deltas:
+            return 0
+        try:
+            apply_deltas(deltas)
+        except Exception:
+            counter_buffer.restore(deltas)
+            raise
+        counter_buffer.ack()
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    for fields in deltas.values():
+        for field, delta in fields.items():
+            metrics.counter_deltas_flushed.inc(abs(delta), field=field)
+    return len(deltas)
@@ -8,6 +8,7 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from apps.interactions.sharding import ShardedQuerySet
 from apps.posts.models import Post
 
 User = settings.AUTH_USER_MODEL
@@ -20,14 +21,21 @@ class Vote(models.Model):
         HIDE = "hide", "Ocultar"
         REMOVE = "remove", "Remover"
 
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="votes")
-    voter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="votes")
+    # Sharded by post (apps/interactions/sharding.py), like likes and reposts.
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="votes", db_constraint=False
+    )
+    voter = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="votes", db_constraint=False
+    )
     vote_type = models.CharField(max_length=10, choices=Type.choices)
     weight = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("1.0"))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         unique_together = ("post", "voter")
         ordering = ("-created_at",)
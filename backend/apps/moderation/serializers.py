@@ -4,6 +4,8 @@ from decimal import Decimal
 
 from rest_framework import serializers
 
+from apps.interactions import toggles
+
 from .models import ModerationDecision, Vote
 
 
@@ -25,17 +27,6 @@ class VoteSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "voter", "voter_handle", "created_at", "updated_at")
 
-    def validate(self, attrs):
-        request = self.context.get("request")
-        user = getattr(request, "user", None)
-
-        if user and user.is_authenticated:
-            post = attrs.get("post")
-            if Vote.objects.filter(post=post, voter=user).exists():
-                raise serializers.ValidationError("You have already voted on this post.")
-
-        return attrs
-
     def create(self, validated_data):
         request = self.context.get("request")
         user = getattr(request, "user", None)
@@ -45,16 +36,26 @@ class VoteSerializer(serializers.ModelSerializer):
         # Use provided weight or default to 1.0
         weight = validated_data.get("weight", Decimal("1.0"))
 
-        vote = Vote.objects.create(
+        vote = toggles.add(
+            Vote,
+            conflict=("post", "voter"),
             voter=user,
             post=validated_data["post"],
             vote_type=validated_data["vote_type"],
             weight=weight,
             active=True,
         )
+        if vote is None:
+            raise serializers.ValidationError("You have already voted on this post.")
         return vote
 
 
+class VoteStateSerializer(serializers.Serializer):
+    """Desired vote of the current user on one post, for ``PUT /api/posts/{id}/vote/``."""
+
+    vote_type = serializers.ChoiceField(choices=Vote.Type.choices)
+
+
 class ModerationDecisionSerializer(serializers.ModelSerializer):
     post_text = serializers.CharField(source="post.text", read_only=True)
 
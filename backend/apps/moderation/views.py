@@ -24,45 +24,51 @@ class VoteViewSet(viewsets.ModelViewSet):
     queryset = Vote.objects.select_related("post", "voter").all()
     serializer_class = VoteSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_families = {"create": "votes", "update": "votes", "partial_update": "votes"}
 
     def get_queryset(self):
         queryset = super().get_queryset()
         post_id = self.request.query_params.get("post")
         if post_id:
-            queryset = queryset.filter(post_id=post_id)
-        return queryset
+            return queryset.for_post(post_id)
+        return queryset.scatter()
 
     def perform_create(self, serializer):
         vote = serializer.save()
         self._evaluate_post(vote.post)
 
     def _evaluate_post(self, post: Post):
-        result = Vote.objects.filter(
+        evaluate_post(post)
+
+
+def evaluate_post(post: Post):
+    """Archive ``post`` and record the decision once its removal votes reach the threshold."""
+
+    result = Vote.objects.for_post(post).filter(
+        vote_type=Vote.Type.REMOVE,
+        active=True,
+        weight__gt=Decimal("0")
+    ).aggregate(total=Sum("weight"))
+
+    total_weight = result.get("total")
+    if total_weight is None:
+        total_weight = Decimal("0")
+    elif not isinstance(total_weight, Decimal):
+        total_weight = Decimal(str(total_weight))
+
+    # Get current threshold (allows for dynamic configuration)
+    current_threshold = get_removal_threshold()
+
+    if total_weight >= current_threshold:
+        post.archive()
+        ModerationDecision.objects.get_or_create(
             post=post,
-            vote_type=Vote.Type.REMOVE,
-            active=True,
-            weight__gt=Decimal("0")
-        ).aggregate(total=Sum("weight"))
-
-        total_weight = result.get("total")
-        if total_weight is None:
-            total_weight = Decimal("0")
-        elif not isinstance(total_weight, Decimal):
-            total_weight = Decimal(str(total_weight))
-
-        # Get current threshold (allows for dynamic configuration)
-        current_threshold = get_removal_threshold()
-
-        if total_weight >= current_threshold:
-            post.archive()
-            ModerationDecision.objects.get_or_create(
-                post=post,
-                defaults={
-                    "total_weight": total_weight,
-                    "threshold": current_threshold,
-                    "archived": True,
-                },
-            )
+            defaults={
+                "total_weight": total_weight,
+                "threshold": current_threshold,
+                "archived": True,
+            },
+        )
 
 
 class ModerationDecisionViewSet(viewsets.ReadOnlyModelViewSet):
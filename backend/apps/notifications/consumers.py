@@ -0,0 +1,54 @@
+"""WebSocket consumer that pushes notifications to their recipient."""
+
+from __future__ import annotations
+
+from typing import Any
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from apps.accounts.authentication import resolve_socket_user
+
+from .realtime import backlog_frame, notifications_group, unread_frame
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Streams the notifications of the authenticated user.
+
+    Connect with ``?token=<auth token>``; sockets without a valid token are closed
+    with code 4001. On connect the socket receives ``notifications.unread`` with the
+    unread count, preceded by ``notifications.backlog`` when ``?since=<id>`` names
+    the newest notification the client already has. Afterwards it receives
+    ``notification.created`` frames and ``notifications.unread`` whenever the count
+    changes.
+    """
+
+    group_name: str | None = None
+
+    async def connect(self):
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        token = params.get("token", [None])[0]
+        user = await resolve_socket_user(str(token)) if token else None
+        if user is None:
+            await self.close(code=4001)
+            return
+
+        self.group_name = notifications_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        since = params.get("since", [""])[0]
+        if since.isdigit():
+            await self.send(
+                text_data=await database_sync_to_async(backlog_frame)(user.pk, int(since))
+            )
+        await self.send(text_data=await database_sync_to_async(unread_frame)(user.pk))
+
+    async def disconnect(self, close_code: int):  # pragma: no cover - network cleanup
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_push(self, event: dict[str, Any]):
+        # Pre-encoded once per event by the producer; forward the text untouched.
+        await self.send(text_data=event["frame"])
@@ -0,0 +1,55 @@
+"""Interaction event consumer that turns engagement into notifications."""
+
+from __future__ import annotations
+
+from django.db import transaction
+
+from apps.accounts.models import User
+from apps.interactions.events import Action, EventConsumer, Kind
+from apps.interactions.models import InteractionEvent
+from apps.posts.models import Post
+
+from .models import Notification
+from .realtime import publish_notifications
+
+
+class NotificationEvents(EventConsumer):
+    """Notifies post authors of likes, reposts, bookmarks and replies, and followed users."""
+
+    name = "notifications"
+    # Event kinds share their values with ``Notification.Type``.
+    kinds = frozenset({Kind.LIKE, Kind.REPOST, Kind.BOOKMARK, Kind.REPLY, Kind.FOLLOW})
+
+    def handle(self, events: list[InteractionEvent]):
+        created = [event for event in events if event.action == Action.CREATED]
+        post_ids = {event.subject_id for event in created if event.kind != Kind.FOLLOW}
+        authors = dict(
+            Post.objects.filter(pk__in=post_ids, deleted_at__isnull=True).values_list(
+                "pk", "author_id"
+            )
+        )
+        recipients = {}
+        for event in created:
+            if event.kind == Kind.FOLLOW:
+                recipients[event.pk] = event.subject_id
+            elif event.subject_id in authors:
+                recipients[event.pk] = authors[event.subject_id]
+        user_ids = {event.actor_id for event in created} | set(recipients.values())
+        # Users deleted since the event was written cannot be referenced any more.
+        users = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+
+        notifications = Notification.objects.bulk_create(
+            Notification(
+                recipient_id=recipients[event.pk],
+                actor_id=event.actor_id,
+                notification_type=event.kind,
+                post_id=None if event.kind == Kind.FOLLOW else event.subject_id,
+                created_at=event.created_at,
+            )
+            for event in created
+            if event.pk in recipients
+            and recipients[event.pk] != event.actor_id
+            and {recipients[event.pk], event.actor_id} <= users
+        )
+        if notifications:
+            transaction.on_commit(lambda: publish_notifications(notifications))
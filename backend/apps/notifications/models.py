@@ -30,6 +30,14 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["recipient", "-created_at"], name="notification_inbox_idx"),
+            models.Index(
+                fields=["recipient"],
+                condition=models.Q(is_read=False),
+                name="notification_unread_idx",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - simple representation
         return f"Notification to {self.recipient_id} ({self.notification_type})"
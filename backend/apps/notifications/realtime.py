@@ -0,0 +1,103 @@
+"""Frames and broadcasts for realtime notification delivery.
+
+Each recipient has one group, ``notifications_<user id>``, joined by all of their
+open ``NotificationConsumer`` sockets. Frames are encoded once per event and
+forwarded verbatim, like feed broadcasts.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from channels.layers import get_channel_layer
+from django.db.models import Count
+
+from apps.posts.broadcast import send_to_group
+from apps.posts.frames import encode_frame
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+BACKLOG_LIMIT = 50
+
+
+def notifications_group(user_id: int) -> str:
+    """Return the group of sockets receiving the notifications of ``user_id``."""
+
+    return f"notifications_{user_id}"
+
+
+def unread_count(user_id: int) -> int:
+    return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def unread_frame(user_id: int) -> str:
+    return encode_frame({"type": "notifications.unread", "count": unread_count(user_id)})
+
+
+def backlog_frame(user_id: int, since: int) -> str:
+    """Encode the notifications newer than ``since`` missed while disconnected."""
+
+    notifications = (
+        Notification.objects.select_related("actor", "recipient")
+        .filter(recipient_id=user_id, id__gt=since)
+        .order_by("-id")[:BACKLOG_LIMIT]
+    )
+    return encode_frame(
+        {
+            "type": "notifications.backlog",
+            "notifications": NotificationSerializer(notifications, many=True).data,
+        }
+    )
+
+
+def _send(user_id: int, frame: str, event: str):
+    channel_layer = get_channel_layer()
+    if channel_layer:
+        send_to_group(
+            channel_layer,
+            notifications_group(user_id),
+            {"type": "notification.push", "event": event, "frame": frame},
+        )
+
+
+def publish_notification(notification: Notification):
+    """Push a new notification, with the updated unread count, to its recipient."""
+
+    frame = encode_frame(
+        {
+            "type": "notification.created",
+            "notification": NotificationSerializer(notification).data,
+            "unread": unread_count(notification.recipient_id),
+        }
+    )
+    _send(notification.recipient_id, frame, "notification.created")
+
+
+def publish_notifications(notifications: Sequence[Notification]):
+    """Push notifications created together, with one query for all unread counts."""
+
+    ids = [notification.pk for notification in notifications]
+    notifications = Notification.objects.select_related("actor", "recipient").filter(pk__in=ids)
+    recipients = {notification.recipient_id for notification in notifications}
+    unread = dict(
+        Notification.objects.filter(recipient_id__in=recipients, is_read=False)
+        .values("recipient_id")
+        .annotate(total=Count("pk"))
+        .values_list("recipient_id", "total")
+    )
+    for notification in notifications.order_by("pk"):
+        frame = encode_frame(
+            {
+                "type": "notification.created",
+                "notification": NotificationSerializer(notification).data,
+                "unread": unread.get(notification.recipient_id, 0),
+            }
+        )
+        _send(notification.recipient_id, frame, "notification.created")
+
+
+def publish_unread_count(user_id: int):
+    """Push the current unread count after notifications were read or removed."""
+
+    _send(user_id, unread_frame(user_id), "notifications.unread")
@@ -0,0 +1,27 @@
+"""Signals that push notification changes to connected recipients."""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .realtime import publish_notification, publish_unread_count
+
+
+@receiver(post_save, sender=Notification)
+def push_saved_notification(sender, instance: Notification, created: bool, **_):
+    """Deliver new notifications and read-state changes once they are committed."""
+
+    if created:
+        transaction.on_commit(lambda: publish_notification(instance))
+    else:
+        recipient_id = instance.recipient_id
+        transaction.on_commit(lambda: publish_unread_count(recipient_id))
+
+
+@receiver(post_delete, sender=Notification)
+def push_deleted_notification(sender, instance: Notification, **_):
+    recipient_id = instance.recipient_id
+    transaction.on_commit(lambda: publish_unread_count(recipient_id))
@@ -0,0 +1,117 @@
+"""Tests for the realtime notification consumer."""
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.accounts.authentication import token_cache
+from apps.notifications.consumers import NotificationConsumer
+from tests.factories import NotificationFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def in_memory_backends(settings):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+async def _connect(token, query=""):
+    communicator = WebsocketCommunicator(
+        NotificationConsumer.as_asgi(), f"/ws/notifications/?token={token}{query}"
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+    return communicator
+
+
+@pytest.mark.django_db(transaction=True)
+class TestNotificationConsumer:
+    """Recipients get new notifications and unread counts pushed to their sockets."""
+
+    def test_requires_token(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                NotificationConsumer.as_asgi(), "/ws/notifications/"
+            )
+            return await communicator.connect()
+
+        assert async_to_sync(scenario)() == (False, 4001)
+
+    def test_connect_sends_unread_count(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        NotificationFactory.create_batch(2, recipient=user)
+        NotificationFactory(recipient=user, is_read=True)
+
+        async def scenario():
+            communicator = await _connect(token.key)
+            frame = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return frame
+
+        assert async_to_sync(scenario)() == {"type": "notifications.unread", "count": 2}
+
+    def test_new_notification_is_pushed_to_recipient_only(self):
+        user, other = UserFactory(), UserFactory()
+        token = Token.objects.create(user=user)
+
+        async def scenario():
+            communicator = await _connect(token.key)
+            await communicator.receive_json_from()
+            await database_sync_to_async(NotificationFactory)(recipient=other)
+            nothing = await communicator.receive_nothing(timeout=0.1)
+            notification = await database_sync_to_async(NotificationFactory)(recipient=user)
+            frame = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return nothing, notification, frame
+
+        nothing, notification, frame = async_to_sync(scenario)()
+
+        assert nothing
+        assert frame["type"] == "notification.created"
+        assert frame["notification"]["id"] == notification.id
+        assert frame["unread"] == 1
+
+    def test_mark_all_read_pushes_unread_count(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        NotificationFactory(recipient=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        async def scenario():
+            communicator = await _connect(token.key)
+            await communicator.receive_json_from()
+            await database_sync_to_async(client.post)("/api/notifications/mark_all_read/")
+            frame = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return frame
+
+        assert async_to_sync(scenario)() == {"type": "notifications.unread", "count": 0}
+
+    def test_since_sends_missed_notifications(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        seen = NotificationFactory(recipient=user)
+        missed = NotificationFactory(recipient=user)
+
+        async def scenario():
+            communicator = await _connect(token.key, f"&since={seen.id}")
+            backlog = await communicator.receive_json_from()
+            unread = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return backlog, unread
+
+        backlog, unread = async_to_sync(scenario)()
+
+        assert backlog["type"] == "notifications.backlog"
+        assert [item["id"] for item in backlog["notifications"]] == [missed.id]
+        assert unread["count"] == 2
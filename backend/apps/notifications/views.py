@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from .models import Notification
+from .realtime import publish_unread_count
 from .serializers import NotificationSerializer
 
 
@@ -21,4 +22,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["post"])
     def mark_all_read(self, request):
         count = self.get_queryset().update(is_read=True)
+        if count:
+            publish_unread_count(request.user.pk)
         return Response({"marked": count})
@@ -0,0 +1,152 @@
+"""Bounded, circuit-broken realtime calls for request and task write paths.
+
+Saving a post, an interaction or a notification must not wait on Redis. Channel-layer
+``group_send`` calls made from those paths go through ``channel_breaker`` and
+replay-log appends through ``replay_breaker``. Each send gets ``REALTIME_SEND_TIMEOUT``
+seconds (appends are bounded by ``REDIS_SOCKET_TIMEOUT``), and after
+``REALTIME_BREAKER_THRESHOLD`` consecutive failures a breaker opens and its calls are
+skipped without touching Redis. After ``REALTIME_BREAKER_RESET`` seconds
+one probe call is let through; its success closes the breaker again.
+
+Skipped broadcasts are not retried. Clients that missed them catch up with their
+next snapshot, like after any other gap in the replay log.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by the threads of one process."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may go ahead; lets a single probe through once due."""
+
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._probing:
+                return False
+            if time.monotonic() - self._opened_at < settings.REALTIME_BREAKER_RESET:
+                return False
+            self._state = HALF_OPEN
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+        metrics.realtime_breaker_open.set(0, circuit=self.name)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == CLOSED and self._failures < settings.REALTIME_BREAKER_THRESHOLD:
+                return
+            if self._state == CLOSED:
+                logger.warning("Circuit %s opened after %d failures", self.name, self._failures)
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+        metrics.realtime_breaker_open.set(1, circuit=self.name)
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+        metrics.realtime_breaker_open.set(0, circuit=self.name)
+
+    def call(self, event: str, func: Callable[..., T], *args: Any) -> T | None:
+        """Run ``func`` unless the breaker is open; return ``None`` if skipped or failed."""
+
+        if not self.allow():
+            metrics.realtime_calls_skipped.inc(event=event)
+            return None
+        try:
+            result = func(*args)
+        except Exception:
+            logger.warning("Realtime call for %s failed", event, exc_info=True)
+            self.record_failure()
+            return None
+        self.record_success()
+        return result
+
+    async def acall(self, event: str, func: Callable[..., Awaitable[T]], *args: Any) -> T | None:
+        """Await ``func`` unless the breaker is open, like ``call``."""
+
+        if not self.allow():
+            metrics.realtime_calls_skipped.inc(event=event)
+            return None
+        try:
+            result = await func(*args)
+        except Exception:
+            logger.warning("Realtime call for %s failed", event, exc_info=True)
+            self.record_failure()
+            return None
+        self.record_success()
+        return result
+
+
+channel_breaker = CircuitBreaker("channel_layer")
+replay_breaker = CircuitBreaker("replay_log")
+
+
+async def _bounded_group_send(channel_layer, group: str, message: dict[str, Any]):
+    await asyncio.wait_for(
+        channel_layer.group_send(group, message), timeout=settings.REALTIME_SEND_TIMEOUT
+    )
+
+
+def _timed_group_send(channel_layer, group: str, message: dict[str, Any], event: str) -> bool:
+    try:
+        with metrics.group_send_seconds.time(event=event):
+            async_to_sync(_bounded_group_send)(channel_layer, group, message)
+    except Exception:
+        metrics.group_send_failures.inc(event=event)
+        raise
+    return True
+
+
+def send_to_group(channel_layer, group: str, message: dict[str, Any]) -> bool:
+    """``group_send`` from sync code within the time budget; return whether it was sent."""
+
+    event = message.get("event") or message["type"]
+    return bool(
+        channel_breaker.call(event, _timed_group_send, channel_layer, group, message, event)
+    )
@@ -2,89 +2,453 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from typing import Any
 from urllib.parse import parse_qs
 
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
+from django.db.models import Q
 
+from apps.accounts.authentication import resolve_socket_user
 from apps.accounts.models import User
 
+from . import metrics
+from .drain import DRAIN_CLOSE_CODE, feed_drain, reconnect_delay_ms, server_group
+from .encodings import JSON, negotiate, transcode
+from .frames import (
+    FOR_YOU_GROUP,
+    FrameBatch,
+    delta_frame,
+    encode_frame,
+    feed_update_frame,
+    following_group,
+    frame_type_of,
+    post_counters_group,
+    snapshot_cursor,
+    snapshot_frame,
+)
 from .models import Post
+from .outbound import DROPPED, OVERFLOW, QUEUED, OutboundQueue
+from .replay import get_replay_log
 from .serializers import PostSerializer
+from .snapshots import feed_snapshots
+
+MIN_BATCH_WINDOW_MS = 50
+MAX_BATCH_WINDOW_MS = 5000
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+
+def _int_param(params: dict[str, list[str]], name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(params.get(name, [default])[0])
+    except (TypeError, ValueError):
+        value = default
+    return max(low, min(high, value))
 
 
 class FeedConsumer(AsyncJsonWebsocketConsumer):
-    """Streams feed updates over WebSocket grouped by scope."""
+    """Streams feed updates over WebSocket grouped by scope.
+
+    Clients may opt into batching with ``?batch=1`` (plus optional ``batch_window``
+    in milliseconds and ``batch_size``). Updates are then buffered per connection and
+    delivered as ``feed.batch`` frames, at most one per window unless the buffer fills.
+
+    Every update and snapshot carries a ``cursor``. Clients that reconnect with
+    ``?since=<cursor>`` (or send it with ``feed.request_refresh``) receive a
+    ``feed.delta`` with only the events they missed, and a full snapshot only when the
+    cursor is no longer in the replay log.
+
+    Frames are written through a bounded ``OutboundQueue``. A client that falls behind
+    has its queued updates replaced by a ``feed.resync`` marker, and one that stays
+    behind is closed with ``SLOW_CONSUMER_CLOSE_CODE``. Daphne's ``send`` only appends
+    to the transport buffer and never waits on the client, so the queue can only fill
+    for clients that connect with ``?ack=1`` and acknowledge with ``{"type":
+    "feed.ack", "received": <frames received so far>}``: the writer stops once
+    ``FEED_ACK_WINDOW`` written frames are unacknowledged. Without acks the queue only
+    absorbs bursts within the event loop.
+
+    ``?encoding=msgpack|deflate`` (or an ``ourvoice.<encoding>`` subprotocol) switches
+    outgoing frames to binary encodings; see ``apps.posts.encodings``.
+
+    ``{"type": "counters.subscribe", "posts": [...]}`` replaces the set of posts whose
+    engagement counters the socket follows (the first ``FEED_COUNTER_MAX_SUBSCRIPTIONS``
+    in client order that its user can see); ``post.counters`` frames for them arrive
+    at most once per tick (see ``apps.interactions.counters``).
+
+    During a drain (see ``apps.posts.drain``) new sockets are refused and open ones
+    receive ``server.draining`` with the cursor of the last event they were sent.
+    """
 
     scope_name: str
     user: User | AnonymousUser | None
     group_name: str
+    batch: FrameBatch | None = None
+    batch_window: float = 0.0
+    _flush_task: asyncio.Task | None = None
+    outbox: OutboundQueue | None = None
+    _writer_task: asyncio.Task | None = None
+    _evicted: bool = False
+    ack_window: int = 0
+    _frames_written: int = 0
+    _frames_acked: int = 0
+    encoding: str = JSON
+    counter_posts: frozenset[int] = frozenset()
+    cursor: str | None = None
+    _cursor_lost: bool = False
+    _batch_cursor: str | None = None
+    _draining: bool = False
+    _drain_task: asyncio.Task | None = None
+    _accepted: bool = False
 
     async def connect(self):
+        if feed_drain.active:
+            metrics.rejected_connections.inc(reason="draining")
+            await self.close(code=DRAIN_CLOSE_CODE)
+            return
+
         params = parse_qs(self.scope.get("query_string", b"").decode())
         self.scope_name = params.get("scope", ["for_you"])[0].lower()
         token = params.get("token", [None])[0]
         self.user = None
 
         if token:
-            self.user = await self._resolve_user(token)
+            self.user = await resolve_socket_user(str(token))
 
         if self.scope_name == "following":
             if not self.user:
+                metrics.rejected_connections.inc(reason="unauthenticated")
                 await self.close(code=4001)
                 return
-            self.group_name = f"feed_following_{self.user.pk}"
+            self.group_name = following_group(self.user.pk)
         else:
-            self.group_name = "feed_for_you"
+            self.group_name = FOR_YOU_GROUP
 
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        if params.get("batch", ["0"])[0].lower() in {"1", "true", "yes"}:
+            self._configure_batching(params)
+        if params.get("ack", ["0"])[0].lower() in {"1", "true", "yes"}:
+            self.ack_window = max(settings.FEED_ACK_WINDOW, 1)
 
-        posts = await self._fetch_initial_posts()
-        await self.send_json(
-            {
-                "type": "feed.initial",
-                "scope": self.scope_name,
-                "posts": posts,
-            }
+        self.encoding, subprotocol = negotiate(
+            params.get("encoding", [None])[0], self.scope.get("subprotocols", [])
         )
 
+        await self._join(self.group_name, self._replay_scope)
+        await self._join(server_group(settings.FEED_SERVER_NAME), "server")
+        await self.accept(subprotocol=subprotocol)
+        self._accepted = True
+        metrics.connections.inc(scope=self._replay_scope)
+        metrics.open_connections.inc(scope=self._replay_scope)
+        self._start_writer()
+        feed_drain.register(self)
+
+        await self._send_sync_frame("feed.initial", params.get("since", [None])[0])
+
     async def disconnect(self, close_code: int):  # pragma: no cover - network cleanup
+        feed_drain.unregister(self)
+        if self._drain_task and self._drain_task is not asyncio.current_task():
+            self._drain_task.cancel()
+        if self._flush_task:
+            self._flush_task.cancel()
+        if self._writer_task:
+            self._writer_task.cancel()
+            metrics.outbound_queue_depth.dec(len(self.outbox))
+            metrics.outbound_unacked_frames.dec(self._unacked)
+        if self._accepted:
+            metrics.disconnections.inc(scope=self._replay_scope)
+            metrics.open_connections.dec(scope=self._replay_scope)
         if hasattr(self, "group_name"):
-            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await self._leave(self.group_name, self._replay_scope)
+            await self._leave(server_group(settings.FEED_SERVER_NAME), "server")
+        await self._subscribe_counters(frozenset())
 
     async def receive_json(self, content: dict[str, Any], **kwargs: Any):
-        if content.get("type") == "feed.request_refresh":
-            posts = await self._fetch_initial_posts()
-            await self.send_json(
-                {
-                    "type": "feed.snapshot",
-                    "scope": self.scope_name,
-                    "posts": posts,
-                }
+        message_type = content.get("type")
+        if message_type == "feed.request_refresh":
+            await self._send_sync_frame("feed.snapshot", content.get("since"))
+        elif message_type == "feed.ack":
+            self._acknowledge(content.get("received"))
+        elif message_type == "counters.subscribe":
+            posts = content.get("posts")
+            if not isinstance(posts, list):
+                return
+            # Keep the client's order (its on-screen posts first) when truncating.
+            requested = dict.fromkeys(
+                post_id for post_id in posts if isinstance(post_id, int) and post_id > 0
             )
+            post_ids = list(requested)[: settings.FEED_COUNTER_MAX_SUBSCRIPTIONS]
+            await self._subscribe_counters(await self._visible_post_ids(post_ids))
 
     async def feed_broadcast(self, event: dict[str, Any]):
-        await self.send_json(
+        frame = event.get("frame")
+        if frame is None:
+            frame = feed_update_frame(
+                self.scope_name, event.get("event"), event.get("payload"), event.get("cursor")
+            )
+
+        if self.batch is None:
+            # Pre-encoded by the producer once per group; forward the text untouched.
+            if await self._enqueue(frame):
+                self._advance_cursor(event.get("cursor"))
+            return
+
+        payload = event.get("payload") or {}
+        self._batch_cursor = event.get("cursor") or self._batch_cursor
+        if self.batch.add(payload.get("id"), frame):
+            await self._flush_batch()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+    async def post_counters(self, event: dict[str, Any]):
+        await self._enqueue(event["frame"])
+
+    async def server_drain(self, event: dict[str, Any]):
+        # Every socket of the process receives this; only the first one starts the drain.
+        feed_drain.start(event.get("window"))
+
+    def schedule_drain(self, delay: float):
+        """Send ``server.draining`` and close this socket after ``delay`` seconds."""
+
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain_after(delay))
+
+    async def _drain_after(self, delay: float):
+        await asyncio.sleep(delay)
+        if self._evicted:
+            return
+        if self.batch is not None:
+            await self._flush_batch()
+        frame = encode_frame(
             {
-                "type": "feed.update",
+                "type": "server.draining",
                 "scope": self.scope_name,
-                "event": event.get("event"),
-                "post": event.get("payload"),
+                "cursor": None if self._cursor_lost else self.cursor,
+                "reconnect_after_ms": reconnect_delay_ms(),
             }
         )
+        await self._enqueue(frame, droppable=False)
+        if self._evicted:
+            return
+        # The writer exits once the queue is empty; updates arriving from now on are
+        # left for the replay log.
+        self._draining = True
+        await asyncio.wait({self._writer_task}, timeout=settings.FEED_DRAIN_FLUSH_TIMEOUT)
+        metrics.drained_sockets.inc()
+        await self.close(code=DRAIN_CLOSE_CODE)
 
-    @database_sync_to_async
-    def _resolve_user(self, token_key: str) -> User | None:
-        try:
-            token = Token.objects.select_related("user").get(key=token_key)
-        except Token.DoesNotExist:
+    async def _subscribe_counters(self, post_ids: frozenset[int]):
+        for post_id in self.counter_posts - post_ids:
+            await self._leave(post_counters_group(post_id), "post_counters")
+        for post_id in post_ids - self.counter_posts:
+            await self._join(post_counters_group(post_id), "post_counters")
+        self.counter_posts = post_ids
+
+    async def _join(self, group: str, kind: str):
+        await self.channel_layer.group_add(group, self.channel_name)
+        metrics.group_membership.joined(group, kind)
+
+    async def _leave(self, group: str, kind: str):
+        await self.channel_layer.group_discard(group, self.channel_name)
+        metrics.group_membership.left(group, kind)
+
+    def _configure_batching(self, params: dict[str, list[str]]):
+        window_ms = _int_param(
+            params,
+            "batch_window",
+            settings.FEED_BATCH_WINDOW_MS,
+            MIN_BATCH_WINDOW_MS,
+            MAX_BATCH_WINDOW_MS,
+        )
+        size = _int_param(
+            params,
+            "batch_size",
+            settings.FEED_BATCH_MAX_SIZE,
+            1,
+            settings.FEED_BATCH_MAX_SIZE,
+        )
+        self.batch_window = window_ms / 1000
+        self.batch = FrameBatch(self.scope_name, size)
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        await self._flush_batch()
+
+    async def _flush_batch(self):
+        if self._flush_task and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        frame = self.batch.drain()
+        if frame is not None and await self._enqueue(frame):
+            self._advance_cursor(self._batch_cursor)
+
+    def _start_writer(self):
+        self.outbox = OutboundQueue(
+            settings.FEED_OUTBOUND_QUEUE_SIZE,
+            encode_frame({"type": "feed.resync", "scope": self.scope_name}),
+        )
+        self._outbox_ready = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._write_outbox())
+
+    async def _enqueue(self, frame: str, droppable: bool = True) -> bool:
+        """Queue ``frame`` for the writer, enforcing the slow-consumer policy.
+
+        Returns whether the frame was queued.
+        """
+
+        if self._evicted or self._draining:
+            return False
+
+        depth = len(self.outbox)
+        status = self.outbox.put(frame, droppable)
+        metrics.outbound_queue_depth.inc(len(self.outbox) - depth)
+        if status == DROPPED:
+            metrics.outbound_dropped_frames.inc()
+        elif status == OVERFLOW:
+            # The client will miss updates until it resyncs, so no cursor is safe to hand out.
+            self._cursor_lost = True
+            metrics.outbound_overflows.inc()
+            metrics.outbound_dropped_frames.inc(depth + 2 - len(self.outbox))
+
+        if (
+            self.outbox.overflows >= settings.FEED_SLOW_CONSUMER_MAX_OVERFLOWS
+            or self.outbox.oldest_age() > settings.FEED_SLOW_CONSUMER_TIMEOUT
+        ):
+            await self._evict()
+            return False
+        self._outbox_ready.set()
+        return status == QUEUED
+
+    @property
+    def _unacked(self) -> int:
+        return self._frames_written - self._frames_acked if self.ack_window else 0
+
+    def _acknowledge(self, received: Any):
+        if not self.ack_window or not isinstance(received, int):
+            return
+        received = min(received, self._frames_written)
+        if received > self._frames_acked:
+            metrics.outbound_unacked_frames.dec(received - self._frames_acked)
+            self._frames_acked = received
+            self._outbox_ready.set()
+
+    def _advance_cursor(self, cursor: str | None):
+        if cursor is not None and not self._cursor_lost:
+            self.cursor = cursor
+
+    async def _write_outbox(self):
+        while True:
+            if not self.outbox or (self.ack_window and self._unacked >= self.ack_window):
+                if self._draining and not self.outbox:
+                    return
+                # Woken by new frames and by acks that reopen the window.
+                self._outbox_ready.clear()
+                await self._outbox_ready.wait()
+                continue
+            frame = self.outbox.pop()
+            metrics.outbound_queue_depth.dec()
+            try:
+                if self.encoding == JSON:
+                    await self.send(text_data=frame)
+                else:
+                    await self.send(bytes_data=transcode(frame, self.encoding))
+            except Exception:
+                metrics.send_failures.inc()
+                raise
+            metrics.frames_sent.inc(type=frame_type_of(frame))
+            if self.ack_window:
+                self._frames_written += 1
+                metrics.outbound_unacked_frames.inc()
+
+    async def _evict(self):
+        self._evicted = True
+        metrics.slow_consumer_evictions.inc()
+        if self._writer_task and self._writer_task is not asyncio.current_task():
+            self._writer_task.cancel()
+        await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+
+    @property
+    def _replay_scope(self) -> str:
+        return "following" if self.scope_name == "following" and self.user else "for_you"
+
+    async def _send_sync_frame(self, frame_type: str, since: str | None):
+        started = time.perf_counter()
+        synced = await self._delta_frame(str(since)) if since else None
+        frames, kind = [synced], "delta"
+        if synced is None:
+            frames, kind = await self._snapshot_frames(frame_type), "snapshot"
+        metrics.sync_frame_seconds.observe(time.perf_counter() - started, kind=kind)
+        for frame, cursor in frames:
+            if not await self._enqueue(frame, droppable=False):
+                return
+            self.cursor, self._cursor_lost = cursor, False
+
+    async def _delta_frame(self, since: str) -> tuple[str, str] | None:
+        entries = await sync_to_async(get_replay_log().since)(self._replay_scope, since)
+        if entries is None:
             return None
-        user = token.user
-        return user if user.is_active and not user.is_deleted else None
+        if not entries:
+            return delta_frame(self.scope_name, since, []), since
+
+        if self._replay_scope == "following":
+            author_ids = await self._fetch_following_ids()
+            data = [entry.data for entry in entries if entry.author_id in author_ids]
+        else:
+            data = [entry.data for entry in entries]
+        return delta_frame(self.scope_name, entries[-1].cursor, data), entries[-1].cursor
+
+    async def _snapshot_frames(self, frame_type: str) -> list[tuple[str, str | None]]:
+        if self._replay_scope == "following":
+            key = f"following:{self.user.pk}"
+        else:
+            key = "for_you"
+        body_json = await feed_snapshots.get(key, self._load_snapshot)
+        cursor = snapshot_cursor(body_json)
+        # A shared snapshot can be up to FEED_SNAPSHOT_TTL old: the events published
+        # since it was taken follow it as a delta, before any live frame.
+        if cursor is None:
+            catch_up = None
+            stale = await sync_to_async(get_replay_log().latest)(self._replay_scope) is not None
+        else:
+            catch_up = await self._delta_frame(cursor)
+            stale = catch_up is None
+        if stale:
+            # The gap cannot be replayed from the log; take a fresh snapshot instead.
+            body_json = await self._load_snapshot()
+            cursor, catch_up = snapshot_cursor(body_json), None
+        frames = [(snapshot_frame(frame_type, self.scope_name, body_json), cursor)]
+        if catch_up is not None and catch_up[1] != cursor:
+            frames.append(catch_up)
+        return frames
+
+    async def _load_snapshot(self) -> str:
+        # Read the cursor first, so events racing with the query are in the catch-up delta.
+        cursor = await sync_to_async(get_replay_log().latest)(self._replay_scope)
+        posts = await self._fetch_initial_posts()
+        return encode_frame({"cursor": cursor, "posts": posts})
+
+    @database_sync_to_async
+    def _visible_post_ids(self, post_ids: list[int]) -> frozenset[int]:
+        """Return the subset of ``post_ids`` this socket's user may see."""
+
+        visible = Q(visibility="public")
+        if self.user:
+            visible |= Q(author_id=self.user.pk) | Q(
+                author_id__in=self.user.following.values("id")
+            )
+        return frozenset(
+            Post.objects.filter(visible, pk__in=post_ids, deleted_at__isnull=True).values_list(
+                "pk", flat=True
+            )
+        )
+
+    @database_sync_to_async
+    def _fetch_following_ids(self) -> set[int]:
+        return set(self.user.following.values_list("id", flat=True))
 
     @database_sync_to_async
     def _fetch_initial_posts(self) -> list[dict[str, Any]]:
@@ -0,0 +1,99 @@
+"""Graceful drain of feed sockets before a process restarts.
+
+Restarting a process drops all of its sockets together, and every client would
+reconnect at the same moment. Once a drain starts, the process stops accepting new
+sockets and walks its open sockets in random order spread over a window. Each one
+gets a ``server.draining`` frame with a resume cursor and a randomised
+``reconnect_after_ms``, and is then closed with ``DRAIN_CLOSE_CODE``.
+
+Deployments trigger a drain by sending ``FEED_DRAIN_SIGNAL`` to the process or by
+running ``manage.py drain_feed``, which reaches the sockets of one server name
+through the channel layer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import signal
+import weakref
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from .consumers import FeedConsumer
+
+logger = logging.getLogger(__name__)
+
+# RFC 6455 "Service Restart": the client may reconnect, preferably to another server.
+DRAIN_CLOSE_CODE = 1012
+SERVER_GROUP_PREFIX = "feed_server_"
+
+
+def server_group(name: str) -> str:
+    """Return the group joined by every feed socket served under ``name``."""
+
+    return f"{SERVER_GROUP_PREFIX}{name}"
+
+
+def reconnect_delay_ms() -> int:
+    """Random delay a drained client waits after the close before reconnecting."""
+
+    return int(random.uniform(0, settings.FEED_DRAIN_RECONNECT_JITTER) * 1000)
+
+
+class FeedDrain:
+    """Tracks the feed sockets of this process and closes them gradually on drain."""
+
+    def __init__(self):
+        self.active = False
+        self._consumers: weakref.WeakSet[FeedConsumer] = weakref.WeakSet()
+        self._signal_loop: asyncio.AbstractEventLoop | None = None
+
+    def register(self, consumer: FeedConsumer):
+        self._consumers.add(consumer)
+        self._install_signal_handler()
+
+    def unregister(self, consumer: FeedConsumer):
+        self._consumers.discard(consumer)
+
+    def start(self, window: float | None = None) -> int:
+        """Begin draining; return how many sockets were scheduled (0 if already draining).
+
+        Must run on the event loop that serves the sockets.
+        """
+
+        if self.active:
+            return 0
+        self.active = True
+        if window is None:
+            window = settings.FEED_DRAIN_WINDOW
+
+        consumers = list(self._consumers)
+        random.shuffle(consumers)
+        for index, consumer in enumerate(consumers):
+            # One random point per equal slice keeps closes evenly spread over the window.
+            consumer.schedule_drain(window * (index + random.random()) / len(consumers))
+        logger.info("Draining %d feed sockets over %.1fs", len(consumers), window)
+        return len(consumers)
+
+    def reset(self):
+        self.active = False
+        self._consumers = weakref.WeakSet()
+
+    def _install_signal_handler(self):
+        name = settings.FEED_DRAIN_SIGNAL
+        loop = asyncio.get_running_loop()
+        if not name or self._signal_loop is loop:
+            return
+        self._signal_loop = loop
+        try:
+            loop.add_signal_handler(getattr(signal, name), self.start)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            # Unknown signal, non-Unix platform or a loop outside the main thread.
+            logger.warning("Feed drain signal %s is not available in this process", name)
+
+
+feed_drain = FeedDrain()
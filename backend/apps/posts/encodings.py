@@ -0,0 +1,89 @@
+"""Negotiable wire encodings for feed WebSocket frames.
+
+Frames are always built as compact JSON text. Sockets that negotiated another
+encoding get that text transcoded right before it is written:
+
+``json``
+    Text frames, the default.
+``msgpack``
+    Binary MessagePack frames carrying the same structure.
+``deflate``
+    Binary frames holding the JSON text compressed as raw DEFLATE (``wbits=-15``) with
+    ``DEFLATE_DICTIONARY`` preset, one independent stream per message. Clients fetch
+    the dictionary from ``GET /api/posts/feed-dictionary/`` and inflate with it.
+
+Broadcasts deliver the same frame to many sockets of a process, so transcoded
+frames are memoised by their text.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+from functools import lru_cache
+
+import msgpack
+
+JSON = "json"
+MSGPACK = "msgpack"
+DEFLATE = "deflate"
+ENCODINGS = (JSON, MSGPACK, DEFLATE)
+SUBPROTOCOL_PREFIX = "ourvoice."
+
+DEFLATE_DICTIONARY_VERSION = 1
+# Strings repeated across feed frames; the most frequent ones come last because
+# DEFLATE prefers the closest match in the preset window.
+DEFLATE_DICTIONARY = (
+    b'"post.archived""post.deleted""feed.resync""feed.batch","updates":['
+    b'{"type":"feed.delta","scope":"following","cursor":"events":['
+    b'{"type":"feed.snapshot","scope":"for_you","cursor":"posts":['
+    b'{"type":"feed.initial","scope":"for_you","cursor":"posts":['
+    b'"visibility":"followers","image":"/media/posts/images/'
+    b'"avatar":"/media/avatars/"display_name":"'
+    b'{"type":"feed.update","scope":"for_you","event":"post.created","post":'
+    b'{"id":,"author":{"id":,"handle":"","display_name":"","avatar":null},"text":"'
+    b'","image":null,"visibility":"public","in_reply_to":null,"quoted_post":null,'
+    b'"is_archived":false,"archived_at":null,"deleted_at":null,"created_at":"'
+    b'T00:00:00.000000Z","updated_at":"T00:00:00.000000Z"},"cursor":"'
+)
+
+
+def negotiate(requested: str | None, subprotocols: list[str]) -> tuple[str, str | None]:
+    """Pick the socket encoding from a query parameter or offered subprotocols.
+
+    Returns the encoding and the subprotocol to echo on accept, if one was used.
+    """
+
+    if requested and requested.lower() in ENCODINGS:
+        return requested.lower(), None
+
+    for subprotocol in subprotocols:
+        if subprotocol.startswith(SUBPROTOCOL_PREFIX):
+            encoding = subprotocol[len(SUBPROTOCOL_PREFIX) :]
+            if encoding in ENCODINGS:
+                return encoding, subprotocol
+    return JSON, None
+
+
+def encode_msgpack(frame: str) -> bytes:
+    return msgpack.packb(json.loads(frame), use_bin_type=True)
+
+
+def encode_deflate(frame: str) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15, zdict=DEFLATE_DICTIONARY)
+    return compressor.compress(frame.encode()) + compressor.flush()
+
+
+def decode_deflate(data: bytes) -> str:
+    decompressor = zlib.decompressobj(-15, zdict=DEFLATE_DICTIONARY)
+    return (decompressor.decompress(data) + decompressor.flush()).decode()
+
+
+_ENCODERS = {MSGPACK: encode_msgpack, DEFLATE: encode_deflate}
+
+
+@lru_cache(maxsize=256)
+def transcode(frame: str, encoding: str) -> bytes:
+    """Return ``frame`` in a binary ``encoding``, memoised for repeated broadcasts."""
+
+    return _ENCODERS[encoding](frame)
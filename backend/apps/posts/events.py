@@ -0,0 +1,18 @@
+"""Interaction event consumer that keeps reply debate scores current."""
+
+from __future__ import annotations
+
+from apps.interactions.events import EventConsumer, Kind
+from apps.interactions.models import InteractionEvent
+
+from .ranking import rescore
+
+
+class DebateRanking(EventConsumer):
+    """Rescores posts whose likes or replies changed, once per post per batch."""
+
+    name = "debate_ranking"
+    kinds = frozenset({Kind.LIKE, Kind.REPLY})
+
+    def handle(self, events: list[InteractionEvent]):
+        rescore(event.subject_id for event in events)
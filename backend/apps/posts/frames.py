@@ -0,0 +1,138 @@
+"""Helpers for building realtime feed frames that are encoded once per broadcast."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from rest_framework.utils.encoders import JSONEncoder
+
+FOR_YOU_GROUP = "feed_for_you"
+FOLLOWING_GROUP_PREFIX = "feed_following_"
+
+_DECODER = json.JSONDecoder()
+
+
+def following_group(user_id: int) -> str:
+    """Return the group name that carries the following feed of ``user_id``."""
+
+    return f"{FOLLOWING_GROUP_PREFIX}{user_id}"
+
+
+def post_counters_group(post_id: int) -> str:
+    """Return the group of sockets watching the engagement counters of ``post_id``."""
+
+    return f"post_counters_{post_id}"
+
+
+def frame_type_of(frame: str) -> str:
+    """Return the ``type`` of an encoded frame, which every frame carries as its first key."""
+
+    return frame[9 : frame.index('"', 9)] if frame.startswith('{"type":"') else "unknown"
+
+
+def encode_frame(frame: Any) -> str:
+    """Encode a frame (or a fragment of one) as compact JSON text."""
+
+    return json.dumps(frame, cls=JSONEncoder, separators=(",", ":"), ensure_ascii=False)
+
+
+def feed_update_frame(
+    scope_name: str, event: str, payload: dict[str, Any], cursor: str | None = None
+) -> str:
+    """Return the pre-encoded ``feed.update`` frame delivered to every socket of a scope."""
+
+    return encode_frame(
+        {
+            "type": "feed.update",
+            "scope": scope_name,
+            "event": event,
+            "post": payload,
+            "cursor": cursor,
+        }
+    )
+
+
+def replay_entry(event: str, payload: dict[str, Any]) -> str:
+    """Encode the scope-independent part of an event as stored in the replay log."""
+
+    return encode_frame({"event": event, "post": payload})
+
+
+def snapshot_frame(frame_type: str, scope_name: str, body_json: str) -> str:
+    """Merge an encoded snapshot body into a ``feed.initial``/``feed.snapshot`` frame.
+
+    ``body_json`` is an encoded object (``{"cursor": ..., "posts": [...]}``) that is
+    shared between sockets, so it is spliced in as text rather than re-encoded.
+    """
+
+    header = encode_frame({"type": frame_type, "scope": scope_name})
+    return f"{header[:-1]},{body_json[1:]}"
+
+
+def snapshot_cursor(body_json: str) -> str | None:
+    """Read the cursor of an encoded snapshot body without decoding its posts."""
+
+    return _DECODER.raw_decode(body_json, len('{"cursor":'))[0]
+
+
+def delta_frame(scope_name: str, cursor: str, entries: list[str]) -> str:
+    """Join encoded replay entries into the ``feed.delta`` frame sent on resume."""
+
+    header = encode_frame({"type": "feed.delta", "scope": scope_name, "cursor": cursor})
+    return f'{header[:-1]},"events":[{",".join(entries)}]}}'
+
+
+def feed_broadcast_message(
+    scope_name: str, event: str, payload: dict[str, Any], cursor: str | None = None
+) -> dict[str, Any]:
+    """Build the channel-layer message for a feed broadcast.
+
+    ``frame`` holds the encoded text so consumers can forward it without touching
+    the payload; ``payload`` is kept for consumers that need the structured post.
+    """
+
+    return {
+        "type": "feed.broadcast",
+        "event": event,
+        "payload": payload,
+        "cursor": cursor,
+        "frame": feed_update_frame(scope_name, event, payload, cursor),
+    }
+
+
+class FrameBatch:
+    """Collects encoded ``feed.update`` frames of one connection until they are flushed.
+
+    Updates are keyed by post so repeated events for the same post collapse into the
+    most recent one. Flushing joins the already-encoded frames into a single
+    ``feed.batch`` frame without decoding them.
+    """
+
+    def __init__(self, scope_name: str, max_size: int):
+        self.scope_name = scope_name
+        self.max_size = max_size
+        self._frames: dict[Any, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def add(self, key: Any, frame: str) -> bool:
+        """Buffer ``frame`` under ``key`` and return ``True`` once the batch is full."""
+
+        if key is None:
+            key = object()
+        # Re-inserting moves the post to the end so the batch keeps arrival order.
+        self._frames.pop(key, None)
+        self._frames[key] = frame
+        return len(self._frames) >= self.max_size
+
+    def drain(self) -> str | None:
+        """Return the encoded ``feed.batch`` frame and reset the buffer."""
+
+        if not self._frames:
+            return None
+        updates = ",".join(self._frames.values())
+        self._frames = {}
+        scope = json.dumps(self.scope_name)
+        return f'{{"type":"feed.batch","scope":{scope},"updates":[{updates}]}}'
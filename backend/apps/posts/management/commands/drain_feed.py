@@ -0,0 +1,34 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.posts.drain import server_group
+
+
+class Command(BaseCommand):
+    help = "Gracefully drain the feed sockets of a server before it restarts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            default=settings.FEED_SERVER_NAME,
+            help="FEED_SERVER_NAME of the processes to drain (default: this host).",
+        )
+        parser.add_argument(
+            "--window",
+            type=float,
+            default=settings.FEED_DRAIN_WINDOW,
+            help="Seconds over which the sockets are closed.",
+        )
+
+    def handle(self, *args, **options):
+        async_to_sync(get_channel_layer().group_send)(
+            server_group(options["server"]),
+            {"type": "server.drain", "window": options["window"]},
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Drain requested for {options['server']} over {options['window']:g}s."
+            )
+        )
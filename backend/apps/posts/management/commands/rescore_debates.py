@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.models import Post
+from apps.posts.ranking import rescore
+
+
+class Command(BaseCommand):
+    help = "Recompute the debate score of every reply post in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Posts rescored per batch.",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help="Resume from this post id.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = options["start"] - 1
+        rescored = 0
+        while True:
+            post_ids = list(
+                Post.objects.filter(pk__gt=last_id, in_reply_to__isnull=False)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not post_ids:
+                break
+            rescored += rescore(post_ids)
+            last_id = post_ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Rescored {rescored} posts."))
@@ -0,0 +1,279 @@
+"""In-process metrics for the realtime feed layer.
+
+Every process keeps its own values; ``render`` exposes them in the Prometheus text
+format through ``GET /metrics/`` (see ``apps.posts.metrics_views.metrics_view``).
+Scrape each daphne process separately, since sockets and groups live in the process
+serving them.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+LabelKey = tuple[tuple[str, Any], ...]
+
+
+class Metric:
+    """Base class for labelled, thread-safe metrics kept in process memory."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: dict[LabelKey, float] = {}
+        REGISTRY.append(self)
+
+    @staticmethod
+    def _key(labels: dict[str, Any]) -> LabelKey:
+        return tuple(sorted(labels.items()))
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[tuple[dict[str, Any], float]]:
+        with self._lock:
+            return [(dict(key), value) for key, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def expose(self) -> list[str]:
+        """Return the sample lines of this metric in the Prometheus text format."""
+
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+            for labels, value in self.samples()
+        ]
+
+
+class Counter(Metric):
+    """Monotonically increasing count of events."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, such as queued frames."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram(Metric):
+    """Distribution of observed values, such as latencies, in cumulative buckets.
+
+    ``value`` returns the number of observations for the given labels.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0) + value
+            self._values[key] = self._values.get(key, 0) + 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock seconds spent in the ``with`` block."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._counts.clear()
+            self._sums.clear()
+
+    def expose(self) -> list[str]:
+        with self._lock:
+            series = [
+                (dict(key), list(counts), self._sums[key]) for key, counts in self._counts.items()
+            ]
+        lines = []
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class GroupMembership:
+    """Member counts of the channel-layer groups joined by sockets of this process.
+
+    Only totals per group kind are exported, because per-user groups would give the
+    metric one series per user; ``largest`` answers ad-hoc questions in a shell.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members: dict[str, int] = {}
+
+    def joined(self, group: str, kind: str):
+        with self._lock:
+            members = self._members.get(group, 0)
+            self._members[group] = members + 1
+        group_subscribers.inc(kind=kind)
+        if not members:
+            groups.inc(kind=kind)
+
+    def left(self, group: str, kind: str):
+        with self._lock:
+            members = self._members.get(group, 0)
+            if not members:
+                return
+            if members == 1:
+                del self._members[group]
+            else:
+                self._members[group] = members - 1
+        group_subscribers.dec(kind=kind)
+        if members == 1:
+            groups.dec(kind=kind)
+
+    def members(self, group: str) -> int:
+        return self._members.get(group, 0)
+
+    def largest(self, count: int = 10) -> list[tuple[str, int]]:
+        with self._lock:
+            return sorted(self._members.items(), key=lambda item: -item[1])[:count]
+
+    def reset(self):
+        with self._lock:
+            self._members.clear()
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in sorted(labels.items()))
+    return f"{{{pairs}}}"
+
+
+def render() -> str:
+    """Return every registered metric in the Prometheus text exposition format."""
+
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY: list[Metric] = []
+
+outbound_queue_depth = Gauge(
+    "feed_outbound_queue_depth", "Frames waiting in per-connection outbound queues."
+)
+outbound_unacked_frames = Gauge(
+    "feed_outbound_unacked_frames",
+    "Frames written to acknowledging sockets that their clients have not acknowledged yet.",
+)
+outbound_overflows = Counter(
+    "feed_outbound_overflows_total", "Outbound queue overflows collapsed into a resync marker."
+)
+outbound_dropped_frames = Counter(
+    "feed_outbound_dropped_frames_total", "Update frames dropped because a resync was pending."
+)
+slow_consumer_evictions = Counter(
+    "feed_slow_consumer_evictions_total", "Sockets closed because they could not keep up."
+)
+drained_sockets = Counter(
+    "feed_drained_sockets_total", "Sockets closed gracefully while the process was draining."
+)
+open_connections = Gauge("feed_open_connections", "Feed sockets currently open, by scope.")
+connections = Counter("feed_connections_total", "Feed sockets accepted, by scope.")
+disconnections = Counter("feed_disconnections_total", "Feed sockets closed, by scope.")
+rejected_connections = Counter(
+    "feed_rejected_connections_total", "Feed socket handshakes refused, by reason."
+)
+group_subscribers = Gauge(
+    "feed_group_subscribers", "Group memberships held by sockets of this process, by group kind."
+)
+groups = Gauge("feed_groups", "Distinct groups with members in this process, by group kind.")
+sync_frame_seconds = Histogram(
+    "feed_sync_frame_seconds",
+    "Time to build an initial/refresh frame, by kind (snapshot or delta).",
+)
+frames_sent = Counter("feed_frames_sent_total", "Frames written to feed sockets, by frame type.")
+send_failures = Counter("feed_send_failures_total", "Frames that could not be written to a socket.")
+group_send_seconds = Histogram(
+    "feed_group_send_seconds", "Duration of channel-layer group_send calls, by event."
+)
+group_send_failures = Counter(
+    "feed_group_send_failures_total", "group_send calls that raised, by event; the message is lost."
+)
+realtime_breaker_open = Gauge(
+    "feed_realtime_breaker_open",
+    "1 while a realtime circuit breaker skips Redis calls, by circuit.",
+)
+realtime_calls_skipped = Counter(
+    "feed_realtime_calls_skipped_total",
+    "Broadcasts and replay appends skipped by an open breaker or the fan-out budget.",
+)
+interaction_events_consumed = Counter(
+    "feed_interaction_events_consumed_total", "Interaction events read, by consumer group."
+)
+requests_throttled = Counter(
+    "feed_requests_throttled_total", "API requests rejected by a token bucket, by endpoint family."
+)
+counter_deltas_flushed = Counter(
+    "feed_counter_deltas_flushed_total",
+    "Buffered counter changes written to the database, by counter column.",
+)
+
+group_membership = GroupMembership()
@@ -0,0 +1,22 @@
+"""Prometheus endpoint for the realtime metrics of this process."""
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics
+
+
+def metrics_view(request):
+    """Expose the realtime metrics of this process in the Prometheus text format.
+
+    When ``METRICS_TOKEN`` is set, scrapers must send it as a bearer token.
+    """
+
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
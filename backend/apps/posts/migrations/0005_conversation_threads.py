@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+SEGMENT_WIDTH = 12
+MAX_DEPTH = 100
+BATCH_SIZE = 1000
+
+
+def place_existing_posts(apps, schema_editor):
+    """Fill the thread fields one tree level at a time, roots first."""
+
+    Post = apps.get_model("posts", "Post")
+    pending = Post.objects.filter(conversation_id__isnull=True)
+
+    def place(rows):
+        for start in range(0, len(rows), BATCH_SIZE):
+            Post.objects.bulk_update(
+                rows[start : start + BATCH_SIZE], ["conversation_id", "thread_path", "depth"]
+            )
+
+    roots = list(pending.filter(in_reply_to__isnull=True).only("pk"))
+    for post in roots:
+        post.conversation_id, post.thread_path, post.depth = post.pk, str(post.pk).zfill(SEGMENT_WIDTH), 0
+    place(roots)
+    while True:
+        rows = list(
+            pending.filter(in_reply_to__conversation_id__isnull=False)
+            .exclude(in_reply_to=models.F("pk"))
+            .select_related("in_reply_to")
+            .only(
+                "pk",
+                "in_reply_to",
+                "in_reply_to__conversation_id",
+                "in_reply_to__thread_path",
+                "in_reply_to__depth",
+            )
+        )
+        if not rows:
+            break
+        for post in rows:
+            parent = post.in_reply_to
+            path, depth = parent.thread_path, parent.depth + 1
+            if parent.depth >= MAX_DEPTH:
+                path, depth = path[:-SEGMENT_WIDTH], parent.depth
+            post.conversation_id = parent.conversation_id
+            post.thread_path = path + str(post.pk).zfill(SEGMENT_WIDTH)
+            post.depth = depth
+        place(rows)
+    # Posts replying to themselves or to a cycle start their own conversation.
+    rest = list(pending.only("pk"))
+    for post in rest:
+        post.conversation_id, post.thread_path, post.depth = post.pk, str(post.pk).zfill(SEGMENT_WIDTH), 0
+    place(rest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_view_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='conversation_id',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thread_path',
+            field=models.CharField(blank=True, editable=False, max_length=1212),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['conversation_id', 'thread_path'], name='post_thread_idx'),
+        ),
+        migrations.RunPython(place_existing_posts, migrations.RunPython.noop),
+    ]
@@ -3,15 +3,37 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
+# Width of one post id in ``Post.thread_path``; fixed so paths sort like the tree.
+THREAD_SEGMENT_WIDTH = 12
+# Replies nested deeper than this join the thread at this depth, beside their parent.
+THREAD_MAX_DEPTH = 100
+
+
+def thread_segment(post_id: int) -> str:
+    return str(post_id).zfill(THREAD_SEGMENT_WIDTH)
+
+
+def subtree_end(path: str) -> str:
+    """Smallest path sorting after every path that starts with ``path``."""
+
+    # Paths are digits only; digits sort before letters in every collation.
+    return f"{path}a"
+
 
 class Post(models.Model):
     """Represents a single public message in the network."""
 
+    COUNTER_FIELDS = frozenset(
+        ("like_count", "repost_count", "reply_count", "vote_count", "view_count")
+    )
+    # Columns maintained by set-wise updates, which save() must not write back.
+    DERIVED_FIELDS = COUNTER_FIELDS | {"debate_score"}
+
     VISIBILITY_CHOICES = (
         ("public", "Public"),
         ("followers", "Followers only"),
@@ -35,6 +57,23 @@ class Post(models.Model):
         null=True,
         blank=True,
     )
+    # Maintained by apps.interactions.counters on every interaction insert and delete,
+    # and never written by save() on an existing post (see COUNTER_FIELDS).
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    repost_count = models.PositiveIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+    vote_count = models.PositiveIntegerField(default=0, editable=False)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    # Conversation tree: the root post id, and the ids from the root down to this post,
+    # so a whole (sub)thread is one ordered range of the (conversation_id, thread_path)
+    # index. Set on insert from ``in_reply_to``.
+    conversation_id = models.PositiveBigIntegerField(null=True, editable=False)
+    thread_path = models.CharField(
+        max_length=THREAD_SEGMENT_WIDTH * (THREAD_MAX_DEPTH + 1), blank=True, editable=False
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Rank among the replies to the same post; see apps.posts.ranking.
+    debate_score = models.FloatField(default=0, editable=False)
     is_archived = models.BooleanField(default=False)
     archived_at = models.DateTimeField(blank=True, null=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
@@ -46,11 +85,83 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=("-created_at",)),
             models.Index(fields=("author", "-created_at")),
+            models.Index(fields=("conversation_id", "thread_path"), name="post_thread_idx"),
+            models.Index(fields=("in_reply_to", "-debate_score", "-id"), name="post_debate_idx"),
         ]
 
     def __str__(self) -> str:  # pragma: no cover - simple representation
         return f"Post {self.pk} by {self.author}"
 
+    def save(self, **kwargs):
+        if self._state.adding:
+            self._join_thread()
+            using = kwargs.get("using") or router.db_for_write(Post, instance=self)
+            # The thread path needs the new id: it is written right after the INSERT, in
+            # the same transaction and before post_save receivers see the post.
+            with transaction.atomic(using=using):
+                super().save(**kwargs)
+            return
+        if kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            # Writing back the counters loaded with this instance would undo F()
+            # increments that committed since.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(**kwargs)
+
+    def _join_thread(self):
+        """Take the conversation and depth of the parent, before the INSERT."""
+
+        parent = None
+        if self.in_reply_to_id:
+            parent = self._meta.get_field("in_reply_to").get_cached_value(self, None)
+            if parent is None or parent.conversation_id is None:
+                parent = (
+                    Post.objects.filter(pk=self.in_reply_to_id, conversation_id__isnull=False)
+                    .only("conversation_id", "thread_path", "depth")
+                    .first()
+                )
+        if parent is None:
+            self.conversation_id, self.depth, self._parent_path = None, 0, ""
+        elif parent.depth >= THREAD_MAX_DEPTH:
+            self.conversation_id, self.depth = parent.conversation_id, parent.depth
+            self._parent_path = parent.thread_path[:-THREAD_SEGMENT_WIDTH]
+        else:
+            self.conversation_id, self.depth = parent.conversation_id, parent.depth + 1
+            self._parent_path = parent.thread_path
+
+    def _save_table(
+        self,
+        raw=False,
+        cls=None,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        updated = super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+        if not updated and not raw and hasattr(self, "_parent_path"):
+            self._place_in_thread(using)
+        return updated
+
+    def _place_in_thread(self, using):
+        """Write the path and first debate score, which need the new row's id and time."""
+
+        from .ranking import debate_score
+
+        if self.conversation_id is None:
+            self.conversation_id = self.pk
+        self.thread_path = self._parent_path + thread_segment(self.pk)
+        del self._parent_path
+        self.debate_score = debate_score(0, 0, self.author.reputation_score, self.created_at)
+        Post.objects.using(using).filter(pk=self.pk).update(
+            conversation_id=self.conversation_id,
+            thread_path=self.thread_path,
+            debate_score=self.debate_score,
+        )
+
     def archive(self):
         """Archive the post for transparency once community threshold is met."""
 
@@ -0,0 +1,62 @@
+"""Bounded outbound queue used by ``FeedConsumer`` to apply backpressure per socket."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+
+QUEUED = "queued"
+DROPPED = "dropped"
+OVERFLOW = "overflow"
+
+
+class OutboundQueue:
+    """Frames waiting to be written to one socket.
+
+    Updates are droppable: when they no longer fit, every queued update is discarded
+    and replaced by a single ``resync`` marker, telling the client to catch up with a
+    cursor-based refresh instead. Control frames (snapshots, deltas, the marker) are
+    never dropped. ``overflows`` counts collapses since the queue was last empty.
+    """
+
+    def __init__(self, max_size: int, resync_frame: str):
+        self.max_size = max_size
+        self.resync_frame = resync_frame
+        self.overflows = 0
+        self._resync_pending = False
+        self._frames: deque[tuple[str, bool, float]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put(self, frame: str, droppable: bool = True) -> str:
+        """Queue ``frame`` and report whether it was ``QUEUED``, ``DROPPED`` or overflowed."""
+
+        if droppable and self._resync_pending:
+            # The pending resync already covers this update.
+            return DROPPED
+
+        if droppable and len(self._frames) >= self.max_size:
+            self._frames = deque(item for item in self._frames if not item[1])
+            self._frames.append((self.resync_frame, False, time.monotonic()))
+            self._resync_pending = True
+            self.overflows += 1
+            return OVERFLOW
+
+        self._frames.append((frame, droppable, time.monotonic()))
+        return QUEUED
+
+    def pop(self) -> str:
+        frame, _, _ = self._frames.popleft()
+        if frame is self.resync_frame:
+            self._resync_pending = False
+        if not self._frames:
+            self.overflows = 0
+        return frame
+
+    def oldest_age(self) -> float:
+        """Seconds the head of the queue has been waiting to be written."""
+
+        if not self._frames:
+            return 0.0
+        return time.monotonic() - self._frames[0][2]
@@ -8,3 +8,10 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return obj.author == request.user
+
+
+class IsAuthorOrStaff(permissions.BasePermission):
+    """Allow only the author, or staff, to see private details of a post."""
+
+    def has_object_permission(self, request, view, obj):
+        return obj.author == request.user or request.user.is_staff
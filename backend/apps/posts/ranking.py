@@ -0,0 +1,70 @@
+"""Debate ranking of replies, stored in ``Post.debate_score``.
+
+The most useful replies should rise in a discussion. A reply's weight is its likes,
+plus its own replies (``Reply`` comments and reply posts) at ``DEBATE_REPLY_WEIGHT``
+each, scaled up by its author's reputation, and it halves every
+``DEBATE_HALF_LIFE_HOURS``. The score stores the logarithm of that weight, in which
+the decay is just the creation time divided by the half-life:
+
+    log2(weight / 2 ** (age / half_life)) = log2(weight) + created / half_life - now / half_life
+
+``now / half_life`` is the same for every reply, so ordering by the stored score
+ranks replies by their decayed weight at any moment. Scores therefore only change
+when likes or replies arrive: the ``debate_ranking`` consumer of the interaction
+event log recomputes them, and ranked replies are a plain scan of ``post_debate_idx``.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import Post
+
+RESCORE_BATCH_SIZE = 500
+
+
+def debate_score(
+    likes: int, replies: int, reputation: Decimal | float, created_at: datetime
+) -> float:
+    """Return the score of a reply with these likes, replies and author reputation."""
+
+    weight = 1 + likes + settings.DEBATE_REPLY_WEIGHT * replies
+    boost = 1 + settings.DEBATE_REPUTATION_WEIGHT * math.log1p(max(float(reputation), 0))
+    hours = created_at.timestamp() / 3600
+    return math.log2(weight * boost) + hours / settings.DEBATE_HALF_LIFE_HOURS
+
+
+def rescore(post_ids: Iterable[int]) -> int:
+    """Recompute the debate score of ``post_ids``; return how many posts were updated."""
+
+    post_ids = sorted(set(post_ids))
+    updated = 0
+    for start in range(0, len(post_ids), RESCORE_BATCH_SIZE):
+        batch = post_ids[start : start + RESCORE_BATCH_SIZE]
+        posts = list(
+            Post.objects.filter(pk__in=batch)
+            .select_related("author")
+            .only("like_count", "reply_count", "created_at", "author", "author__reputation_score")
+        )
+        thread_replies = dict(
+            Post.objects.filter(in_reply_to__in=batch)
+            .order_by()
+            .values("in_reply_to")
+            .annotate(total=Count("pk"))
+            .values_list("in_reply_to", "total")
+        )
+        for post in posts:
+            post.debate_score = debate_score(
+                post.like_count,
+                post.reply_count + thread_replies.get(post.pk, 0),
+                post.author.reputation_score,
+                post.created_at,
+            )
+        updated += Post.objects.bulk_update(posts, ["debate_score"])
+    return updated
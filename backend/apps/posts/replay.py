@@ -0,0 +1,147 @@
+"""Bounded per-scope replay logs backing resumable feed sessions.
+
+Every feed event is appended to the log of its scope before it is broadcast, and the
+returned cursor travels with the frame. A reconnecting client hands back the last
+cursor it saw and receives only what happened afterwards, as long as that cursor is
+still inside the retained window.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from config.redis_client import get_redis
+
+
+@dataclass(frozen=True)
+class ReplayEntry:
+    cursor: str
+    author_id: int
+    data: str
+
+
+class BaseReplayLog:
+    """Interface shared by replay log backends."""
+
+    def __init__(self, max_events: int):
+        self.max_events = max_events
+
+    def append(self, scope: str, author_id: int, data: str) -> str:
+        """Store an encoded event and return its cursor."""
+
+        raise NotImplementedError
+
+    def latest(self, scope: str) -> str | None:
+        """Return the cursor of the newest event of ``scope``."""
+
+        raise NotImplementedError
+
+    def since(self, scope: str, cursor: str) -> list[ReplayEntry] | None:
+        """Return the events after ``cursor``, or ``None`` when it fell out of the log."""
+
+        raise NotImplementedError
+
+
+class RedisReplayLog(BaseReplayLog):
+    """Replay log kept in one capped Redis Stream per scope."""
+
+    key_prefix = "feed:replay:"
+
+    @staticmethod
+    def _parse(cursor: str) -> tuple[int, int] | None:
+        millis, _, sequence = cursor.partition("-")
+        try:
+            return int(millis), int(sequence or 0)
+        except ValueError:
+            return None
+
+    def append(self, scope: str, author_id: int, data: str) -> str:
+        return get_redis().xadd(
+            f"{self.key_prefix}{scope}",
+            {"author": author_id, "data": data},
+            maxlen=self.max_events,
+            approximate=True,
+        )
+
+    def latest(self, scope: str) -> str | None:
+        entries = get_redis().xrevrange(f"{self.key_prefix}{scope}", count=1)
+        return entries[0][0] if entries else None
+
+    def since(self, scope: str, cursor: str) -> list[ReplayEntry] | None:
+        position = self._parse(cursor)
+        if position is None:
+            return None
+
+        key = f"{self.key_prefix}{scope}"
+        client = get_redis()
+        oldest = client.xrange(key, count=1)
+        # The cursor itself must still be retained, otherwise events may have been trimmed.
+        if not oldest or self._parse(oldest[0][0]) > position:
+            return None
+
+        return [
+            ReplayEntry(entry_id, int(fields["author"]), fields["data"])
+            for entry_id, fields in client.xrange(key, min=f"({cursor}")
+        ]
+
+
+class InMemoryReplayLog(BaseReplayLog):
+    """Process-local replay log, for tests and single-process development."""
+
+    def __init__(self, max_events: int):
+        super().__init__(max_events)
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._logs: dict[str, deque[tuple[int, ReplayEntry]]] = {}
+
+    def append(self, scope: str, author_id: int, data: str) -> str:
+        with self._lock:
+            position = next(self._counter)
+            entry = ReplayEntry(str(position), author_id, data)
+            log = self._logs.setdefault(scope, deque(maxlen=self.max_events))
+            log.append((position, entry))
+        return entry.cursor
+
+    def latest(self, scope: str) -> str | None:
+        log = self._logs.get(scope)
+        return log[-1][1].cursor if log else None
+
+    def since(self, scope: str, cursor: str) -> list[ReplayEntry] | None:
+        try:
+            position = int(cursor)
+        except ValueError:
+            return None
+
+        with self._lock:
+            log = list(self._logs.get(scope, ()))
+        if not log or log[0][0] > position:
+            return None
+        return [entry for entry_position, entry in log if entry_position > position]
+
+
+_replay_log: BaseReplayLog | None = None
+
+
+def get_replay_log() -> BaseReplayLog:
+    """Return the configured replay log backend."""
+
+    global _replay_log
+    if _replay_log is None:
+        backend = import_string(settings.FEED_REPLAY_BACKEND)
+        _replay_log = backend(settings.FEED_REPLAY_MAX_EVENTS)
+    return _replay_log
+
+
+@receiver(setting_changed)
+def _reset_replay_log(setting, **_):
+    global _replay_log
+    if setting.startswith("FEED_REPLAY_"):
+        _replay_log = None
@@ -3,6 +3,7 @@
 from rest_framework import serializers
 
 from apps.accounts.models import User
+from apps.interactions.write_behind import pending_deltas
 
 from .models import Post
 
@@ -14,6 +15,14 @@ class AuthorSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        posts = data.all() if hasattr(data, "all") else data
+        # One buffer lookup for the whole page instead of one per post.
+        self.child.context["pending_counters"] = pending_deltas(post.pk for post in posts)
+        return super().to_representation(posts)
+
+
 class PostSerializer(serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
     quoted_post = serializers.PrimaryKeyRelatedField(
@@ -33,6 +42,13 @@ class PostSerializer(serializers.ModelSerializer):
             "visibility",
             "in_reply_to",
             "quoted_post",
+            "conversation_id",
+            "depth",
+            "like_count",
+            "repost_count",
+            "reply_count",
+            "vote_count",
+            "view_count",
             "is_archived",
             "archived_at",
             "deleted_at",
@@ -42,12 +58,29 @@ class PostSerializer(serializers.ModelSerializer):
         read_only_fields = (
             "id",
             "author",
+            "conversation_id",
+            "depth",
+            "like_count",
+            "repost_count",
+            "reply_count",
+            "vote_count",
+            "view_count",
             "is_archived",
             "archived_at",
             "deleted_at",
             "created_at",
             "updated_at",
         )
+        list_serializer_class = PostListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        pending = self.context.get("pending_counters")
+        if pending is None:
+            pending = pending_deltas([instance.pk])
+        for field, delta in pending.get(instance.pk, {}).items():
+            data[field] = max(data[field] + delta, 0)
+        return data
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -55,3 +88,12 @@ class PostSerializer(serializers.ModelSerializer):
         if user is None or not user.is_authenticated:
             raise serializers.ValidationError("Authentication is required to create a post.")
         return Post.objects.create(author=user, **validated_data)
+
+
+class ThreadQuerySerializer(serializers.Serializer):
+    """Limits of a thread request: levels below the post and replies shown per post."""
+
+    depth = serializers.IntegerField(min_value=0, max_value=20, default=4)
+    breadth = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    # Show the replies of the post that come after this one (``more_replies``).
+    after = serializers.IntegerField(min_value=1, required=False)
@@ -2,49 +2,91 @@
 
 from __future__ import annotations
 
-from asgiref.sync import async_to_sync
+import time
+from functools import partial
+from typing import Any
+
 from channels.layers import get_channel_layer
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from apps.accounts.models import UserFollow
+
+from . import metrics
+from .broadcast import replay_breaker, send_to_group
+from .frames import FOR_YOU_GROUP, feed_broadcast_message, following_group, replay_entry
 from .models import Post
+from .replay import get_replay_log
 from .serializers import PostSerializer
 
 
-@receiver(post_save, sender=Post)
-def broadcast_new_post(sender, instance: Post, created: bool, **_):
-    """Broadcast newly created posts to relevant websocket groups."""
-
-    if not created:
-        return
+def publish_feed_event(post: Post, event: str, payload: dict[str, Any]):
+    """Record a feed event in the replay logs and broadcast it to the relevant groups.
 
-    if instance.is_archived or instance.deleted_at:
-        return
+    Follower groups are sent to one by one; once ``REALTIME_FANOUT_BUDGET`` seconds
+    have passed the remaining followers are skipped and counted. They catch up with
+    their next snapshot.
+    """
 
     channel_layer = get_channel_layer()
     if not channel_layer:
         return
+    deadline = time.monotonic() + settings.REALTIME_FANOUT_BUDGET
 
-    payload = PostSerializer(instance).data
+    replay_log = get_replay_log()
+    entry = replay_entry(event, payload)
 
-    if instance.visibility == "public":
-        async_to_sync(channel_layer.group_send)(
-            "feed_for_you",
-            {
-                "type": "feed.broadcast",
-                "event": "post.created",
-                "payload": payload,
-            },
+    if post.visibility == "public":
+        cursor = replay_breaker.call(event, replay_log.append, "for_you", post.author_id, entry)
+        send_to_group(
+            channel_layer, FOR_YOU_GROUP, feed_broadcast_message("for_you", event, payload, cursor)
         )
 
-    follower_ids = instance.author.followers.values_list("id", flat=True)
-    for follower_id in follower_ids:
-        group_name = f"feed_following_{follower_id}"
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                "type": "feed.broadcast",
-                "event": "post.created",
-                "payload": payload,
-            },
-        )
+    follower_ids = list(
+        UserFollow.objects.filter(followed_id=post.author_id).values_list("follower_id", flat=True)
+    )
+    if not follower_ids:
+        return
+
+    cursor = replay_breaker.call(event, replay_log.append, "following", post.author_id, entry)
+    # Every follower receives the same frame, so encode it once for the whole loop.
+    message = feed_broadcast_message("following", event, payload, cursor)
+    for sent, follower_id in enumerate(follower_ids):
+        if time.monotonic() >= deadline:
+            metrics.realtime_calls_skipped.inc(len(follower_ids) - sent, event=event)
+            return
+        send_to_group(channel_layer, following_group(follower_id), message)
+
+
+def publish_on_commit(post: Post, event: str, payload: dict[str, Any]):
+    """Publish a feed event once the current transaction commits.
+
+    Posts whose transaction rolls back are neither broadcast nor replay-logged, and the
+    request does not wait on the fan-out while it still holds its transaction.
+    """
+
+    transaction.on_commit(partial(publish_feed_event, post, event, payload))
+
+
+@receiver(post_save, sender=Post)
+def broadcast_new_post(sender, instance: Post, created: bool, update_fields=None, **_):
+    """Broadcast newly created and newly archived posts to relevant websocket groups."""
+
+    if instance.deleted_at:
+        return
+
+    if created:
+        if instance.is_archived:
+            return
+        publish_on_commit(instance, "post.created", PostSerializer(instance).data)
+    elif instance.is_archived and update_fields and "is_archived" in update_fields:
+        publish_on_commit(instance, "post.archived", PostSerializer(instance).data)
+
+
+@receiver(post_delete, sender=Post)
+def broadcast_deleted_post(sender, instance: Post, **_):
+    """Tell feeds to drop a post that no longer exists."""
+
+    publish_on_commit(instance, "post.deleted", {"id": instance.pk})
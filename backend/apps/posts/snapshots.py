@@ -0,0 +1,124 @@
+"""Short-lived feed snapshots shared by every socket of a scope.
+
+Reconnect storms make thousands of ``FeedConsumer`` instances ask for the same
+snapshot at once. ``FeedSnapshotCache`` keeps the encoded snapshot in process memory
+and in the shared Django cache, and makes sure that only one loader runs per key:
+concurrent callers in the same process await the in-flight load, and other processes
+wait on a cache lock until the winner publishes the result. The load runs in its own
+task, so a caller that disconnects and is cancelled does not abort it for the others.
+
+The shared cache calls go through ``snapshot_cache_breaker``; when Redis fails each
+process loads its own snapshots instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .broadcast import OPEN, CircuitBreaker
+
+CACHE_KEY_PREFIX = "feed:snapshot:"
+
+snapshot_cache_breaker = CircuitBreaker("snapshot_cache")
+
+
+class FeedSnapshotCache:
+    """Single-flight cache of encoded feed snapshots keyed by feed scope."""
+
+    def __init__(self, poll_interval: float = 0.05, max_entries: int = 1000):
+        self.poll_interval = poll_interval
+        self.max_entries = max_entries
+        self._local: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @property
+    def ttl(self) -> int:
+        return settings.FEED_SNAPSHOT_TTL
+
+    @property
+    def lock_timeout(self) -> int:
+        return settings.FEED_SNAPSHOT_LOCK_TIMEOUT
+
+    def clear(self):
+        """Forget snapshots held in this process."""
+
+        self._local.clear()
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[str]]) -> str:
+        """Return the snapshot for ``key``, running ``loader`` at most once per TTL."""
+
+        if self.ttl <= 0:
+            return await loader()
+
+        cached = self._local.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[str]]) -> str:
+        value = await self._load_shared(key, loader)
+        self._store(key, value)
+        return value
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when nobody was left waiting on it.
+            task.exception()
+
+    def _store(self, key: str, value: str):
+        now = time.monotonic()
+        self._local[key] = (now + self.ttl, value)
+        self._local.move_to_end(key)
+        # Drop expired snapshots, then the oldest ones beyond the cap.
+        for stale in [k for k, (expires, _) in self._local.items() if expires <= now]:
+            del self._local[stale]
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _load_shared(self, key: str, loader: Callable[[], Awaitable[str]]) -> str:
+        breaker = snapshot_cache_breaker
+        cache_key = f"{CACHE_KEY_PREFIX}{key}"
+        value = await breaker.acall("snapshot_cache_get", cache.aget, cache_key)
+        if value is not None:
+            return value
+
+        lock_key = f"{cache_key}:lock"
+        locked = await breaker.acall(
+            "snapshot_cache_lock", cache.aadd, lock_key, 1, self.lock_timeout
+        )
+        if locked is None:
+            # The shared cache is unavailable: nobody else can publish the snapshot.
+            return await loader()
+        if locked:
+            try:
+                value = await loader()
+                await breaker.acall("snapshot_cache_set", cache.aset, cache_key, value, self.ttl)
+            finally:
+                await breaker.acall("snapshot_cache_delete", cache.adelete, lock_key)
+            return value
+
+        # Another process is loading this snapshot; wait for it to be published.
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline and breaker.state != OPEN:
+            await asyncio.sleep(self.poll_interval)
+            value = await breaker.acall("snapshot_cache_get", cache.aget, cache_key)
+            if value is not None:
+                return value
+        return await loader()
+
+
+feed_snapshots = FeedSnapshotCache()
@@ -0,0 +1,177 @@
+"""Tests for the circuit-broken realtime calls used by write paths."""
+
+import asyncio
+import time
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.posts import metrics, signals
+from apps.posts.broadcast import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    channel_breaker,
+    replay_breaker,
+    send_to_group,
+)
+from tests.factories import PostFactory, UserFactory
+
+
+class RecordingChannelLayer:
+    """Channel layer that records the groups it was asked to send to."""
+
+    def __init__(self):
+        self.groups = []
+
+    async def group_send(self, group, message):
+        self.groups.append(group)
+
+
+class StalledChannelLayer:
+    """Channel layer whose Redis never answers."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def group_send(self, group, message):
+        self.calls += 1
+        await asyncio.sleep(10)
+
+
+@pytest.fixture(autouse=True)
+def breaker_settings(settings):
+    settings.REALTIME_SEND_TIMEOUT = 0.05
+    settings.REALTIME_BREAKER_THRESHOLD = 2
+    settings.REALTIME_BREAKER_RESET = 60
+    settings.FEED_REPLAY_BACKEND = "apps.posts.replay.InMemoryReplayLog"
+    channel_breaker.reset()
+    replay_breaker.reset()
+    yield
+    channel_breaker.reset()
+    replay_breaker.reset()
+
+
+def _fail():
+    raise ConnectionError("redis is down")
+
+
+class TestCircuitBreaker:
+    """The breaker opens on consecutive failures and probes before closing."""
+
+    def test_opens_after_threshold_and_skips_calls(self):
+        breaker = CircuitBreaker("test")
+        calls = []
+
+        assert breaker.call("e", _fail) is None
+        assert breaker.state == CLOSED
+        assert breaker.call("e", _fail) is None
+        assert breaker.state == OPEN
+
+        assert breaker.call("e", calls.append, 1) is None
+        assert calls == []
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker("test")
+
+        breaker.call("e", _fail)
+        breaker.call("e", lambda: "ok")
+        breaker.call("e", _fail)
+
+        assert breaker.state == CLOSED
+
+    def test_probe_after_reset_timeout(self, settings):
+        breaker = CircuitBreaker("test")
+        breaker.call("e", _fail)
+        breaker.call("e", _fail)
+        settings.REALTIME_BREAKER_RESET = 0
+
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        # Only one probe at a time.
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+        assert breaker.call("e", lambda: "ok") == "ok"
+        assert breaker.state == CLOSED
+
+
+class TestSendToGroup:
+    """Stalled channel layers cost at most the time budget per call."""
+
+    def test_stalled_send_times_out_then_is_skipped(self):
+        layer = StalledChannelLayer()
+        skipped = metrics.realtime_calls_skipped.value(event="feed.broadcast")
+
+        started = time.perf_counter()
+        results = [send_to_group(layer, "g", {"type": "feed.broadcast"}) for _ in range(5)]
+        elapsed = time.perf_counter() - started
+
+        assert results == [False] * 5
+        assert layer.calls == 2
+        assert elapsed < 1
+        assert channel_breaker.state == OPEN
+        assert metrics.realtime_calls_skipped.value(event="feed.broadcast") == skipped + 3
+        assert metrics.realtime_breaker_open.value(circuit="channel_layer") == 1
+
+
+@pytest.mark.django_db
+class TestPostCreationWithStalledRedis:
+    """Post creation succeeds quickly even when broadcasts cannot be delivered."""
+
+    def test_create_post_is_not_blocked(self, monkeypatch, django_capture_on_commit_callbacks):
+        layer = StalledChannelLayer()
+        monkeypatch.setattr(signals, "get_channel_layer", lambda: layer)
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+
+        started = time.perf_counter()
+        with django_capture_on_commit_callbacks(execute=True):
+            responses = [client.post("/api/posts/", {"text": f"post {i}"}) for i in range(3)]
+        elapsed = time.perf_counter() - started
+
+        assert [response.status_code for response in responses] == [status.HTTP_201_CREATED] * 3
+        assert layer.calls == 2
+        assert elapsed < 2
+
+
+@pytest.mark.django_db
+class TestFeedFanOut:
+    """Feed events go out after commit, within one overall budget per post."""
+
+    def test_rolled_back_post_is_not_published(
+        self, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        layer = RecordingChannelLayer()
+        monkeypatch.setattr(signals, "get_channel_layer", lambda: layer)
+        latest = signals.get_replay_log().latest("for_you")
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            PostFactory()
+        assert layer.groups == []
+        assert signals.get_replay_log().latest("for_you") == latest
+
+        for callback in callbacks:
+            callback()
+        assert layer.groups == ["feed_for_you"]
+        assert signals.get_replay_log().latest("for_you") != latest
+
+    def test_fan_out_stops_at_the_budget(
+        self, monkeypatch, settings, django_capture_on_commit_callbacks
+    ):
+        author = UserFactory()
+        for follower in UserFactory.create_batch(4):
+            follower.following.add(author)
+        layer = RecordingChannelLayer()
+        monkeypatch.setattr(signals, "get_channel_layer", lambda: layer)
+        settings.REALTIME_FANOUT_BUDGET = 0
+        skipped = metrics.realtime_calls_skipped.value(event="post.created")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            PostFactory(author=author, visibility="followers")
+
+        assert layer.groups == []
+        assert metrics.realtime_calls_skipped.value(event="post.created") == skipped + 4
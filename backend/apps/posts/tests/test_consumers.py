@@ -0,0 +1,895 @@
+"""Tests for the realtime feed WebSocket consumer."""
+
+import asyncio
+import json
+
+import msgpack
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.authtoken.models import Token
+
+from apps.accounts.authentication import token_cache
+from apps.accounts.models import UserFollow
+from apps.interactions.counters import counter_ticker
+from apps.posts import metrics
+from apps.posts.broadcast import OPEN
+from apps.posts.consumers import SLOW_CONSUMER_CLOSE_CODE, FeedConsumer
+from apps.posts.drain import DRAIN_CLOSE_CODE, feed_drain, server_group
+from apps.posts.encodings import decode_deflate
+from apps.posts.frames import (
+    FOR_YOU_GROUP,
+    FrameBatch,
+    feed_broadcast_message,
+    feed_update_frame,
+    post_counters_group,
+)
+from apps.posts.replay import get_replay_log
+from apps.posts.snapshots import FeedSnapshotCache, feed_snapshots, snapshot_cache_breaker
+from tests.factories import LikeFactory, PostFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def in_memory_backends(settings):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.FEED_REPLAY_BACKEND = "apps.posts.replay.InMemoryReplayLog"
+    settings.FEED_COUNTER_TICK = 0
+    settings.FEED_DRAIN_SIGNAL = ""
+    cache.clear()
+    feed_snapshots.clear()
+    counter_ticker.clear()
+    token_cache.clear()
+    feed_drain.reset()
+    snapshot_cache_breaker.reset()
+    yield
+    snapshot_cache_breaker.reset()
+    feed_snapshots.clear()
+    counter_ticker.clear()
+    token_cache.clear()
+    feed_drain.reset()
+
+
+async def _connect(path="/ws/posts/feed/"):
+    communicator = WebsocketCommunicator(FeedConsumer.as_asgi(), path)
+    connected, _ = await communicator.connect()
+    assert connected
+    initial = await communicator.receive_json_from()
+    return communicator, initial
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerBroadcast:
+    """Broadcast frames are encoded by the producer and forwarded verbatim."""
+
+    def test_connect_sends_initial_snapshot(self):
+        post = PostFactory()
+
+        async def scenario():
+            communicator, initial = await _connect()
+            await communicator.disconnect()
+            return initial
+
+        initial = async_to_sync(scenario)()
+
+        assert initial["type"] == "feed.initial"
+        assert initial["scope"] == "for_you"
+        assert [item["id"] for item in initial["posts"]] == [post.id]
+
+    def test_pre_encoded_frame_is_forwarded_verbatim(self):
+        message = feed_broadcast_message("for_you", "post.created", {"id": 42, "text": "olá"})
+
+        async def scenario():
+            communicator, _ = await _connect()
+            await get_channel_layer().group_send(FOR_YOU_GROUP, message)
+            raw = await communicator.receive_from()
+            await communicator.disconnect()
+            return raw
+
+        raw = async_to_sync(scenario)()
+
+        assert raw == message["frame"]
+        assert json.loads(raw) == {
+            "type": "feed.update",
+            "scope": "for_you",
+            "event": "post.created",
+            "post": {"id": 42, "text": "olá"},
+            "cursor": None,
+        }
+
+    def test_legacy_message_without_frame_is_still_encoded(self):
+        async def scenario():
+            communicator, _ = await _connect()
+            await get_channel_layer().group_send(
+                FOR_YOU_GROUP,
+                {"type": "feed.broadcast", "event": "post.created", "payload": {"id": 7}},
+            )
+            frame = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+
+        assert frame["type"] == "feed.update"
+        assert frame["post"] == {"id": 7}
+
+    def test_new_post_broadcast_carries_encoded_frame(self):
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_add)(FOR_YOU_GROUP, "test_frame_channel")
+
+        post = PostFactory()
+
+        message = async_to_sync(channel_layer.receive)("test_frame_channel")
+        frame = json.loads(message["frame"])
+        assert frame["type"] == "feed.update"
+        assert frame["post"]["id"] == post.id
+
+
+class TestFrameBatch:
+    """Unit tests for per-connection frame batching."""
+
+    def test_drain_joins_frames_into_batch(self):
+        batch = FrameBatch("for_you", max_size=10)
+        first = feed_update_frame("for_you", "post.created", {"id": 1})
+        second = feed_update_frame("for_you", "post.created", {"id": 2})
+        batch.add(1, first)
+        batch.add(2, second)
+
+        decoded = json.loads(batch.drain())
+
+        assert decoded["type"] == "feed.batch"
+        assert decoded["scope"] == "for_you"
+        assert [update["post"]["id"] for update in decoded["updates"]] == [1, 2]
+        assert batch.drain() is None
+
+    def test_repeated_post_keeps_latest_event(self):
+        batch = FrameBatch("for_you", max_size=10)
+        batch.add(1, feed_update_frame("for_you", "post.created", {"id": 1}))
+        batch.add(2, feed_update_frame("for_you", "post.created", {"id": 2}))
+        batch.add(1, feed_update_frame("for_you", "post.archived", {"id": 1}))
+
+        decoded = json.loads(batch.drain())
+
+        assert [(u["post"]["id"], u["event"]) for u in decoded["updates"]] == [
+            (2, "post.created"),
+            (1, "post.archived"),
+        ]
+
+    def test_add_reports_full_batch(self):
+        batch = FrameBatch("for_you", max_size=2)
+
+        assert batch.add(1, "{}") is False
+        assert batch.add(2, "{}") is True
+        assert len(batch) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerBatching:
+    """Connections opting into batching receive coalesced ``feed.batch`` frames."""
+
+    def _broadcast(self, post_id, event="post.created"):
+        return get_channel_layer().group_send(
+            FOR_YOU_GROUP, feed_broadcast_message("for_you", event, {"id": post_id})
+        )
+
+    def test_updates_are_coalesced_within_window(self):
+        async def scenario():
+            communicator, _ = await _connect("/ws/posts/feed/?batch=1&batch_window=50")
+            await self._broadcast(1)
+            await self._broadcast(2)
+            await self._broadcast(1, "post.archived")
+            frame = await communicator.receive_json_from(timeout=2)
+            nothing = await communicator.receive_nothing(timeout=0.1)
+            await communicator.disconnect()
+            return frame, nothing
+
+        frame, nothing = async_to_sync(scenario)()
+
+        assert frame["type"] == "feed.batch"
+        assert [(u["post"]["id"], u["event"]) for u in frame["updates"]] == [
+            (2, "post.created"),
+            (1, "post.archived"),
+        ]
+        assert nothing
+
+    def test_full_batch_flushes_immediately(self):
+        async def scenario():
+            communicator, _ = await _connect(
+                "/ws/posts/feed/?batch=1&batch_window=5000&batch_size=2"
+            )
+            await self._broadcast(1)
+            await self._broadcast(2)
+            frame = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+
+        assert [u["post"]["id"] for u in frame["updates"]] == [1, 2]
+
+
+class TestFeedSnapshotCache:
+    """Snapshots are loaded once per key and shared across callers."""
+
+    def _counting_loader(self, calls, value="[]", delay=0.01):
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(delay)
+            return value
+
+        return loader
+
+    def test_concurrent_callers_share_one_load(self):
+        calls = []
+        snapshots = FeedSnapshotCache()
+
+        async def scenario():
+            loader = self._counting_loader(calls, '[{"id":1}]')
+            return await asyncio.gather(*(snapshots.get("for_you", loader) for _ in range(50)))
+
+        results = async_to_sync(scenario)()
+
+        assert calls == [1]
+        assert set(results) == {'[{"id":1}]'}
+
+    def test_other_process_reuses_shared_snapshot(self):
+        calls = []
+        first, second = FeedSnapshotCache(), FeedSnapshotCache()
+
+        async def scenario():
+            await first.get("for_you", self._counting_loader(calls))
+            return await second.get("for_you", self._counting_loader(calls))
+
+        assert async_to_sync(scenario)() == "[]"
+        assert calls == [1]
+
+    def test_waits_for_lock_holder_instead_of_loading(self):
+        calls = []
+        snapshots = FeedSnapshotCache(poll_interval=0.01)
+
+        async def scenario():
+            await cache.aadd("feed:snapshot:for_you:lock", 1)
+
+            async def publish():
+                await asyncio.sleep(0.05)
+                await cache.aset("feed:snapshot:for_you", '["published"]')
+
+            publisher = asyncio.create_task(publish())
+            value = await snapshots.get("for_you", self._counting_loader(calls))
+            await publisher
+            return value
+
+        assert async_to_sync(scenario)() == '["published"]'
+        assert calls == []
+
+    def test_cancelled_leader_does_not_fail_waiters(self):
+        calls = []
+        snapshots = FeedSnapshotCache()
+
+        async def scenario():
+            loader = self._counting_loader(calls, '["ok"]', delay=0.05)
+            leader = asyncio.create_task(snapshots.get("for_you", loader))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(snapshots.get("for_you", loader)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await asyncio.gather(*waiters)
+
+        assert async_to_sync(scenario)() == ['["ok"]', '["ok"]']
+        assert calls == [1]
+
+    def test_local_snapshots_are_pruned(self, settings):
+        settings.FEED_SNAPSHOT_TTL = 60
+        snapshots = FeedSnapshotCache(max_entries=3)
+
+        async def scenario():
+            for user_id in range(10):
+                await snapshots.get(f"following:{user_id}", self._counting_loader([]))
+
+        async_to_sync(scenario)()
+
+        assert list(snapshots._local) == ["following:7", "following:8", "following:9"]
+
+    def test_shared_cache_failure_falls_back_to_loader(self, monkeypatch, settings):
+        settings.REALTIME_BREAKER_THRESHOLD = 2
+
+        async def unavailable(*args, **kwargs):
+            raise ConnectionError("redis is down")
+
+        for name in ("aget", "aadd", "aset", "adelete"):
+            monkeypatch.setattr(cache, name, unavailable)
+        calls = []
+
+        async def scenario():
+            values = []
+            for snapshots in (FeedSnapshotCache(), FeedSnapshotCache()):
+                values.append(await snapshots.get("for_you", self._counting_loader(calls)))
+            return values
+
+        assert async_to_sync(scenario)() == ["[]", "[]"]
+        assert calls == [1, 1]
+        assert snapshot_cache_breaker.state == OPEN
+
+    def test_zero_ttl_disables_cache(self, settings):
+        settings.FEED_SNAPSHOT_TTL = 0
+        calls = []
+        snapshots = FeedSnapshotCache()
+
+        async def scenario():
+            await snapshots.get("for_you", self._counting_loader(calls))
+            await snapshots.get("for_you", self._counting_loader(calls))
+
+        async_to_sync(scenario)()
+
+        assert calls == [1, 1]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerSnapshots:
+    """Connect and refresh snapshots are served from the shared cache."""
+
+    def test_refresh_reuses_connect_snapshot(self):
+        PostFactory()
+
+        async def scenario():
+            communicator, initial = await _connect()
+            await database_sync_to_async(PostFactory)()
+            update = await communicator.receive_json_from()
+            assert update["type"] == "feed.update"
+            await communicator.send_json_to({"type": "feed.request_refresh"})
+            refreshed = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return initial, refreshed
+
+        initial, refreshed = async_to_sync(scenario)()
+
+        assert refreshed["type"] == "feed.snapshot"
+        assert refreshed["posts"] == initial["posts"]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerResume:
+    """Reconnecting clients receive only the events after their cursor."""
+
+    def test_snapshot_carries_cursor_of_latest_event(self):
+        post = PostFactory()
+
+        async def scenario():
+            communicator, initial = await _connect()
+            await communicator.disconnect()
+            return initial
+
+        initial = async_to_sync(scenario)()
+
+        assert initial["cursor"] == get_replay_log().latest("for_you")
+        assert [item["id"] for item in initial["posts"]] == [post.id]
+
+    def test_reconnect_with_cursor_receives_delta(self):
+        PostFactory()
+        cursor = get_replay_log().latest("for_you")
+        missed = PostFactory()
+        missed.archive()
+
+        async def scenario():
+            communicator, frame = await _connect(f"/ws/posts/feed/?since={cursor}")
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+
+        assert frame["type"] == "feed.delta"
+        assert frame["cursor"] == get_replay_log().latest("for_you")
+        assert [(e["event"], e["post"]["id"]) for e in frame["events"]] == [
+            ("post.created", missed.id),
+            ("post.archived", missed.id),
+        ]
+
+    def test_refresh_with_current_cursor_returns_empty_delta(self):
+        PostFactory()
+
+        async def scenario():
+            communicator, initial = await _connect()
+            await communicator.send_json_to(
+                {"type": "feed.request_refresh", "since": initial["cursor"]}
+            )
+            frame = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return initial, frame
+
+        initial, frame = async_to_sync(scenario)()
+
+        assert frame == {
+            "type": "feed.delta",
+            "scope": "for_you",
+            "cursor": initial["cursor"],
+            "events": [],
+        }
+
+    def test_expired_cursor_falls_back_to_snapshot(self, settings):
+        settings.FEED_REPLAY_MAX_EVENTS = 2
+        PostFactory()
+        cursor = get_replay_log().latest("for_you")
+        PostFactory.create_batch(3)
+
+        async def scenario():
+            communicator, frame = await _connect(f"/ws/posts/feed/?since={cursor}")
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+
+        assert frame["type"] == "feed.initial"
+        assert len(frame["posts"]) == 4
+
+    def test_cached_snapshot_is_followed_by_the_events_since(self):
+        PostFactory()
+
+        async def scenario():
+            first, initial = await _connect()
+            await first.disconnect()
+            created = await database_sync_to_async(PostFactory)()
+            second, cached = await _connect()
+            catch_up = await second.receive_json_from()
+            await second.disconnect()
+            return initial, created, cached, catch_up
+
+        initial, created, cached, catch_up = async_to_sync(scenario)()
+
+        assert cached == initial
+        assert catch_up["type"] == "feed.delta"
+        assert catch_up["cursor"] == get_replay_log().latest("for_you")
+        assert [(e["event"], e["post"]["id"]) for e in catch_up["events"]] == [
+            ("post.created", created.id)
+        ]
+
+    def test_deleted_post_is_broadcast(self):
+        post = PostFactory()
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_add)(FOR_YOU_GROUP, "test_delete_channel")
+        post_id = post.id
+
+        post.delete()
+
+        message = async_to_sync(channel_layer.receive)("test_delete_channel")
+        assert message["event"] == "post.deleted"
+        assert message["payload"] == {"id": post_id}
+        assert message["cursor"] == get_replay_log().latest("for_you")
+
+
+class StalledFeedConsumer(FeedConsumer):
+    """Consumer whose socket stops accepting frames after the initial snapshot."""
+
+    gate: asyncio.Event
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if text_data and '"feed.initial"' not in text_data:
+            await self.gate.wait()
+        await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerBackpressure:
+    """Slow sockets get a resync marker and are eventually evicted."""
+
+    def _broadcast(self, post_id):
+        return get_channel_layer().group_send(
+            FOR_YOU_GROUP, feed_broadcast_message("for_you", "post.created", {"id": post_id})
+        )
+
+    def test_overflow_sends_resync_marker(self, settings):
+        settings.FEED_OUTBOUND_QUEUE_SIZE = 2
+        overflows = metrics.outbound_overflows.value()
+
+        async def scenario():
+            StalledFeedConsumer.gate = asyncio.Event()
+            communicator = WebsocketCommunicator(StalledFeedConsumer.as_asgi(), "/ws/posts/feed/")
+            await communicator.connect()
+            await communicator.receive_json_from()
+            for post_id in range(1, 6):
+                await self._broadcast(post_id)
+            await communicator.receive_nothing(timeout=0.1)
+            StalledFeedConsumer.gate.set()
+            frames = [await communicator.receive_json_from() for _ in range(2)]
+            await communicator.disconnect()
+            return frames
+
+        frames = async_to_sync(scenario)()
+
+        # The first update was already handed to the socket before it stalled.
+        assert frames[0]["post"]["id"] == 1
+        assert frames[1] == {"type": "feed.resync", "scope": "for_you"}
+        assert metrics.outbound_overflows.value() == overflows + 1
+
+    def test_persistently_slow_socket_is_evicted(self, settings):
+        settings.FEED_SLOW_CONSUMER_TIMEOUT = 0.05
+        evictions = metrics.slow_consumer_evictions.value()
+
+        async def scenario():
+            StalledFeedConsumer.gate = asyncio.Event()
+            communicator = WebsocketCommunicator(StalledFeedConsumer.as_asgi(), "/ws/posts/feed/")
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await self._broadcast(1)
+            await self._broadcast(2)
+            # The second update now waits behind the stalled first one for too long.
+            await asyncio.sleep(0.1)
+            await self._broadcast(3)
+            output = await communicator.receive_output(timeout=1)
+            await communicator.wait()
+            return output
+
+        output = async_to_sync(scenario)()
+
+        assert output == {"type": "websocket.close", "code": SLOW_CONSUMER_CLOSE_CODE}
+        assert metrics.slow_consumer_evictions.value() == evictions + 1
+
+    def test_unacknowledged_frames_fill_the_queue(self, settings):
+        settings.FEED_ACK_WINDOW = 2
+        settings.FEED_OUTBOUND_QUEUE_SIZE = 2
+        overflows = metrics.outbound_overflows.value()
+
+        async def scenario():
+            communicator, _ = await _connect("/ws/posts/feed/?ack=1")
+            for post_id in range(1, 6):
+                await self._broadcast(post_id)
+            first = await communicator.receive_json_from()
+            # The initial snapshot and one update are in flight; nothing else is written.
+            await communicator.receive_nothing(timeout=0.1)
+            await communicator.send_json_to({"type": "feed.ack", "received": 2})
+            resync = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return first, resync
+
+        first, resync = async_to_sync(scenario)()
+
+        assert first["post"]["id"] == 1
+        assert resync == {"type": "feed.resync", "scope": "for_you"}
+        assert metrics.outbound_overflows.value() == overflows + 1
+
+    def test_client_that_stops_acknowledging_is_evicted(self, settings):
+        settings.FEED_ACK_WINDOW = 1
+        settings.FEED_SLOW_CONSUMER_TIMEOUT = 0.05
+        evictions = metrics.slow_consumer_evictions.value()
+
+        async def scenario():
+            communicator, _ = await _connect("/ws/posts/feed/?ack=1")
+            await self._broadcast(1)
+            await asyncio.sleep(0.1)
+            await self._broadcast(2)
+            output = await communicator.receive_output(timeout=1)
+            await communicator.wait()
+            return output
+
+        output = async_to_sync(scenario)()
+
+        assert output == {"type": "websocket.close", "code": SLOW_CONSUMER_CLOSE_CODE}
+        assert metrics.slow_consumer_evictions.value() == evictions + 1
+
+    def test_acknowledging_client_keeps_up(self, settings):
+        settings.FEED_ACK_WINDOW = 1
+
+        async def scenario():
+            communicator, _ = await _connect("/ws/posts/feed/?ack=1")
+            received = 1
+            frames = []
+            for post_id in range(1, 4):
+                await communicator.send_json_to({"type": "feed.ack", "received": received})
+                await self._broadcast(post_id)
+                frames.append(await communicator.receive_json_from())
+                received += 1
+            await communicator.disconnect()
+            return frames
+
+        frames = async_to_sync(scenario)()
+
+        assert [frame["post"]["id"] for frame in frames] == [1, 2, 3]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerEncodings:
+    """Negotiated encodings switch the socket to binary frames."""
+
+    def test_msgpack_query_parameter(self):
+        post = PostFactory()
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                FeedConsumer.as_asgi(), "/ws/posts/feed/?encoding=msgpack"
+            )
+            await communicator.connect()
+            output = await communicator.receive_output()
+            await communicator.disconnect()
+            return output
+
+        output = async_to_sync(scenario)()
+
+        assert "text" not in output
+        snapshot = msgpack.unpackb(output["bytes"])
+        assert snapshot["type"] == "feed.initial"
+        assert [item["id"] for item in snapshot["posts"]] == [post.id]
+
+    def test_deflate_subprotocol(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                FeedConsumer.as_asgi(), "/ws/posts/feed/", subprotocols=["ourvoice.deflate"]
+            )
+            _, subprotocol = await communicator.connect()
+            await communicator.receive_output()
+            await get_channel_layer().group_send(
+                FOR_YOU_GROUP, feed_broadcast_message("for_you", "post.created", {"id": 3})
+            )
+            output = await communicator.receive_output()
+            await communicator.disconnect()
+            return subprotocol, output
+
+        subprotocol, output = async_to_sync(scenario)()
+
+        assert subprotocol == "ourvoice.deflate"
+        assert json.loads(decode_deflate(output["bytes"]))["post"] == {"id": 3}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerCounters:
+    """Sockets receive counter frames only for the posts they subscribed to."""
+
+    def test_subscribed_posts_receive_counters(self):
+        watched, ignored = PostFactory(), PostFactory()
+
+        async def scenario():
+            communicator, _ = await _connect()
+            await communicator.send_json_to(
+                {"type": "counters.subscribe", "posts": [watched.pk, "bogus"]}
+            )
+            await communicator.receive_nothing(timeout=0.05)
+            await database_sync_to_async(LikeFactory)(post=watched)
+            await database_sync_to_async(LikeFactory)(post=ignored)
+            await database_sync_to_async(counter_ticker.flush)()
+            frame = await communicator.receive_json_from()
+            nothing = await communicator.receive_nothing(timeout=0.1)
+            await communicator.disconnect()
+            return frame, nothing
+
+        frame, nothing = async_to_sync(scenario)()
+
+        assert frame == {
+            "type": "post.counters",
+            "post": watched.pk,
+            "likes": 1,
+            "reposts": 0,
+            "replies": 0,
+        }
+        assert nothing
+
+    def _subscribed(self, path: str, posts: list[int]) -> frozenset[int]:
+        async def scenario():
+            communicator = WebsocketCommunicator(FeedConsumer.as_asgi(), path)
+            connected, _ = await communicator.connect()
+            assert connected
+            await communicator.receive_json_from()
+            await communicator.send_json_to({"type": "counters.subscribe", "posts": posts})
+            await communicator.receive_nothing(timeout=0.05)
+            subscribed = frozenset(
+                post_id
+                for post_id in posts
+                if metrics.group_membership.members(post_counters_group(post_id))
+            )
+            await communicator.disconnect()
+            return subscribed
+
+        return async_to_sync(scenario)()
+
+    def test_truncation_keeps_client_order(self, settings):
+        settings.FEED_COUNTER_MAX_SUBSCRIPTIONS = 2
+        old, newer, newest = PostFactory(), PostFactory(), PostFactory()
+
+        subscribed = self._subscribed("/ws/posts/feed/", [newest.pk, newer.pk, old.pk])
+
+        assert subscribed == {newest.pk, newer.pk}
+
+    def test_followers_only_posts_need_a_follower(self):
+        hidden = PostFactory(visibility="followers")
+        public = PostFactory()
+
+        assert self._subscribed("/ws/posts/feed/", [hidden.pk, public.pk]) == {public.pk}
+
+        follower = UserFactory()
+        UserFollow.objects.create(follower=follower, followed=hidden.author)
+        token = Token.objects.create(user=follower)
+        path = f"/ws/posts/feed/?token={token.key}"
+
+        assert self._subscribed(path, [hidden.pk, public.pk]) == {hidden.pk, public.pk}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerAuthentication:
+    """Socket tokens are resolved through the shared token cache."""
+
+    def test_following_scope_requires_token(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                FeedConsumer.as_asgi(), "/ws/posts/feed/?scope=following"
+            )
+            connected, code = await communicator.connect()
+            return connected, code
+
+        assert async_to_sync(scenario)() == (False, 4001)
+
+    def test_cached_token_opens_following_scope(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        token_cache.resolve(token.key)
+
+        async def scenario():
+            communicator, initial = await _connect(
+                f"/ws/posts/feed/?scope=following&token={token.key}"
+            )
+            await communicator.disconnect()
+            return initial
+
+        initial = async_to_sync(scenario)()
+
+        assert initial["type"] == "feed.initial"
+        assert initial["scope"] == "following"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerDrain:
+    """Draining hands out resume cursors and closes sockets gradually."""
+
+    def test_drain_sends_cursor_and_closes(self, settings):
+        settings.FEED_DRAIN_RECONNECT_JITTER = 2
+        message = feed_broadcast_message("for_you", "post.created", {"id": 7}, "7-0")
+
+        async def scenario():
+            communicator, _ = await _connect()
+            await get_channel_layer().group_send(FOR_YOU_GROUP, message)
+            await communicator.receive_json_from()
+            scheduled = feed_drain.start(window=0)
+            draining = await communicator.receive_json_from()
+            closed = await communicator.receive_output()
+            await communicator.disconnect()
+            return scheduled, draining, closed
+
+        scheduled, draining, closed = async_to_sync(scenario)()
+
+        assert scheduled == 1
+        assert draining["type"] == "server.draining"
+        assert draining["cursor"] == "7-0"
+        assert 0 <= draining["reconnect_after_ms"] <= 2000
+        assert closed == {"type": "websocket.close", "code": DRAIN_CLOSE_CODE}
+
+    def test_closes_are_spread_over_window(self):
+        async def scenario():
+            sockets = [await _connect() for _ in range(3)]
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            feed_drain.start(window=0.3)
+            for communicator, _ in sockets:
+                await communicator.receive_json_from(timeout=1)
+                await communicator.receive_output()
+            elapsed = loop.time() - started
+            for communicator, _ in sockets:
+                await communicator.disconnect()
+            return elapsed
+
+        elapsed = async_to_sync(scenario)()
+
+        # Each socket is drained within its own slice, so the last one waits 0.2s or more.
+        assert 0.2 <= elapsed < 1
+
+    def test_overflowed_socket_gets_no_cursor(self, settings):
+        settings.FEED_OUTBOUND_QUEUE_SIZE = 1
+
+        async def scenario():
+            StalledFeedConsumer.gate = asyncio.Event()
+            communicator = WebsocketCommunicator(StalledFeedConsumer.as_asgi(), "/ws/posts/feed/")
+            await communicator.connect()
+            await communicator.receive_json_from()
+            for post_id in range(1, 5):
+                await get_channel_layer().group_send(
+                    FOR_YOU_GROUP,
+                    feed_broadcast_message(
+                        "for_you", "post.created", {"id": post_id}, f"{post_id}-0"
+                    ),
+                )
+            await communicator.receive_nothing(timeout=0.1)
+            feed_drain.start(window=0)
+            StalledFeedConsumer.gate.set()
+            frames = []
+            while not frames or frames[-1]["type"] != "server.draining":
+                frames.append(await communicator.receive_json_from())
+            await communicator.disconnect()
+            return frames
+
+        frames = async_to_sync(scenario)()
+
+        assert {"type": "feed.resync", "scope": "for_you"} in frames
+        assert frames[-1]["cursor"] is None
+
+    def test_new_sockets_are_refused_while_draining(self):
+        feed_drain.active = True
+
+        async def scenario():
+            communicator = WebsocketCommunicator(FeedConsumer.as_asgi(), "/ws/posts/feed/")
+            connected, _ = await communicator.connect()
+            return connected
+
+        assert async_to_sync(scenario)() is False
+
+    def test_drain_message_reaches_server_group(self, settings):
+        settings.FEED_SERVER_NAME = "web-1"
+
+        async def scenario():
+            communicator, _ = await _connect()
+            await get_channel_layer().group_send(
+                server_group("web-1"), {"type": "server.drain", "window": 0}
+            )
+            draining = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return draining
+
+        assert async_to_sync(scenario)()["type"] == "server.draining"
+        assert feed_drain.active
+
+    def test_drain_command_sends_to_server_group(self, settings):
+        settings.FEED_SERVER_NAME = "web-1"
+
+        async def scenario():
+            communicator, _ = await _connect()
+            await sync_to_async(call_command)("drain_feed", "--window", "0")
+            draining = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return draining
+
+        assert async_to_sync(scenario)()["type"] == "server.draining"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedConsumerMetrics:
+    """Connections, memberships, frames and broadcasts are instrumented."""
+
+    def test_connection_lifecycle_is_counted(self):
+        opened = metrics.connections.value(scope="for_you")
+        initial_frames = metrics.frames_sent.value(type="feed.initial")
+        snapshots = metrics.sync_frame_seconds.value(kind="snapshot")
+
+        async def scenario():
+            communicator, _ = await _connect()
+            during = (
+                metrics.open_connections.value(scope="for_you"),
+                metrics.group_membership.members(FOR_YOU_GROUP),
+            )
+            await communicator.disconnect()
+            return during
+
+        open_during, members_during = async_to_sync(scenario)()
+
+        assert metrics.connections.value(scope="for_you") == opened + 1
+        assert open_during == metrics.open_connections.value(scope="for_you") + 1
+        assert members_during == metrics.group_membership.members(FOR_YOU_GROUP) + 1
+        assert metrics.frames_sent.value(type="feed.initial") == initial_frames + 1
+        assert metrics.sync_frame_seconds.value(kind="snapshot") == snapshots + 1
+
+    def test_rejected_handshake_is_counted(self):
+        rejected = metrics.rejected_connections.value(reason="unauthenticated")
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                FeedConsumer.as_asgi(), "/ws/posts/feed/?scope=following"
+            )
+            await communicator.connect()
+
+        async_to_sync(scenario)()
+
+        assert metrics.rejected_connections.value(reason="unauthenticated") == rejected + 1
+
+    def test_broadcast_records_group_send_duration(self):
+        sends = metrics.group_send_seconds.value(event="post.created")
+
+        PostFactory()
+
+        assert metrics.group_send_seconds.value(event="post.created") == sends + 1
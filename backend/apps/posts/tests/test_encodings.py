@@ -0,0 +1,71 @@
+"""Tests for feed WebSocket frame encodings."""
+
+import base64
+import json
+import zlib
+
+import msgpack
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.posts.encodings import (
+    DEFLATE,
+    DEFLATE_DICTIONARY,
+    JSON,
+    MSGPACK,
+    decode_deflate,
+    encode_deflate,
+    negotiate,
+    transcode,
+)
+from apps.posts.frames import feed_update_frame
+
+FRAME = feed_update_frame(
+    "for_you", "post.created", {"id": 1, "text": "Olá, comunidade", "visibility": "public"}, "7"
+)
+
+
+class TestNegotiation:
+    """Encodings come from the query string first, then from subprotocols."""
+
+    def test_defaults_to_json(self):
+        assert negotiate(None, []) == (JSON, None)
+
+    def test_query_parameter_wins(self):
+        assert negotiate("MSGPACK", ["ourvoice.deflate"]) == (MSGPACK, None)
+
+    def test_subprotocol_is_echoed(self):
+        assert negotiate(None, ["chat", "ourvoice.deflate"]) == (DEFLATE, "ourvoice.deflate")
+
+    def test_unknown_encoding_falls_back_to_json(self):
+        assert negotiate("brotli", ["ourvoice.brotli"]) == (JSON, None)
+
+
+class TestTranscoding:
+    """Binary encodings carry the same frame as the JSON text."""
+
+    def test_msgpack_round_trip(self):
+        assert msgpack.unpackb(transcode(FRAME, MSGPACK)) == json.loads(FRAME)
+
+    def test_deflate_round_trip_with_dictionary(self):
+        data = transcode(FRAME, DEFLATE)
+
+        assert decode_deflate(data) == FRAME
+        assert len(data) < len(FRAME.encode())
+
+    def test_dictionary_shrinks_small_frames(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        without_dictionary = compressor.compress(FRAME.encode()) + compressor.flush()
+
+        assert len(encode_deflate(FRAME)) < len(without_dictionary)
+
+
+@pytest.mark.django_db
+class TestFeedDictionaryEndpoint:
+    def test_returns_dictionary(self):
+        response = APIClient().get("/api/posts/feed-dictionary/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["format"] == "deflate-raw"
+        assert base64.b64decode(response.data["dictionary"]) == DEFLATE_DICTIONARY
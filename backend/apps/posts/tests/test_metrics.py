@@ -0,0 +1,95 @@
+"""Tests for realtime metrics and their exposition endpoint."""
+
+import pytest
+from django.test import Client
+
+from apps.posts import metrics
+from apps.posts.metrics import REGISTRY, Counter, GroupMembership, Histogram, render
+
+
+@pytest.fixture
+def scratch_registry():
+    """Register throwaway metrics and remove them afterwards."""
+
+    size = len(REGISTRY)
+    yield
+    del REGISTRY[size:]
+
+
+@pytest.mark.usefixtures("scratch_registry")
+class TestExposition:
+    """Metrics render in the Prometheus text format."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        histogram.observe(0.05, event="a")
+        histogram.observe(0.5, event="a")
+        histogram.observe(3, event="a")
+
+        assert histogram.value(event="a") == 3
+        assert histogram.expose() == [
+            'test_latency_seconds_bucket{event="a",le="0.1"} 1',
+            'test_latency_seconds_bucket{event="a",le="1"} 2',
+            'test_latency_seconds_bucket{event="a",le="+Inf"} 3',
+            'test_latency_seconds_sum{event="a"} 3.55',
+            'test_latency_seconds_count{event="a"} 3',
+        ]
+
+    def test_render_includes_help_type_and_escaped_labels(self):
+        counter = Counter("test_events_total", "Events.")
+        counter.inc(2, kind='say "hi"')
+
+        text = render()
+
+        assert "# HELP test_events_total Events.\n# TYPE test_events_total counter\n" in text
+        assert 'test_events_total{kind="say \\"hi\\""} 2\n' in text
+
+    def test_histogram_time_observes_block(self):
+        histogram = Histogram("test_block_seconds", "Block.")
+
+        with histogram.time(event="x"):
+            pass
+
+        assert histogram.value(event="x") == 1
+
+
+class TestGroupMembership:
+    """Per-group counts are summarised by group kind."""
+
+    def test_groups_and_members_by_kind(self):
+        membership = GroupMembership()
+        members = metrics.group_subscribers.value(kind="test")
+        groups = metrics.groups.value(kind="test")
+
+        membership.joined("g1", "test")
+        membership.joined("g1", "test")
+        membership.joined("g2", "test")
+        assert metrics.group_subscribers.value(kind="test") == members + 3
+        assert metrics.groups.value(kind="test") == groups + 2
+        assert membership.largest(1) == [("g1", 2)]
+
+        membership.left("g1", "test")
+        membership.left("g2", "test")
+        membership.left("g2", "test")
+        assert metrics.group_subscribers.value(kind="test") == members + 1
+        assert metrics.groups.value(kind="test") == groups + 1
+
+
+class TestMetricsView:
+    """``GET /metrics/`` serves the registry, optionally behind a bearer token."""
+
+    def test_open_without_token(self, settings):
+        settings.METRICS_TOKEN = ""
+
+        response = Client().get("/metrics/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert b"# TYPE feed_open_connections gauge" in response.content
+
+    def test_requires_configured_token(self, settings):
+        settings.METRICS_TOKEN = "scrape-me"
+
+        assert Client().get("/metrics/").status_code == 401
+        response = Client().get("/metrics/", HTTP_AUTHORIZATION="Bearer scrape-me")
+        assert response.status_code == 200
@@ -6,7 +6,8 @@ from django.db import IntegrityError
 from django.utils import timezone
 
 from apps.posts.models import Post
-from tests.factories import PostFactory, UserFactory
+from apps.posts.serializers import PostSerializer
+from tests.factories import LikeFactory, PostFactory, UserFactory
 
 User = get_user_model()
 
@@ -230,4 +231,32 @@ class TestPostModel:
 
         # Reply should still exist but in_reply_to should be None
         reply.refresh_from_db()
-        assert reply.in_reply_to is None
\ No newline at end of file
+        assert reply.in_reply_to is None
+
+@pytest.mark.django_db
+class TestPostCounters:
+    """Saving a post never overwrites its engagement counters."""
+
+    def test_edit_keeps_concurrent_increments(self):
+        post = PostFactory(text="Antes")
+        stale = Post.objects.get(pk=post.pk)
+        LikeFactory(post=post)
+
+        serializer = PostSerializer(stale, data={"text": "Depois"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        post.refresh_from_db()
+        assert post.text == "Depois"
+        assert post.like_count == 1
+
+    def test_plain_save_skips_counter_columns(self):
+        post = PostFactory()
+        stale = Post.objects.get(pk=post.pk)
+        Post.objects.filter(pk=post.pk).update(view_count=5)
+
+        stale.visibility = "followers"
+        stale.save()
+
+        post.refresh_from_db()
+        assert (post.visibility, post.view_count) == ("followers", 5)
@@ -0,0 +1,55 @@
+"""Tests for the per-connection outbound queue."""
+
+from apps.posts.outbound import DROPPED, OVERFLOW, QUEUED, OutboundQueue
+
+RESYNC = '{"type":"feed.resync"}'
+
+
+class TestOutboundQueue:
+    """Updates collapse into a resync marker once the queue is full."""
+
+    def test_frames_are_written_in_order(self):
+        queue = OutboundQueue(max_size=3, resync_frame=RESYNC)
+
+        assert queue.put("a") == QUEUED
+        assert queue.put("b") == QUEUED
+
+        assert [queue.pop(), queue.pop()] == ["a", "b"]
+        assert len(queue) == 0
+
+    def test_overflow_collapses_updates_but_keeps_control_frames(self):
+        queue = OutboundQueue(max_size=3, resync_frame=RESYNC)
+        queue.put("update-1")
+        queue.put("snapshot", droppable=False)
+        queue.put("update-2")
+
+        assert queue.put("update-3") == OVERFLOW
+        assert queue.overflows == 1
+        assert [queue.pop(), queue.pop()] == ["snapshot", RESYNC]
+
+    def test_updates_are_dropped_while_resync_is_pending(self):
+        queue = OutboundQueue(max_size=1, resync_frame=RESYNC)
+        queue.put("update-1")
+        queue.put("update-2")
+
+        assert queue.put("update-3") == DROPPED
+        assert queue.pop() == RESYNC
+        assert queue.put("update-4") == QUEUED
+
+    def test_overflow_count_resets_once_drained(self):
+        queue = OutboundQueue(max_size=1, resync_frame=RESYNC)
+        queue.put("update-1")
+        queue.put("update-2")
+        queue.put("control", droppable=False)
+
+        queue.pop()
+        assert queue.overflows == 1
+        queue.pop()
+        assert queue.overflows == 0
+
+    def test_oldest_age_tracks_head_of_queue(self):
+        queue = OutboundQueue(max_size=3, resync_frame=RESYNC)
+
+        assert queue.oldest_age() == 0.0
+        queue.put("update")
+        assert queue.oldest_age() >= 0.0
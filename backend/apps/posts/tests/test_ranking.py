@@ -0,0 +1,151 @@
+"""Tests for the debate ranking of replies and ``GET /api/posts/{id}/replies/``."""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.interactions.events import consume
+from apps.interactions.models import InteractionEvent
+from apps.posts.events import DebateRanking
+from apps.posts.models import Post
+from apps.posts.ranking import debate_score, rescore
+from tests.factories import LikeFactory, PostFactory, ReplyFactory, UserFactory
+
+NOON = datetime(2026, 3, 2, 12, 0, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def settled_immediately(settings):
+    settings.INTERACTION_EVENT_SETTLE = 0
+    settings.FEED_COUNTER_TICK = 0
+    settings.DEBATE_HALF_LIFE_HOURS = 12
+    settings.DEBATE_REPLY_WEIGHT = 2
+
+
+class TestDebateScore:
+    """Weight grows with likes, replies and reputation and halves every half-life."""
+
+    def test_engagement_and_reputation_raise_the_score(self):
+        base = debate_score(0, 0, 0, NOON)
+
+        assert debate_score(3, 0, 0, NOON) > base
+        assert debate_score(0, 1, 0, NOON) == debate_score(2, 0, 0, NOON)
+        assert debate_score(0, 0, Decimal("50.00"), NOON) > base
+
+    def test_decay_is_a_half_life(self):
+        older = NOON - timedelta(hours=12)
+
+        # Twice the weight twelve hours earlier ranks the same as the newer reply.
+        assert debate_score(3, 0, 0, older) == pytest.approx(debate_score(1, 0, 0, NOON))
+        assert debate_score(1, 0, 0, older) < debate_score(1, 0, 0, NOON)
+
+
+def _score(post):
+    return Post.objects.values_list("debate_score", flat=True).get(pk=post.pk)
+
+
+@pytest.mark.django_db
+class TestRescore:
+    """Scores are set on creation and recomputed as likes and replies arrive."""
+
+    def test_new_posts_start_with_a_score(self):
+        post = PostFactory()
+
+        expected = debate_score(0, 0, post.author.reputation_score, post.created_at)
+        assert _score(post) == pytest.approx(expected, abs=1e-9)
+
+    def test_consumer_rescores_liked_and_replied_posts(self):
+        root = PostFactory()
+        reply = PostFactory(in_reply_to=root)
+        before = _score(reply)
+        LikeFactory(post=reply)
+        ReplyFactory(post=reply)
+        PostFactory(in_reply_to=reply)
+
+        consume(DebateRanking())
+
+        expected = debate_score(1, 2, reply.author.reputation_score, reply.created_at)
+        assert _score(reply) == pytest.approx(expected, abs=1e-9)
+        assert _score(reply) > before
+
+    def test_reply_posts_are_logged_as_replies(self):
+        root = PostFactory()
+        reply = PostFactory(in_reply_to=root)
+
+        assert InteractionEvent.objects.filter(
+            kind="reply", actor_id=reply.author_id, subject_id=root.pk
+        ).exists()
+
+    def test_rescore_queries_do_not_grow_with_posts(self):
+        few, many = PostFactory.create_batch(2), PostFactory.create_batch(20)
+
+        with CaptureQueriesContext(connection) as small:
+            rescore(post.pk for post in few)
+        with CaptureQueriesContext(connection) as large:
+            rescore(post.pk for post in many)
+
+        assert len(large) == len(small)
+
+    def test_save_keeps_the_stored_score(self):
+        post = PostFactory()
+        Post.objects.filter(pk=post.pk).update(debate_score=42)
+
+        post.text = "Editado"
+        post.save()
+
+        assert _score(post) == 42
+
+    def test_rescore_command(self):
+        reply = PostFactory(in_reply_to=PostFactory())
+        Post.objects.update(debate_score=0)
+
+        call_command("rescore_debates", stdout=None)
+
+        assert _score(reply) > 0
+
+
+@pytest.mark.django_db
+class TestRankedReplies:
+    """``GET /api/posts/{id}/replies/`` pages replies by score."""
+
+    def setup_method(self):
+        self.root = PostFactory()
+        self.author = UserFactory(reputation_score=0)
+        self.client = APIClient()
+
+    def _reply(self):
+        return PostFactory(in_reply_to=self.root, author=self.author)
+
+    def test_most_useful_replies_first(self):
+        quiet, liked, newest = (self._reply() for _ in range(3))
+        for user in UserFactory.create_batch(3):
+            LikeFactory(post=liked, user=user)
+        consume(DebateRanking())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/posts/{self.root.pk}/replies/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in response.data["results"]] == [
+            liked.pk,
+            newest.pk,
+            quiet.pk,
+        ]
+        # The parent post, then one ordered scan of its replies.
+        assert len(queries) == 2
+
+    def test_pages_with_a_cursor(self):
+        replies = [self._reply() for _ in range(3)]
+
+        first = self.client.get(f"/api/posts/{self.root.pk}/replies/", {"limit": 2})
+        second = self.client.get(first.data["next"])
+
+        ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+        assert ids == [reply.pk for reply in reversed(replies)]
@@ -0,0 +1,48 @@
+"""Tests for the feed replay log backends."""
+
+from apps.posts.replay import InMemoryReplayLog, RedisReplayLog
+
+
+class TestInMemoryReplayLog:
+    """The in-memory backend keeps a bounded, ordered log per scope."""
+
+    def test_since_returns_events_after_cursor(self):
+        log = InMemoryReplayLog(max_events=10)
+        first = log.append("for_you", 1, '{"event":"a"}')
+        log.append("for_you", 2, '{"event":"b"}')
+        log.append("following", 3, '{"event":"c"}')
+
+        entries = log.since("for_you", first)
+
+        assert [(entry.author_id, entry.data) for entry in entries] == [(2, '{"event":"b"}')]
+        assert log.latest("following") not in {first, entries[0].cursor}
+
+    def test_latest_cursor_yields_no_events(self):
+        log = InMemoryReplayLog(max_events=10)
+        log.append("for_you", 1, "{}")
+
+        assert log.since("for_you", log.latest("for_you")) == []
+
+    def test_trimmed_cursor_is_reported_as_expired(self):
+        log = InMemoryReplayLog(max_events=2)
+        first = log.append("for_you", 1, "{}")
+        log.append("for_you", 1, "{}")
+        log.append("for_you", 1, "{}")
+
+        assert log.since("for_you", first) is None
+
+    def test_unknown_scope_or_invalid_cursor_is_expired(self):
+        log = InMemoryReplayLog(max_events=2)
+
+        assert log.latest("for_you") is None
+        assert log.since("for_you", "1") is None
+        assert log.since("for_you", "not-a-cursor") is None
+
+
+class TestRedisReplayLogCursor:
+    """Stream ids are compared numerically, not lexically."""
+
+    def test_parse_stream_ids(self):
+        assert RedisReplayLog._parse("1700000000000-3") == (1700000000000, 3)
+        assert RedisReplayLog._parse("1700000000000") == (1700000000000, 0)
+        assert RedisReplayLog._parse("latest") is None
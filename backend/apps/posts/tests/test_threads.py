@@ -0,0 +1,172 @@
+"""Tests for conversation paths and ``GET /api/posts/{id}/thread/``."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.posts import models as post_models
+from apps.posts import signals
+from apps.posts.models import Post
+from tests.factories import PostFactory
+
+
+def _reply(parent, **kwargs):
+    return PostFactory(in_reply_to=parent, **kwargs)
+
+
+@pytest.mark.django_db
+class TestConversationPath:
+    """New posts join their parent's conversation below the parent's path."""
+
+    def test_root_starts_a_conversation(self):
+        post = PostFactory()
+
+        post.refresh_from_db()
+        assert post.conversation_id == post.pk
+        assert post.depth == 0
+        assert post.thread_path == post_models.thread_segment(post.pk)
+
+    def test_replies_extend_the_path(self):
+        root = PostFactory()
+        reply = _reply(root)
+        nested = _reply(reply)
+
+        nested.refresh_from_db()
+        assert nested.conversation_id == root.pk
+        assert nested.depth == 2
+        assert nested.thread_path == "".join(
+            post_models.thread_segment(post.pk) for post in (root, reply, nested)
+        )
+
+    def test_path_order_is_depth_first(self):
+        root = PostFactory()
+        first = _reply(root)
+        second = _reply(root)
+        under_first = _reply(first)
+
+        ordered = Post.objects.filter(conversation_id=root.pk).order_by("thread_path")
+
+        assert list(ordered) == [root, first, under_first, second]
+
+    def test_depth_is_capped(self, monkeypatch):
+        monkeypatch.setattr(post_models, "THREAD_MAX_DEPTH", 1)
+        root = PostFactory()
+        reply = _reply(root)
+
+        deep = _reply(reply)
+
+        deep.refresh_from_db()
+        assert deep.depth == 1
+        assert deep.thread_path.startswith(root.thread_path)
+        assert deep.in_reply_to == reply
+
+    def test_reply_is_broadcast_with_its_placement(
+        self, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        root = PostFactory()
+        published = []
+        monkeypatch.setattr(
+            signals,
+            "publish_feed_event",
+            lambda post, event, payload: published.append((event, payload)),
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            reply = _reply(root)
+
+        [(event, payload)] = published
+        assert event == "post.created"
+        assert payload["id"] == reply.pk
+        assert payload["conversation_id"] == root.pk
+        assert payload["depth"] == 1
+
+
+@pytest.mark.django_db
+class TestThreadEndpoint:
+    """The thread is read in one range scan and cut by depth and breadth."""
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.root = PostFactory()
+        self.first = _reply(self.root)
+        self.second = _reply(self.root)
+        self.third = _reply(self.root)
+        self.nested = _reply(self.first)
+        self.deeper = _reply(self.nested)
+
+    def _get(self, post, **params):
+        return self.client.get(f"/api/posts/{post.pk}/thread/", params)
+
+    def _ids(self, response):
+        return [item["id"] for item in response.data["results"]]
+
+    def test_returns_the_whole_tree_in_order(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._get(self.root)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["conversation_id"] == self.root.pk
+        assert self._ids(response) == [
+            self.root.pk,
+            self.first.pk,
+            self.nested.pk,
+            self.deeper.pk,
+            self.second.pk,
+            self.third.pk,
+        ]
+        assert [item["depth"] for item in response.data["results"]] == [0, 1, 2, 3, 1, 1]
+        # The requested post, then one range scan of its thread.
+        assert len(queries) == 2
+
+    def test_depth_limit_collapses_deeper_replies(self):
+        response = self._get(self.root, depth=1)
+
+        assert self._ids(response) == [
+            self.root.pk,
+            self.first.pk,
+            self.second.pk,
+            self.third.pk,
+        ]
+        more = {item["id"]: item["more_replies"] for item in response.data["results"]}
+        assert more[self.first.pk] == 1
+        assert more[self.second.pk] == 0
+
+    def test_breadth_limit_and_after_expand_siblings(self):
+        response = self._get(self.root, depth=0, breadth=1)
+        assert response.data["results"][0]["more_replies"] == 3
+
+        response = self._get(self.root, depth=1, breadth=1)
+        assert self._ids(response) == [self.root.pk, self.first.pk]
+        assert response.data["results"][0]["more_replies"] == 2
+
+        response = self._get(self.root, depth=1, breadth=1, after=self.first.pk)
+        assert self._ids(response) == [self.second.pk]
+        assert response.data["results"][0]["more_replies"] == 0
+
+    def test_subthread_of_a_reply(self):
+        response = self._get(self.nested)
+
+        assert self._ids(response) == [self.nested.pk, self.deeper.pk]
+        assert response.data["conversation_id"] == self.root.pk
+
+    def test_deleted_posts_are_left_out(self):
+        Post.objects.filter(pk=self.first.pk).update(deleted_at=self.first.created_at)
+
+        response = self._get(self.root)
+
+        assert self._ids(response) == [self.root.pk, self.second.pk, self.third.pk]
+
+    def test_scan_limit_marks_truncation(self, settings):
+        settings.THREAD_SCAN_LIMIT = 3
+
+        response = self._get(self.root)
+
+        assert response.data["truncated"] is True
+        assert len(response.data["results"]) == 3
+
+    def test_after_must_be_a_direct_reply(self):
+        response = self._get(self.root, after=self.nested.pk)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
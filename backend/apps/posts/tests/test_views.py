@@ -1,5 +1,7 @@
 """Tests for post views and API endpoints."""
 
+import asyncio
+
 import pytest
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
@@ -8,12 +10,19 @@ from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from apps.posts.broadcast import channel_breaker, replay_breaker
 from apps.posts.models import Post
 from tests.factories import PostFactory, UserFactory
 
 User = get_user_model()
 
 
+async def receive(channel_layer, channel_name, timeout=2):
+    """Receive one message, failing instead of hanging when none was sent."""
+
+    return await asyncio.wait_for(channel_layer.receive(channel_name), timeout)
+
+
 @pytest.mark.django_db
 class TestPostViewSet:
     """Test suite for PostViewSet."""
@@ -436,7 +445,13 @@ class TestPostPermissions:
 class TestFeedBroadcastSignals:
     """Ensure post creation triggers websocket broadcast events."""
 
-    def test_public_post_broadcasts_to_public_group(self):
+    @pytest.fixture(autouse=True)
+    def closed_breakers(self):
+        # Earlier tests without Redis may have left the process-wide breakers open.
+        channel_breaker.reset()
+        replay_breaker.reset()
+
+    def test_public_post_broadcasts_to_public_group(self, django_capture_on_commit_callbacks):
         with override_settings(
             CHANNEL_LAYERS={
                 "default": {
@@ -448,13 +463,16 @@ class TestFeedBroadcastSignals:
             channel_name = "test_public_channel"
             async_to_sync(channel_layer.group_add)("feed_for_you", channel_name)
 
-            post = PostFactory()
+            with django_capture_on_commit_callbacks(execute=True):
+                post = PostFactory()
 
-            message = async_to_sync(channel_layer.receive)(channel_name)
+            message = async_to_sync(receive)(channel_layer, channel_name)
             assert message["event"] == "post.created"
             assert message["payload"]["id"] == post.id
 
-    def test_followers_only_post_broadcasts_to_followers(self):
+    def test_followers_only_post_broadcasts_to_followers(
+        self, django_capture_on_commit_callbacks
+    ):
         follower = UserFactory()
         followed = UserFactory()
         follower.following.add(followed)
@@ -471,8 +489,9 @@ class TestFeedBroadcastSignals:
             group_name = f"feed_following_{follower.pk}"
             async_to_sync(channel_layer.group_add)(group_name, channel_name)
 
-            post = PostFactory(author=followed, visibility="followers")
+            with django_capture_on_commit_callbacks(execute=True):
+                post = PostFactory(author=followed, visibility="followers")
 
-            message = async_to_sync(channel_layer.receive)(channel_name)
+            message = async_to_sync(receive)(channel_layer, channel_name)
             assert message["event"] == "post.created"
             assert message["payload"]["id"] == post.id
@@ -0,0 +1,70 @@
+"""Conversation threads read as one range of the ``post_thread_idx`` index.
+
+Every post stores its conversation (root post id) and the path of ids from the root
+down to it. Ordering a conversation by path lists it depth-first, parents before
+their replies and siblings oldest first, so a (sub)thread is a single ordered index
+range whatever its depth, instead of one query per level of ``in_reply_to``.
+
+``thread`` cuts that range to a depth and a number of replies per post. Posts whose
+replies were left out report how many in ``more_replies``; clients expand them by
+asking for the thread of that post, or for the replies after the last one shown.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from .models import Post, subtree_end
+
+
+@dataclass
+class Thread:
+    posts: list[Post]
+    # Post id -> direct replies left out by the depth or breadth limit.
+    more_replies: Counter = field(default_factory=Counter)
+    # Whether the scan stopped at ``THREAD_SCAN_LIMIT`` posts.
+    truncated: bool = False
+
+
+def thread(post: Post, depth: int, breadth: int, after: Post | None = None) -> Thread:
+    """Return ``post`` and its replies down to ``depth`` levels, ``breadth`` per post.
+
+    With ``after`` (a direct reply of ``post``) only the replies following it and
+    their subthreads are returned, without ``post`` itself.
+    """
+
+    start = post.thread_path if after is None else subtree_end(after.thread_path)
+    limit = settings.THREAD_SCAN_LIMIT
+    # One level past ``depth`` is read to count the replies of the deepest posts shown.
+    rows = list(
+        Post.objects.filter(
+            conversation_id=post.conversation_id,
+            thread_path__gte=start,
+            thread_path__lt=subtree_end(post.thread_path),
+            depth__lte=post.depth + depth + 1,
+            deleted_at__isnull=True,
+        )
+        .select_related("author")
+        .order_by("thread_path")[: limit + 1]
+    )
+    result = Thread(posts=[], truncated=len(rows) > limit)
+    shown = {post.pk}
+    replies_shown: Counter = Counter()
+    for row in rows[:limit]:
+        if row.pk == post.pk:
+            result.posts.append(row)
+            continue
+        parent = row.in_reply_to_id
+        if parent not in shown:
+            # Below a post that was left out.
+            continue
+        if row.depth > post.depth + depth or replies_shown[parent] >= breadth:
+            result.more_replies[parent] += 1
+            continue
+        replies_shown[parent] += 1
+        shown.add(row.pk)
+        result.posts.append(row)
+    return result
@@ -1,18 +1,49 @@
 """Viewsets for posts and timelines."""
 
+import base64
+from decimal import Decimal
+
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 
+from apps.interactions import toggles, write_behind
+from apps.interactions.models import Bookmark, EngagementRollup, Like, Repost
+from apps.interactions.views import analytics_response
+from apps.moderation.models import Vote
+from apps.moderation.serializers import VoteStateSerializer
+from apps.moderation.views import evaluate_post
+
+from . import threads
+from .encodings import DEFLATE_DICTIONARY, DEFLATE_DICTIONARY_VERSION
 from .models import Post
-from .permissions import IsAuthorOrReadOnly
-from .serializers import PostSerializer
+from .permissions import IsAuthorOrReadOnly, IsAuthorOrStaff
+from .serializers import PostSerializer, ThreadQuerySerializer
+
+
+class DebateRankingPagination(CursorPagination):
+    """Keyset pages over ``post_debate_idx``, most useful replies first."""
+
+    ordering = ("-debate_score", "-id")
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
 
 
 class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.select_related("author").all()
     serializer_class = PostSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
+    throttle_families = {
+        "create": "posts",
+        "feed": "feed",
+        "like": "interactions",
+        "repost": "interactions",
+        "bookmark": "interactions",
+        "vote": "votes",
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -24,6 +55,14 @@ class PostViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Opening a post counts as a view, only in write-behind mode: otherwise every read
+        # would turn into a row UPDATE.
+        if write_behind.buffers("view_count"):
+            write_behind.record(response.data["id"], "view_count", 1)
+        return response
+
     @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
     def feed(self, request):
         """Return a feed tailored to the requested scope."""
@@ -56,3 +95,153 @@ class PostViewSet(viewsets.ModelViewSet):
             return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+    @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
+    def thread(self, request, pk=None):
+        """Return the post and its replies depth-first, cut to ``depth`` and ``breadth``."""
+
+        post = self.get_object()
+        query = ThreadQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        limits = query.validated_data
+        after = None
+        if "after" in limits:
+            after = Post.objects.filter(pk=limits["after"], in_reply_to=post).first()
+            if after is None:
+                raise ValidationError({"after": "Not a reply to this post."})
+
+        result = threads.thread(post, limits["depth"], limits["breadth"], after)
+        data = self.get_serializer(result.posts, many=True).data
+        for item in data:
+            item["more_replies"] = result.more_replies[item["id"]]
+        return Response(
+            {
+                "conversation_id": post.conversation_id,
+                "truncated": result.truncated,
+                "results": data,
+            }
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[permissions.AllowAny],
+        pagination_class=DebateRankingPagination,
+    )
+    def replies(self, request, pk=None):
+        """Return the replies to this post ranked for debate (see ``apps.posts.ranking``)."""
+
+        post = self.get_object()
+        queryset = Post.objects.filter(in_reply_to=post, deleted_at__isnull=True).select_related(
+            "author"
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="feed-dictionary",
+        permission_classes=[permissions.AllowAny],
+    )
+    def feed_dictionary(self, request):
+        """Return the preset dictionary used by the ``deflate`` feed socket encoding."""
+
+        return Response(
+            {
+                "version": DEFLATE_DICTIONARY_VERSION,
+                "format": "deflate-raw",
+                "dictionary": base64.b64encode(DEFLATE_DICTIONARY).decode(),
+            }
+        )
+
+    def _toggle(self, request, model, state: str, **values):
+        """Set or clear the current user's ``model`` row on this post with one statement."""
+
+        post = self.get_object()
+        if request.method == "PUT":
+            changed = toggles.add(model, post=post, user=request.user, **values) is not None
+        else:
+            changed = toggles.remove(model, post=post, user=request.user)
+        return Response({"post": post.pk, state: request.method == "PUT", "changed": changed})
+
+    @action(
+        detail=True, methods=["put", "delete"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def like(self, request, pk=None):
+        """Idempotently like (``PUT``) or unlike (``DELETE``) the post."""
+
+        return self._toggle(request, Like, "liked")
+
+    @action(
+        detail=True, methods=["put", "delete"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def repost(self, request, pk=None):
+        """Idempotently repost (``PUT``, optional ``quote_text``) or undo the repost."""
+
+        if request.method == "DELETE":
+            return self._toggle(request, Repost, "reposted")
+        quote_text = str(request.data.get("quote_text", ""))
+        if len(quote_text) > 500:
+            return Response(
+                {"quote_text": ["Ensure this field has no more than 500 characters."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self._toggle(request, Repost, "reposted", quote_text=quote_text)
+
+    @action(
+        detail=True, methods=["put", "delete"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def bookmark(self, request, pk=None):
+        """Idempotently bookmark (``PUT``) or remove the bookmark (``DELETE``)."""
+
+        return self._toggle(request, Bookmark, "bookmarked")
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated, IsAuthorOrStaff],
+    )
+    def analytics(self, request, pk=None):
+        """Engagement of the post per hour or day, for its author."""
+        post = self.get_object()
+        return analytics_response(request, EngagementRollup.Scope.POST, post.pk)
+
+    @action(
+        detail=True, methods=["put", "delete"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def vote(self, request, pk=None):
+        """Set (``PUT``) or withdraw (``DELETE``) the current user's moderation vote."""
+
+        post = self.get_object()
+        if request.method == "DELETE":
+            removed = toggles.remove(Vote, post=post, voter=request.user)
+            return Response({"post": post.pk, "voted": False, "changed": removed})
+
+        serializer = VoteStateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # The weight is decided here, not by the client: every vote counts the same for now.
+        weight = Decimal("1.0")
+        # One INSERT … ON CONFLICT DO UPDATE; vote_count only moves when a row is inserted.
+        vote, _ = toggles.upsert(
+            Vote,
+            conflict=("post", "voter"),
+            update=("vote_type", "weight", "active", "updated_at"),
+            post=post,
+            voter=request.user,
+            active=True,
+            weight=weight,
+            **serializer.validated_data,
+        )
+        if vote is not None:
+            evaluate_post(post)
+        return Response(
+            {
+                "post": post.pk,
+                "voted": True,
+                "changed": vote is not None,
+                "vote_type": serializer.validated_data["vote_type"],
+                "weight": str(weight),
+            }
+        )
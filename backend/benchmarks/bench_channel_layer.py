@@ -0,0 +1,98 @@
+"""Benchmark: group placement and throughput of the sharded channel layer.
+
+Without ``--hosts`` only the placement is measured: how evenly ``following`` groups
+spread over N shards and how many of them move when a shard is added, for the
+consistent hash ring against ``channels_redis``' default range split. With two or
+more ``--hosts`` it also times ``group_send`` + ``receive`` round trips through real
+Redis instances (``docker compose --profile sharded up redis redis-shard-1
+redis-shard-2`` starts three).
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_channel_layer.py --shards 3 --groups 50000
+    python benchmarks/bench_channel_layer.py \\
+        --hosts redis://localhost:6379,redis://localhost:6380,redis://localhost:6381
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from channels_redis.utils import _consistent_hash as range_split  # noqa: E402
+
+from config.channel_layers import ConsistentHashRedisChannelLayer, HashRing  # noqa: E402
+
+
+def report_placement(shards: int, groups: list[str]) -> None:
+    nodes = [f"redis://shard-{index}:6379" for index in range(shards + 1)]
+    before_ring, after_ring = HashRing(nodes[:shards]), HashRing(nodes)
+    strategies = {
+        "range split": (
+            lambda key: range_split(key, shards),
+            lambda key: range_split(key, shards + 1),
+        ),
+        "hash ring": (before_ring.node_for, after_ring.node_for),
+    }
+
+    print(f"\n{len(groups)} groups, {shards} -> {shards + 1} shards")
+    print(f"  {'strategy':<14}{'max/avg load':>14}{'moved':>10}{'ideal':>10}")
+    for name, (before, after) in strategies.items():
+        load = Counter(before(group) for group in groups)
+        imbalance = max(load.values()) / (len(groups) / shards)
+        moved = sum(before(group) != after(group) for group in groups) / len(groups)
+        print(f"  {name:<14}{imbalance:>14.2f}{moved:>10.1%}{1 / (shards + 1):>10.1%}")
+
+
+async def round_trips(hosts: list[str], groups: list[str], messages: int) -> float:
+    layer = ConsistentHashRedisChannelLayer(hosts=hosts)
+    channels = {}
+    for group in groups:
+        channels[group] = await layer.new_channel()
+        await layer.group_add(group, channels[group])
+
+    started = time.perf_counter()
+    for index in range(messages):
+        group = groups[index % len(groups)]
+        await layer.group_send(group, {"type": "feed.broadcast", "frame": "{}"})
+        await layer.receive(channels[group])
+    elapsed = time.perf_counter() - started
+
+    await layer.flush()
+    await layer.close_pools()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, default=3)
+    parser.add_argument("--groups", type=int, default=50000)
+    parser.add_argument("--hosts", default="", help="comma-separated Redis URLs")
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    groups = [f"feed_following_{user_id}" for user_id in range(args.groups)]
+    report_placement(args.shards, groups)
+
+    hosts = [host.strip() for host in args.hosts.split(",") if host.strip()]
+    if len(hosts) < 2:
+        return
+    elapsed = asyncio.run(round_trips(hosts, groups[:200], args.messages))
+    print(f"\ngroup_send + receive over {len(hosts)} shards")
+    print(f"  {args.messages / elapsed:,.0f} msg/s, {elapsed / args.messages * 1e6:.1f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
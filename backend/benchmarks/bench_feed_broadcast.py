@@ -0,0 +1,103 @@
+"""Micro-benchmark: per-connection CPU cost of delivering one feed broadcast.
+
+Compares the legacy path, where every ``FeedConsumer`` re-wraps and JSON-encodes the
+payload, with the pre-encoded path, where the producer builds the frame once and each
+consumer forwards the text. No database or channel layer is involved.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_feed_broadcast.py --connections 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.posts.frames import feed_broadcast_message  # noqa: E402
+
+SAMPLE_POST = {
+    "id": 123456,
+    "author": {
+        "id": 42,
+        "handle": "ourvoice",
+        "display_name": "OUR Voice",
+        "avatar": "https://cdn.ourvoice.app/avatars/42.png",
+    },
+    "text": "Debate aberto sobre moderação comunitária e transparência. " * 6,
+    "image": None,
+    "visibility": "public",
+    "in_reply_to": None,
+    "quoted_post": 1234,
+    "is_archived": False,
+    "archived_at": None,
+    "deleted_at": None,
+    "created_at": "2026-10-19T12:00:00.000000Z",
+    "updated_at": "2026-10-19T12:00:00.000000Z",
+}
+
+
+def legacy_delivery(event: dict, connections: int) -> None:
+    """Mimic the old consumer: one dict wrap and one ``json.dumps`` per socket."""
+
+    for _ in range(connections):
+        json.dumps(
+            {
+                "type": "feed.update",
+                "scope": "for_you",
+                "event": event["event"],
+                "post": event["payload"],
+            }
+        )
+
+
+def pre_encoded_delivery(event: dict, connections: int) -> None:
+    """Mimic the current consumer: read the frame and hand it to ``send``."""
+
+    for _ in range(connections):
+        event.get("frame")
+
+
+def measure(func, event: dict, connections: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(event, connections)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    event = feed_broadcast_message("for_you", "post.created", SAMPLE_POST)
+    encode_cost = time.perf_counter() - started
+
+    legacy = measure(legacy_delivery, event, args.connections, args.repeat)
+    pre_encoded = measure(pre_encoded_delivery, event, args.connections, args.repeat)
+
+    print(f"connections:            {args.connections}")
+    print(f"frame size:             {len(event['frame'].encode())} bytes")
+    print(f"producer encode (once): {encode_cost * 1e6:9.2f} us")
+    print(f"legacy per connection:  {legacy / args.connections * 1e6:9.2f} us")
+    print(f"frame per connection:   {pre_encoded / args.connections * 1e6:9.2f} us")
+    print(f"speedup:                {legacy / pre_encoded:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
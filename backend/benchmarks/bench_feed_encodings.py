@@ -0,0 +1,95 @@
+"""Benchmark: bytes on the wire and CPU per frame for each feed socket encoding.
+
+Measures a single ``feed.update`` frame and a 50-post ``feed.initial`` snapshot in
+``json``, ``msgpack`` and ``deflate`` (with the preset dictionary), plus plain deflate
+without a dictionary for reference. Transcoding is timed uncached, i.e. the cost paid
+once per process per distinct frame.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_feed_encodings.py --iterations 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.posts.encodings import encode_deflate, encode_msgpack  # noqa: E402
+from apps.posts.frames import encode_frame, feed_update_frame, snapshot_frame  # noqa: E402
+
+
+def sample_post(post_id: int) -> dict:
+    author_id = post_id % 7
+    return {
+        "id": post_id,
+        "author": {
+            "id": author_id,
+            "handle": f"voz{author_id}",
+            "display_name": f"Voz da Comunidade {author_id}",
+            "avatar": f"/media/avatars/{author_id}.png",
+        },
+        "text": f"Proposta {post_id}: transparência na moderação comunitária do bairro.",
+        "image": None,
+        "visibility": "public",
+        "in_reply_to": None,
+        "quoted_post": None,
+        "is_archived": False,
+        "archived_at": None,
+        "deleted_at": None,
+        "created_at": f"2026-10-19T12:{post_id % 60:02d}:00.000000Z",
+        "updated_at": f"2026-10-19T12:{post_id % 60:02d}:00.000000Z",
+    }
+
+
+def deflate_without_dictionary(frame: str) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(frame.encode()) + compressor.flush()
+
+
+ENCODERS = {
+    "json": str.encode,
+    "msgpack": encode_msgpack,
+    "deflate+dict": encode_deflate,
+    "deflate": deflate_without_dictionary,
+}
+
+
+def report(label: str, frame: str, iterations: int) -> None:
+    print(f"\n{label}")
+    print(f"  {'encoding':<14}{'bytes':>8}{'ratio':>8}{'us/frame':>11}")
+    baseline = len(frame.encode())
+    for name, encoder in ENCODERS.items():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            data = encoder(frame)
+        elapsed = (time.perf_counter() - started) / iterations
+        print(f"  {name:<14}{len(data):>8}{len(data) / baseline:>8.2f}{elapsed * 1e6:>11.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    update = feed_update_frame("for_you", "post.created", sample_post(1), "1760875200000-0")
+    body = encode_frame({"cursor": "1760875200000-0", "posts": [sample_post(i) for i in range(50)]})
+    snapshot = snapshot_frame("feed.initial", "for_you", body)
+
+    report("feed.update (1 post)", update, args.iterations)
+    report("feed.initial (50 posts)", snapshot, max(args.iterations // 20, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Load harness: thousands of feed sockets and a post-creation load in one process.
+
+Opens ``for_you`` and ``following`` sockets against ``FeedConsumer`` through the
+Channels test communicator, then creates posts at a fixed rate through the ORM so
+the real ``post_save`` broadcast path runs. Reports connect latency, broadcast
+delivery latency percentiles, memory per connection, message loss and the feed
+layer's own overflow and eviction counters.
+
+The in-memory channel layer measures the consumer alone; ``--layer redis`` routes
+broadcasts and the replay log through a local Redis. By default a throwaway SQLite
+file holds the seeded users and posts; ``--database settings`` uses the configured
+database instead (its rows are left in place).
+
+Usage (from ``backend/``)::
+
+    python benchmarks/load_feed_sockets.py --for-you 2000 --following 1000 --posts 200 --rate 20
+    python benchmarks/load_feed_sockets.py --layer redis --redis-url redis://localhost:6379/2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--for-you", type=int, default=1000, help="anonymous for_you sockets")
+    parser.add_argument("--following", type=int, default=500, help="authenticated sockets")
+    parser.add_argument("--authors", type=int, default=50)
+    parser.add_argument("--follows", type=int, default=10, help="authors followed per reader")
+    parser.add_argument("--posts", type=int, default=100, help="posts created during the run")
+    parser.add_argument("--rate", type=float, default=20, help="posts per second")
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--settle", type=float, default=5, help="seconds to wait for stragglers")
+    parser.add_argument("--layer", choices=("memory", "redis"), default="memory")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/2")
+    parser.add_argument("--capacity", type=int, default=1000, help="channel layer capacity")
+    parser.add_argument("--database", choices=("sqlite", "settings"), default="sqlite")
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="attribute Python heap per connection (slower)"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def configure(args: argparse.Namespace) -> str | None:
+    """Point Django at the harness backends before ``django.setup()``."""
+
+    database_path = None
+    if args.database == "sqlite":
+        handle, database_path = tempfile.mkstemp(prefix="feed-load-", suffix=".sqlite3")
+        os.close(handle)
+        settings.DATABASES = {
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": database_path}
+        }
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    settings.FEED_COUNTER_TICK = 0
+    settings.FEED_DRAIN_SIGNAL = ""
+    if args.layer == "memory":
+        settings.CHANNEL_LAYERS = {
+            "default": {
+                "BACKEND": "channels.layers.InMemoryChannelLayer",
+                "CONFIG": {"capacity": args.capacity},
+            }
+        }
+        settings.FEED_REPLAY_BACKEND = "apps.posts.replay.InMemoryReplayLog"
+    else:
+        settings.CHANNEL_LAYERS = {
+            "default": {
+                "BACKEND": "channels_redis.core.RedisChannelLayer",
+                "CONFIG": {"hosts": [args.redis_url], "capacity": args.capacity},
+            }
+        }
+        settings.REDIS_URL = args.redis_url
+        settings.FEED_REPLAY_BACKEND = "apps.posts.replay.RedisReplayLog"
+    django.setup()
+    if database_path:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+    return database_path
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is a high-water mark in KiB on Linux, which still bounds growth.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return (
+        f"p50 {at(0.50):.1f}ms  p95 {at(0.95):.1f}ms  p99 {at(0.99):.1f}ms  "
+        f"max {ordered[-1] * 1000:.1f}ms"
+    )
+
+
+def seed(args: argparse.Namespace):
+    """Create authors, readers following ``--follows`` authors each, and their tokens."""
+
+    from rest_framework.authtoken.models import Token
+
+    from apps.accounts.models import User, UserFollow
+    from apps.posts.models import Post
+
+    rng = random.Random(args.seed)
+    run = f"{int(time.time())}{rng.randrange(1000)}"
+    authors = [
+        User.objects.create(email=f"author{i}-{run}@load.test", handle=f"a{run}_{i}")
+        for i in range(args.authors)
+    ]
+    readers = [
+        User.objects.create(email=f"reader{i}-{run}@load.test", handle=f"r{run}_{i}")
+        for i in range(args.following)
+    ]
+    follows = {
+        reader.pk: {author.pk for author in rng.sample(authors, min(args.follows, len(authors)))}
+        for reader in readers
+    }
+    UserFollow.objects.bulk_create(
+        UserFollow(follower_id=reader_id, followed_id=author_id)
+        for reader_id, author_ids in follows.items()
+        for author_id in author_ids
+    )
+    Token.objects.bulk_create(Token(key=Token.generate_key(), user=reader) for reader in readers)
+    tokens = dict(Token.objects.filter(user__in=readers).values_list("user_id", "key"))
+    # Seed posts so snapshots carry a realistic body; bulk_create skips broadcasts.
+    Post.objects.bulk_create(
+        Post(author=rng.choice(authors), text=f"Post inicial {i}", visibility="public")
+        for i in range(50)
+    )
+    return authors, follows, tokens
+
+
+class Subscriber:
+    """One simulated client socket that records when each broadcast post arrives."""
+
+    def __init__(self, path: str, follows: set[int] | None):
+        from channels.testing import WebsocketCommunicator
+
+        from apps.posts.consumers import FeedConsumer
+
+        self.communicator = WebsocketCommunicator(FeedConsumer.as_asgi(), path)
+        self.follows = follows
+        self.arrivals: list[tuple[int, float]] = []
+        self.resyncs = 0
+        self.closed = False
+
+    def expects(self, author_id: int) -> bool:
+        return self.follows is None or author_id in self.follows
+
+    async def connect(self) -> float:
+        started = time.perf_counter()
+        connected, _ = await self.communicator.connect(timeout=30)
+        if not connected:
+            raise RuntimeError("socket was refused")
+        await self.communicator.receive_from(timeout=30)
+        return time.perf_counter() - started
+
+    async def listen(self):
+        while True:
+            output = await self.communicator.receive_output(timeout=3600)
+            if output["type"] == "websocket.close":
+                self.closed = True
+                return
+            frame = json.loads(output.get("text") or "{}")
+            if frame.get("type") == "feed.update":
+                self.arrivals.append((frame["post"]["id"], time.perf_counter()))
+            elif frame.get("type") == "feed.resync":
+                self.resyncs += 1
+
+
+async def run(args: argparse.Namespace):
+    from channels.db import database_sync_to_async
+
+    from apps.posts import metrics
+    from apps.posts.models import Post
+
+    authors, follows, tokens = await database_sync_to_async(seed)(args)
+    subscribers = [Subscriber("/ws/posts/feed/", None) for _ in range(args.for_you)]
+    subscribers += [
+        Subscriber(f"/ws/posts/feed/?scope=following&token={tokens[reader_id]}", author_ids)
+        for reader_id, author_ids in follows.items()
+    ]
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0] if args.tracemalloc else rss_bytes()
+
+    gate = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(subscriber: Subscriber) -> float:
+        async with gate:
+            return await subscriber.connect()
+
+    started = time.perf_counter()
+    connect_latencies = await asyncio.gather(*(connect(s) for s in subscribers))
+    connect_elapsed = time.perf_counter() - started
+    memory_after = tracemalloc.get_traced_memory()[0] if args.tracemalloc else rss_bytes()
+    listeners = [asyncio.create_task(s.listen()) for s in subscribers]
+
+    sent: dict[int, tuple[int, float]] = {}
+    rng = random.Random(args.seed)
+    create = database_sync_to_async(Post.objects.create)
+    started = time.perf_counter()
+    for index in range(args.posts):
+        delay = started + index / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        author = rng.choice(authors)
+        created_at = time.perf_counter()
+        post = await create(author=author, text=f"Carga {index}", visibility="public")
+        sent[post.pk] = (author.pk, created_at)
+    publish_elapsed = time.perf_counter() - started
+
+    expected = sum(s.expects(author_id) for s in subscribers for author_id, _ in sent.values())
+    deadline = time.perf_counter() + args.settle
+    while time.perf_counter() < deadline:
+        if sum(len(s.arrivals) for s in subscribers) >= expected:
+            break
+        await asyncio.sleep(0.05)
+
+    for listener in listeners:
+        listener.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+    await asyncio.gather(
+        *(s.communicator.disconnect() for s in subscribers if not s.closed),
+        return_exceptions=True,
+    )
+
+    delivered = 0
+    latencies = []
+    for subscriber in subscribers:
+        seen = set()
+        for post_id, arrived_at in subscriber.arrivals:
+            if post_id in sent and post_id not in seen:
+                seen.add(post_id)
+                latencies.append(arrived_at - sent[post_id][1])
+        delivered += len(seen)
+
+    sockets = len(subscribers)
+    memory_per_socket = (memory_after - memory_before) / max(sockets, 1) / 1024
+    memory_label = "traced heap" if args.tracemalloc else "RSS"
+    print(f"\nlayer={args.layer} sockets={sockets}", end=" ")
+    print(f"({args.for_you} for_you, {args.following} following)")
+    print(f"  connect        {sockets / connect_elapsed:,.0f}/s  {percentiles(connect_latencies)}")
+    print(f"  memory         {memory_per_socket:.1f} KiB/socket ({memory_label})")
+    achieved_rate = len(sent) / publish_elapsed
+    print(f"  posts          {len(sent)} in {publish_elapsed:.2f}s ({achieved_rate:.1f}/s)")
+    print(f"  delivery       {percentiles(latencies)}")
+    print(
+        f"  deliveries     {delivered}/{expected} "
+        f"(lost {expected - delivered}, {(expected - delivered) / max(expected, 1):.2%})"
+    )
+    print(
+        f"  feed layer     resyncs {sum(s.resyncs for s in subscribers)}  "
+        f"overflows {metrics.outbound_overflows.value():.0f}  "
+        f"evictions {metrics.slow_consumer_evictions.value():.0f}  "
+        f"group_send failures {sum(v for _, v in metrics.group_send_failures.samples()):.0f}"
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    database_path = configure(args)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if database_path:
+            os.unlink(database_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Channel layer that shards groups and channels over Redis nodes with a hash ring.
+
+``channels_redis`` already spreads keys over several hosts, but it splits the hash
+space into equal ranges, so adding a node reassigns roughly half of all groups.
+``ConsistentHashRedisChannelLayer`` places every host on a ring of virtual nodes
+keyed by the host address instead: a new node only takes over the arcs it lands on,
+about ``1 / len(hosts)`` of the groups, and every other group keeps its node.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+from collections.abc import Iterable
+
+from channels_redis.core import RedisChannelLayer
+
+
+def _ring_position(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def host_identity(host: dict) -> str:
+    """Stable name of a decoded ``channels_redis`` host entry, used to place it on the ring."""
+
+    if "address" in host:
+        return str(host["address"])
+    return f"{host.get('host', 'localhost')}:{host.get('port', 6379)}/{host.get('db', 0)}"
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to node indexes through virtual nodes."""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 160):
+        self.nodes = list(nodes)
+        points = sorted(
+            (_ring_position(f"{node}#{replica}"), index)
+            for index, node in enumerate(self.nodes)
+            for replica in range(replicas)
+        )
+        self._positions = [position for position, _ in points]
+        self._indexes = [index for _, index in points]
+
+    def node_for(self, key: str | bytes) -> int:
+        if len(self.nodes) == 1:
+            return 0
+        if isinstance(key, bytes):
+            key = key.decode("utf8")
+        slot = bisect.bisect(self._positions, _ring_position(key)) % len(self._positions)
+        return self._indexes[slot]
+
+
+class ConsistentHashRedisChannelLayer(RedisChannelLayer):
+    """``RedisChannelLayer`` that picks the node of a group or channel by consistent hashing.
+
+    Accepts the same configuration as ``RedisChannelLayer`` plus ``ring_replicas``,
+    the number of virtual nodes per host.
+    """
+
+    def __init__(self, *args, ring_replicas: int = 160, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ring = HashRing((host_identity(host) for host in self.hosts), ring_replicas)
+
+    def consistent_hash(self, value):
+        return self.ring.node_for(value)
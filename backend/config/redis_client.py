@@ -0,0 +1,24 @@
+"""Shared Redis connections for application-level data structures."""
+
+from __future__ import annotations
+
+from functools import cache
+
+import redis
+from django.conf import settings
+
+
+@cache
+def _client_for(url: str) -> redis.Redis:
+    return redis.Redis.from_url(
+        url,
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+
+
+def get_redis(url: str | None = None) -> redis.Redis:
+    """Return a pooled client for ``url`` (``settings.REDIS_URL`` by default)."""
+
+    return _client_for(url or settings.REDIS_URL)
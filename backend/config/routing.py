@@ -3,10 +3,12 @@
 from channels.routing import URLRouter
 from django.urls import path
 
+from apps.notifications.consumers import NotificationConsumer
 from apps.posts.consumers import FeedConsumer
 
 websocket_urlpatterns = [
     path("ws/posts/feed/", FeedConsumer.as_asgi()),
+    path("ws/notifications/", NotificationConsumer.as_asgi()),
 ]
 
 application = URLRouter(websocket_urlpatterns)
@@ -1,4 +1,5 @@
 import os
+import socket
 import sys
 from pathlib import Path
 
@@ -87,6 +88,24 @@ DATABASES = {
 if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
     DATABASES["default"]["NAME"] = BASE_DIR / "db.sqlite3"
 
+# Databases holding the like, repost, bookmark and vote tables, sharded by post id
+# (see apps/interactions/sharding.py). Empty keeps them in "default". Only append to
+# the list: shard order decides where rows live. Each shard is a database named after
+# its alias, on the "default" server unless <ALIAS>_DB_HOST names another.
+INTERACTION_SHARDS = [
+    alias.strip() for alias in os.getenv("INTERACTION_SHARDS", "").split(",") if alias.strip()
+]
+for _alias in INTERACTION_SHARDS:
+    if _alias != "default":
+        DATABASES[_alias] = {
+            **DATABASES["default"],
+            "NAME": BASE_DIR / f"db_{_alias}.sqlite3"
+            if DATABASES["default"]["ENGINE"].endswith("sqlite3")
+            else f"{DATABASES['default']['NAME']}_{_alias}",
+            "HOST": os.getenv(f"{_alias.upper()}_DB_HOST", DATABASES["default"]["HOST"]),
+        }
+DATABASE_ROUTERS = ["apps.interactions.sharding.InteractionShardRouter"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -112,7 +131,7 @@ AUTH_USER_MODEL = "accounts.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "apps.accounts.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -125,8 +144,45 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 20,
+    "DEFAULT_THROTTLE_CLASSES": ["config.throttling.TokenBucketThrottle"],
+    # Reverse proxies in front of the app. With 0 the client IP is REMOTE_ADDR; set it
+    # behind a proxy so throttling reads the client from X-Forwarded-For.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
+}
+
+# Token-bucket throttling per endpoint family (see config/throttling.py). Each budget
+# is "<burst>/<period>": that many requests at once, refilled evenly over the period.
+# Users and client IPs have separate buckets; requests must fit both.
+THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", "True").lower() in {"true", "1", "yes"}
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "config.throttling.RedisTokenBuckets")
+THROTTLE_BUDGETS = {
+    "posts": {"user": "20/min", "ip": "60/min"},
+    "votes": {"user": "60/min", "ip": "180/min"},
+    "interactions": {"user": "120/min", "ip": "360/min"},
+    "bulk": {"user": "10/min", "ip": "30/min"},
+    "feed": {"user": "60/min", "ip": "180/min"},
+}
+
+REDIS_URL = os.getenv(
+    "REDIS_URL",
+    f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/0",
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv(
+            "DJANGO_CACHE_URL",
+            f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/1",
+        ),
+    }
 }
 
+# Several comma-separated Redis URLs shard groups and channels with consistent hashing.
+CHANNEL_REDIS_HOSTS = [
+    host.strip() for host in os.getenv("CHANNEL_REDIS_HOSTS", "").split(",") if host.strip()
+]
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -136,12 +192,114 @@ CHANNEL_LAYERS = {
     }
 }
 
+if len(CHANNEL_REDIS_HOSTS) > 1:
+    CHANNEL_LAYERS["default"] = {
+        "BACKEND": "config.channel_layers.ConsistentHashRedisChannelLayer",
+        "CONFIG": {"hosts": CHANNEL_REDIS_HOSTS},
+    }
+
+# Resolved auth tokens: per-process LRU in front of the shared cache.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv("AUTH_TOKEN_LOCAL_TTL", "5"))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+
+# Realtime feed: defaults for clients that opt into batched ``feed.batch`` frames.
+FEED_BATCH_WINDOW_MS = int(os.getenv("FEED_BATCH_WINDOW_MS", "250"))
+FEED_BATCH_MAX_SIZE = int(os.getenv("FEED_BATCH_MAX_SIZE", "50"))
+# Seconds a feed snapshot is shared between connecting sockets (0 disables the cache).
+FEED_SNAPSHOT_TTL = int(os.getenv("FEED_SNAPSHOT_TTL", "2"))
+FEED_SNAPSHOT_LOCK_TIMEOUT = int(os.getenv("FEED_SNAPSHOT_LOCK_TIMEOUT", "5"))
+# Bounded per-scope event log that lets reconnecting clients resume from a cursor.
+FEED_REPLAY_BACKEND = os.getenv("FEED_REPLAY_BACKEND", "apps.posts.replay.RedisReplayLog")
+FEED_REPLAY_MAX_EVENTS = int(os.getenv("FEED_REPLAY_MAX_EVENTS", "1000"))
+# Per-socket outbound queue; clients that overflow it repeatedly or stay stuck are closed.
+# It only fills for sockets opened with ?ack=1, whose writer stops after FEED_ACK_WINDOW
+# unacknowledged frames; daphne itself never makes a send wait on a slow client.
+FEED_OUTBOUND_QUEUE_SIZE = int(os.getenv("FEED_OUTBOUND_QUEUE_SIZE", "100"))
+FEED_ACK_WINDOW = int(os.getenv("FEED_ACK_WINDOW", "50"))
+FEED_SLOW_CONSUMER_MAX_OVERFLOWS = int(os.getenv("FEED_SLOW_CONSUMER_MAX_OVERFLOWS", "3"))
+FEED_SLOW_CONSUMER_TIMEOUT = float(os.getenv("FEED_SLOW_CONSUMER_TIMEOUT", "30"))
+# Seconds between engagement counter frames per post (0 disables the background ticker).
+FEED_COUNTER_TICK = float(os.getenv("FEED_COUNTER_TICK", "1"))
+FEED_COUNTER_MAX_SUBSCRIPTIONS = int(os.getenv("FEED_COUNTER_MAX_SUBSCRIPTIONS", "100"))
+# Graceful drain before restarts: sockets close spread over the window and clients
+# wait up to the jitter before reconnecting. FEED_SERVER_NAME is the target of
+# ``manage.py drain_feed``; FEED_DRAIN_SIGNAL ("" disables) drains the receiving process.
+FEED_SERVER_NAME = os.getenv("FEED_SERVER_NAME", socket.gethostname())
+FEED_DRAIN_SIGNAL = os.getenv("FEED_DRAIN_SIGNAL", "SIGUSR1")
+FEED_DRAIN_WINDOW = float(os.getenv("FEED_DRAIN_WINDOW", "30"))
+FEED_DRAIN_RECONNECT_JITTER = float(os.getenv("FEED_DRAIN_RECONNECT_JITTER", "5"))
+FEED_DRAIN_FLUSH_TIMEOUT = float(os.getenv("FEED_DRAIN_FLUSH_TIMEOUT", "2"))
+# Realtime calls made while saving posts, interactions and notifications: per-call
+# time budget, overall budget of one post's follower fan-out, consecutive failures
+# that open the circuit breaker and seconds before it probes Redis again.
+# REDIS_SOCKET_TIMEOUT bounds every application Redis command.
+REALTIME_SEND_TIMEOUT = float(os.getenv("REALTIME_SEND_TIMEOUT", "0.25"))
+REALTIME_FANOUT_BUDGET = float(os.getenv("REALTIME_FANOUT_BUDGET", "1"))
+REALTIME_BREAKER_THRESHOLD = int(os.getenv("REALTIME_BREAKER_THRESHOLD", "3"))
+REALTIME_BREAKER_RESET = float(os.getenv("REALTIME_BREAKER_RESET", "10"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+# Most posts one GET /api/posts/{id}/thread/ reads before cutting the thread short.
+THREAD_SCAN_LIMIT = int(os.getenv("THREAD_SCAN_LIMIT", "500"))
+# Debate ranking of replies (apps/posts/ranking.py): weight of a reply's own replies
+# relative to a like, of the author's reputation, and hours for a reply's weight to halve.
+DEBATE_REPLY_WEIGHT = float(os.getenv("DEBATE_REPLY_WEIGHT", "2"))
+DEBATE_REPUTATION_WEIGHT = float(os.getenv("DEBATE_REPUTATION_WEIGHT", "0.25"))
+DEBATE_HALF_LIFE_HOURS = float(os.getenv("DEBATE_HALF_LIFE_HOURS", "12"))
+# Largest number of interactions accepted by one bulk create request.
+INTERACTION_BULK_MAX_ITEMS = int(os.getenv("INTERACTION_BULK_MAX_ITEMS", "500"))
+# Write-behind mode for hot post counters: like, repost and view deltas are buffered
+# in sharded counters and flushed to the database every COUNTER_FLUSH_INTERVAL seconds.
+COUNTER_WRITE_BEHIND = os.getenv("COUNTER_WRITE_BEHIND", "False").lower() in {"true", "1", "yes"}
+COUNTER_BUFFER_BACKEND = os.getenv(
+    "COUNTER_BUFFER_BACKEND", "apps.interactions.write_behind.RedisCounterBuffer"
+)
+COUNTER_BUFFER_SHARDS = int(os.getenv("COUNTER_BUFFER_SHARDS", "8"))
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "2"))
+# Bearer token required by GET /metrics/ (empty leaves the endpoint open).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Interaction event log: consumer groups (dotted paths) that read it, events per batch,
+# seconds an event must age before it is read (lets writers commit), and days read
+# events are kept for replays.
+INTERACTION_EVENT_CONSUMERS = [
+    "apps.notifications.events.NotificationEvents",
+    "apps.interactions.rollups.EngagementRollups",
+    "apps.posts.events.DebateRanking",
+]
+INTERACTION_EVENT_BATCH_SIZE = int(os.getenv("INTERACTION_EVENT_BATCH_SIZE", "500"))
+INTERACTION_EVENT_SETTLE = float(os.getenv("INTERACTION_EVENT_SETTLE", "2"))
+INTERACTION_EVENT_INTERVAL = float(os.getenv("INTERACTION_EVENT_INTERVAL", "5"))
+INTERACTION_EVENT_RETENTION_DAYS = int(os.getenv("INTERACTION_EVENT_RETENTION_DAYS", "7"))
+# Engagement rollups: days hourly buckets are kept (daily ones stay) and the most
+# buckets one analytics request may read.
+ENGAGEMENT_HOURLY_RETENTION_DAYS = int(os.getenv("ENGAGEMENT_HOURLY_RETENTION_DAYS", "90"))
+ENGAGEMENT_MAX_BUCKETS = int(os.getenv("ENGAGEMENT_MAX_BUCKETS", "750"))
+
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
 CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    "consume-interaction-events": {
+        "task": "apps.interactions.tasks.consume_interaction_events",
+        "schedule": INTERACTION_EVENT_INTERVAL,
+    },
+    "prune-interaction-events": {
+        "task": "apps.interactions.tasks.prune_interaction_events",
+        "schedule": 3600,
+    },
+    "prune-engagement-rollups": {
+        "task": "apps.interactions.tasks.prune_engagement_rollups",
+        "schedule": 86400,
+    },
+}
+if COUNTER_WRITE_BEHIND:
+    CELERY_BEAT_SCHEDULE["flush-counter-buffer"] = {
+        "task": "apps.interactions.tasks.flush_counter_buffer",
+        "schedule": COUNTER_FLUSH_INTERVAL,
+    }
 
 if DEBUG:
     CELERY_TASK_ALWAYS_EAGER = True
@@ -0,0 +1,177 @@
+"""Token-bucket request throttling per endpoint family, per user and per client IP.
+
+Views name the family of each action in ``throttle_families`` (action -> family);
+``THROTTLE_BUDGETS`` gives every family a ``"<burst>/<period>"`` budget for users and
+for IPs. A bucket holds up to ``burst`` tokens and refills evenly over the period;
+each request takes one token from its user bucket and from its IP bucket, or from
+neither when either is empty. Actions without a family are not throttled.
+
+``RedisTokenBuckets`` checks and updates all buckets of a request in one Lua script,
+so a request costs a single round trip and concurrent requests cannot overdraw a
+bucket. If Redis is unreachable requests are let through rather than rejected.
+``InMemoryTokenBuckets`` keeps buckets in the process, for tests and development.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from functools import cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from apps.posts import metrics
+from apps.posts.broadcast import CircuitBreaker
+from config.redis_client import get_redis
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# (key, capacity, tokens refilled per second)
+Bucket = tuple[str, int, float]
+
+throttle_breaker = CircuitBreaker("throttle")
+
+
+@cache
+def parse_budget(budget: str) -> tuple[int, float]:
+    """Return ``(capacity, refill per second)`` for a ``"<burst>/<period>"`` budget."""
+
+    burst, period = budget.split("/")
+    capacity = int(burst)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class BaseTokenBuckets:
+    """Interface shared by token bucket backends."""
+
+    def take(self, buckets: list[Bucket]) -> float:
+        """Take a token from every bucket if all have one.
+
+        Returns 0 when the tokens were taken, otherwise the seconds until they would be.
+        """
+
+        raise NotImplementedError
+
+
+# KEYS: bucket keys. ARGV: capacity and refill rate of each key, in order.
+TAKE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens, wait = {}, 0
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'at')
+    local level = tonumber(state[1]) or capacity
+    local elapsed = math.max(now - (tonumber(state[2]) or now), 0)
+    level = math.min(capacity, level + elapsed * rate)
+    if level < 1 then
+        wait = math.max(wait, (1 - level) / rate)
+    end
+    tokens[i] = level
+end
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local level = tokens[i]
+    if wait == 0 then
+        level = level - 1
+    end
+    redis.call('HSET', key, 'tokens', level, 'at', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return tostring(wait)
+"""
+
+
+class RedisTokenBuckets(BaseTokenBuckets):
+    """Buckets kept in Redis hashes that expire once they would be full again."""
+
+    key_prefix = "throttle:"
+
+    def __init__(self):
+        self._script = get_redis().register_script(TAKE_SCRIPT)
+
+    def take(self, buckets: list[Bucket]) -> float:
+        keys = [f"{self.key_prefix}{key}" for key, _, _ in buckets]
+        args = [value for _, capacity, rate in buckets for value in (capacity, rate)]
+        return float(self._script(keys=keys, args=args))
+
+
+class InMemoryTokenBuckets(BaseTokenBuckets):
+    """Process-local buckets, for tests and single-process development."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def take(self, buckets: list[Bucket]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, capacity, rate in buckets:
+                level, at = self._buckets.get(key, (capacity, now))
+                levels.append(min(capacity, level + (now - at) * rate))
+            wait = max(
+                [(1 - level) / rate for level, (_, _, rate) in zip(levels, buckets) if level < 1],
+                default=0.0,
+            )
+            for level, (key, _, _) in zip(levels, buckets):
+                self._buckets[key] = (level - 1 if wait == 0 else level, now)
+        return wait
+
+
+_buckets: BaseTokenBuckets | None = None
+
+
+def get_token_buckets() -> BaseTokenBuckets:
+    """Return the configured token bucket backend."""
+
+    global _buckets
+    if _buckets is None:
+        _buckets = import_string(settings.THROTTLE_BACKEND)()
+    return _buckets
+
+
+@receiver(setting_changed)
+def _reset_token_buckets(setting, **_):
+    global _buckets
+    if setting.startswith("THROTTLE_"):
+        _buckets = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle by the family of the requested action, per user and per client IP."""
+
+    def __init__(self):
+        self._wait = 0.0
+
+    def get_family(self, view) -> str | None:
+        families = getattr(view, "throttle_families", {})
+        return families.get(getattr(view, "action", None))
+
+    def get_buckets(self, request, family: str) -> list[Bucket]:
+        budgets = settings.THROTTLE_BUDGETS[family]
+        buckets = [(f"{family}:ip:{self.get_ident(request)}", *parse_budget(budgets["ip"]))]
+        if request.user and request.user.is_authenticated:
+            buckets.append((f"{family}:user:{request.user.pk}", *parse_budget(budgets["user"])))
+        return buckets
+
+    def allow_request(self, request, view) -> bool:
+        if not settings.THROTTLE_ENABLED:
+            return True
+        family = self.get_family(view)
+        if family is None:
+            return True
+        buckets = self.get_buckets(request, family)
+        wait = throttle_breaker.call("throttle", get_token_buckets().take, buckets)
+        # An unreachable backend lets the request through.
+        self._wait = wait or 0.0
+        if self._wait:
+            metrics.requests_throttled.inc(family=family)
+        return not self._wait
+
+    def wait(self) -> float | None:
+        return self._wait or None
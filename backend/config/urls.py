@@ -5,9 +5,12 @@ from django.urls import include, path
 from django.views.generic import TemplateView
 from rest_framework.authtoken.views import obtain_auth_token
 
+from apps.posts.metrics_views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/token/", obtain_auth_token, name="api-token"),
     path("api/", include("config.api_router")),
+    path("metrics/", metrics_view, name="metrics"),
     path("healthz/", TemplateView.as_view(template_name="healthcheck.txt"), name="healthcheck"),
 ]
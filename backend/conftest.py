@@ -0,0 +1,27 @@
+"""Fixtures applied to every test package."""
+
+import copy
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_throttling(settings):
+    """Give each test fresh in-process token buckets instead of shared Redis ones."""
+    settings.THROTTLE_BACKEND = "config.throttling.InMemoryTokenBuckets"
+
+
+# Databases the sharding tests spread the interaction tables over.
+TEST_SHARDS = ("shard_1", "shard_2")
+
+
+def pytest_configure(config):
+    """Declare the test shard databases beside ``default``; tests opt in to them."""
+
+    from django.conf import settings
+
+    default = settings.DATABASES["default"]
+    for alias in TEST_SHARDS:
+        settings.DATABASES.setdefault(
+            alias, {**copy.deepcopy(default), "NAME": f"{default['NAME']}_{alias}"}
+        )
@@ -8,6 +8,7 @@ from factory import fuzzy
 
 from apps.interactions.models import Bookmark, Like, Reply, Repost
 from apps.moderation.models import ModerationDecision, Vote
+from apps.notifications.models import Notification
 from apps.posts.models import Post
 
 User = get_user_model()
@@ -131,4 +132,15 @@ class ReplyFactory(factory.django.DjangoModelFactory):
 
     post = factory.SubFactory(PostFactory)
     author = factory.SubFactory(UserFactory)
-    text = factory.Faker("text", max_nb_chars=400)
\ No newline at end of file
+    text = factory.Faker("text", max_nb_chars=400)
+
+
+class NotificationFactory(factory.django.DjangoModelFactory):
+    """Factory for creating notifications."""
+
+    class Meta:
+        model = Notification
+
+    recipient = factory.SubFactory(UserFactory)
+    actor = factory.SubFactory(UserFactory)
+    notification_type = Notification.Type.LIKE
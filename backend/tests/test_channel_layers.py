@@ -0,0 +1,83 @@
+"""Tests for the consistent-hash sharded channel layer."""
+
+import os
+from collections import Counter
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from config.channel_layers import ConsistentHashRedisChannelLayer, HashRing, host_identity
+
+GROUPS = [f"feed_following_{user_id}" for user_id in range(20000)]
+SHARD_HOSTS = [
+    host.strip() for host in os.getenv("CHANNEL_REDIS_HOSTS", "").split(",") if host.strip()
+]
+
+
+class TestHashRing:
+    """Groups spread evenly and mostly stay put when the ring grows."""
+
+    def test_keys_spread_across_nodes(self):
+        ring = HashRing(["redis://a", "redis://b", "redis://c", "redis://d"])
+
+        load = Counter(ring.node_for(group) for group in GROUPS)
+
+        assert set(load) == {0, 1, 2, 3}
+        assert max(load.values()) < 1.25 * len(GROUPS) / 4
+
+    def test_adding_a_node_moves_only_its_share(self):
+        before = HashRing(["redis://a", "redis://b", "redis://c"])
+        after = HashRing(["redis://a", "redis://b", "redis://c", "redis://d"])
+
+        moved = [group for group in GROUPS if before.node_for(group) != after.node_for(group)]
+
+        assert len(moved) < 0.35 * len(GROUPS)
+        # Groups that moved went to the new node, never between old ones.
+        assert {after.node_for(group) for group in moved} == {3}
+
+    def test_single_node_ring(self):
+        assert HashRing(["redis://a"]).node_for(b"feed_for_you") == 0
+
+    def test_host_identity(self):
+        assert host_identity({"address": "redis://a:6379/0"}) == "redis://a:6379/0"
+        assert host_identity({"host": "a", "port": 6380}) == "a:6380/0"
+
+
+class TestConsistentHashRedisChannelLayer:
+    def test_routes_by_ring(self):
+        layer = ConsistentHashRedisChannelLayer(
+            hosts=["redis://a:6379", "redis://b:6379", "redis://c:6379"]
+        )
+
+        assert layer.ring_size == 3
+        for group in GROUPS[:100]:
+            assert layer.consistent_hash(group) == layer.ring.node_for(group)
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    len(SHARD_HOSTS) < 2, reason="set CHANNEL_REDIS_HOSTS to two or more local Redis URLs"
+)
+class TestShardedRedisDelivery:
+    """Round trip through several real Redis instances."""
+
+    def test_group_send_reaches_members_on_every_shard(self):
+        layer = ConsistentHashRedisChannelLayer(hosts=SHARD_HOSTS)
+
+        async def scenario():
+            groups = GROUPS[:50]
+            channels = {}
+            for group in groups:
+                channels[group] = await layer.new_channel()
+                await layer.group_add(group, channels[group])
+            for group in groups:
+                await layer.group_send(group, {"type": "feed.broadcast", "group": group})
+            received = {group: await layer.receive(channels[group]) for group in groups}
+            await layer.flush()
+            await layer.close_pools()
+            return groups, received
+
+        groups, received = async_to_sync(scenario)()
+
+        assert {layer.consistent_hash(group) for group in groups} == set(range(len(SHARD_HOSTS)))
+        assert all(received[group]["group"] == group for group in groups)
@@ -0,0 +1,132 @@
+"""Tests for token-bucket throttling per endpoint family."""
+
+import os
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config import throttling
+from tests.factories import PostFactory, UserFactory
+
+REDIS_URL = os.getenv("THROTTLE_TEST_REDIS_URL")
+
+
+@pytest.fixture
+def budgets(settings):
+    settings.THROTTLE_BUDGETS = {
+        "posts": {"user": "2/min", "ip": "3/min"},
+        "votes": {"user": "2/min", "ip": "3/min"},
+        "interactions": {"user": "2/min", "ip": "3/min"},
+        "bulk": {"user": "2/min", "ip": "3/min"},
+        "feed": {"user": "2/min", "ip": "3/min"},
+    }
+    throttling.throttle_breaker.reset()
+    yield
+    throttling.throttle_breaker.reset()
+
+
+class TestTokenBuckets:
+    """Buckets allow a burst, then refill at their rate."""
+
+    def test_parse_budget(self):
+        assert throttling.parse_budget("30/min") == (30, 0.5)
+        assert throttling.parse_budget("10/s") == (10, 10.0)
+
+    def test_burst_then_wait(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(throttling.time, "monotonic", lambda: now[0])
+        buckets = throttling.InMemoryTokenBuckets()
+        bucket = [("k", 2, 0.5)]
+
+        assert [buckets.take(bucket) for _ in range(3)] == [0, 0, 2.0]
+        now[0] += 2
+        assert buckets.take(bucket) == 0
+
+    def test_takes_from_all_buckets_or_none(self):
+        buckets = throttling.InMemoryTokenBuckets()
+
+        assert buckets.take([("small", 1, 1.0), ("large", 5, 1.0)]) == 0
+        assert buckets.take([("small", 1, 1.0), ("large", 5, 1.0)]) > 0
+        # The rejected request did not spend from the bucket that still had tokens.
+        assert [buckets.take([("large", 5, 1.0)]) for _ in range(4)] == [0, 0, 0, 0]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("budgets")
+class TestTokenBucketThrottle:
+    """Families get separate budgets; users and IPs each have a bucket."""
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _create_post(self, client):
+        return client.post("/api/posts/", {"text": "Olá"}, format="json")
+
+    def test_user_budget_returns_429_with_retry_after(self):
+        responses = [self._create_post(self.client) for _ in range(3)]
+
+        assert [response.status_code for response in responses[:2]] == [201, 201]
+        assert responses[2].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(responses[2]["Retry-After"]) > 0
+
+    def test_families_do_not_share_buckets(self):
+        post = PostFactory()
+        for _ in range(2):
+            self._create_post(self.client)
+
+        response = self.client.put(f"/api/posts/{post.pk}/like/")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_ip_budget_is_shared_by_users(self):
+        statuses = []
+        for _ in range(2):
+            client = APIClient()
+            client.force_authenticate(user=UserFactory())
+            statuses += [self._create_post(client).status_code for _ in range(2)]
+
+        assert statuses == [201, 201, 201, 429]
+
+    def test_anonymous_requests_use_the_ip_bucket(self):
+        statuses = [APIClient().get("/api/posts/feed/").status_code for _ in range(4)]
+
+        assert statuses == [200, 200, 200, 429]
+
+    def test_actions_without_a_family_are_not_throttled(self):
+        statuses = {APIClient().get("/api/posts/").status_code for _ in range(5)}
+
+        assert statuses == {status.HTTP_200_OK}
+
+    def test_unreachable_backend_lets_requests_through(self, monkeypatch):
+        def fail(buckets):
+            raise ConnectionError("redis down")
+
+        monkeypatch.setattr(throttling.get_token_buckets(), "take", fail)
+
+        statuses = {self._create_post(self.client).status_code for _ in range(4)}
+
+        assert statuses == {status.HTTP_201_CREATED}
+
+    def test_disabled(self, settings):
+        settings.THROTTLE_ENABLED = False
+
+        statuses = {self._create_post(self.client).status_code for _ in range(4)}
+
+        assert statuses == {status.HTTP_201_CREATED}
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not REDIS_URL, reason="set THROTTLE_TEST_REDIS_URL to a local Redis URL")
+class TestRedisTokenBuckets:
+    def test_burst_then_wait(self, settings):
+        settings.REDIS_URL = REDIS_URL
+        buckets = throttling.RedisTokenBuckets()
+        key = f"test:{os.getpid()}"
+
+        waits = [buckets.take([(key, 2, 0.01)]) for _ in range(3)]
+
+        assert waits[:2] == [0, 0]
+        assert waits[2] > 0